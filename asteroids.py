@@ -1,13 +1,27 @@
+import os
 import pygame
 import sys
 import math
 import random
 import json
 
+#entity container, headless harness, sprite layers and text cache shared with asteroids/main.py
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "asteroids"))
+from entities import Entities
+from harness import argument_parser, parse_options, select_drivers, seed_random, init_pygame, load_sound, GameClock, run_games
+from sprites import CircleLayer
+from text import TextCache
+
+#command line options, only read when run as a script so other tools can import the game
+ARGS = parse_options(argument_parser(1/90), sys.argv[1:] if __name__ == "__main__" else [])
+HEADLESS = select_drivers(ARGS.headless)
+seed_random(ARGS.seed)
+
 #initialize pygame
-pygame.init()
-pygame.mixer.init()
+music = init_pygame(HEADLESS)
 clock = pygame.time.Clock()
+CLOCK = GameClock()
+get_ticks = CLOCK.get_ticks
 
 #screen constants
 #WIDTH = pygame.display.Info().current_w
@@ -18,8 +32,19 @@ BACKGROUND_COLOR = (0,0,0)
 #fps limiter
 FPS = 90
 
-#master speed control
-SPEED_MULTIPLIER = (10 * FPS) // FPS
+#fixed simulation step, frames run as many steps as the elapsed time allows up to MAX_STEPS
+STEP = ARGS.delta
+MAX_STEPS = ARGS.max_steps
+
+#speeds are in pixels per step and were tuned at this many steps per second
+TUNED_TICK_RATE = 90
+
+#position between the last two simulation steps
+def interpolated(entity, alpha):
+    return (entity.last_x + (entity.x - entity.last_x) * alpha, entity.last_y + (entity.y - entity.last_y) * alpha)
+
+#master speed control, scaled to the step so the game runs at the same pace at any tick rate
+SPEED_MULTIPLIER = (10 * FPS) // FPS * STEP * TUNED_TICK_RATE
 
 #top score display color
 FONT_COLOR = (255,0,0)
@@ -36,21 +61,21 @@ BULLET_SPEED = 1 * SPEED_MULTIPLIER
 BULLET_RADIUS = 2
 BULLET_COLOR = (0,0,255)
 BULLET_COOLDOWN = 50
-LAST_BULLET_TIME = pygame.time.get_ticks()
+LAST_BULLET_TIME = get_ticks()
 
 #asteroid constants
 ASTEROID_SPEED = 0.1 * SPEED_MULTIPLIER
 ASTEROID_RADIUS = 10
 ASTEROID_COLOR = (0,255,0)
 ASTEROID_COOLDOWN = 500
-LAST_ASTEROID_TIME = pygame.time.get_ticks()
+LAST_ASTEROID_TIME = get_ticks()
 
 #missile constants
 MISSILE_SPEED = 1 * SPEED_MULTIPLIER
 MISSILE_RADIUS = 3
 MISSILE_COLOR = (255,255,255)
 MISSILE_COOLDOWN = 1000
-LAST_MISSILE_TIME = pygame.time.get_ticks()
+LAST_MISSILE_TIME = get_ticks()
 
 #building constants
 BUILDING_COLOR = (255,0,0)
@@ -79,18 +104,20 @@ TOP_SCORE = load_data()
 
 #save data to file
 def save_data():
+    if HEADLESS:
+        return
     data = {"TOP_SCORE": TOP_SCORE}
     with open(DATA_FILE, "w") as file:
         json.dump(data, file)
 
 #audio constants
-SOUND_BULLET = pygame.mixer.Sound("asteroids/audio/bullet.wav")
-SOUND_MISSILE = pygame.mixer.Sound("asteroids/audio/missile.wav")
-SOUND_HIT = pygame.mixer.Sound("asteroids/audio/hit.wav")
-SOUND_EXPLOSION = pygame.mixer.Sound("asteroids/audio/explosion.wav")
-SOUND_GAME_OVER = pygame.mixer.Sound("asteroids/audio/gameover.wav")
-MUSIC_THEME = pygame.mixer.music.load("asteroids/audio/theme.ogg")
-MUSIC_TITLE = pygame.mixer.music.load("asteroids/audio/title.ogg")
+SOUND_BULLET = load_sound("asteroids/audio/bullet.wav", HEADLESS)
+SOUND_MISSILE = load_sound("asteroids/audio/missile.wav", HEADLESS)
+SOUND_HIT = load_sound("asteroids/audio/hit.wav", HEADLESS)
+SOUND_EXPLOSION = load_sound("asteroids/audio/explosion.wav", HEADLESS)
+SOUND_GAME_OVER = load_sound("asteroids/audio/gameover.wav", HEADLESS)
+MUSIC_THEME = music.load("asteroids/audio/theme.ogg")
+MUSIC_TITLE = music.load("asteroids/audio/title.ogg")
 
 #audio mixing
 SOUND_BULLET.set_volume(0.3)
@@ -98,13 +125,24 @@ SOUND_HIT.set_volume(0.4)
 
 #setup the screen
 SCREEN = pygame.display.set_mode((WIDTH, HEIGHT))
+#fonts and rendered text, shared by every state
+TEXT = TextCache()
+
 pygame.display.set_caption("ASTEROIDS")
 
+#pre-rendered circle sprites, every entity layer is drawn with one blits call
+SPRITES = {name: CircleLayer() for name in ("asteroids", "bullets", "buildings", "missiles", "ships")}
+
+def draw_layer(screen, name, entities, color, alpha):
+    SPRITES[name].draw(screen, [interpolated(entity, alpha) for entity in entities], [entity.radius for entity in entities], color)
+
 #class for bullets
 class Bullet:
     def __init__(self, x, y, angle, speed, radius, color):
         self.x = x
         self.y = y
+        self.last_x = x
+        self.last_y = y
         self.angle = angle
         self.speed = speed
         self.radius = radius
@@ -112,17 +150,18 @@ class Bullet:
         self.mass = math.pi*self.radius*self.radius
 
     def update(self):
+        self.last_x = self.x
+        self.last_y = self.y
         self.x += BULLET_SPEED * math.cos(self.angle)
         self.y += BULLET_SPEED * math.sin(self.angle)
 
-    def render(self):
-        pygame.draw.circle(SCREEN, self.color, (self.x, self.y), self.radius)
-
 #class for asteroids
 class Asteroid:
     def __init__(self, x, y, angle, speed, radius, color):
         self.x = x
         self.y = y
+        self.last_x = x
+        self.last_y = y
         self.angle = angle
         self.speed = speed
         self.radius = radius
@@ -130,17 +169,18 @@ class Asteroid:
         self.color = color
 
     def update(self):
+        self.last_x = self.x
+        self.last_y = self.y
         self.x += self.speed * math.cos(self.angle)
         self.y += self.speed * math.sin(self.angle)
 
-    def render(self):
-        pygame.draw.circle(SCREEN, self.color, (self.x, self.y), self.radius)
-
 #class for missiles
 class Missile:
     def __init__(self, x, y, angle, speed, radius, color, target_x, target_y, target_angle, target_speed):
         self.x = x
         self.y = y
+        self.last_x = x
+        self.last_y = y
         self.angle = angle
         self.speed = speed
         self.radius = radius
@@ -151,6 +191,8 @@ class Missile:
         self.target_speed = target_speed
 
     def update(self):
+        self.last_x = self.x
+        self.last_y = self.y
         dx = self.target_x - self.x
         dy = self.target_y - self.y
         self.angle = math.atan2(dy,dx)
@@ -159,29 +201,29 @@ class Missile:
         self.target_x += self.target_speed * math.cos(self.target_angle)
         self.target_y += self.target_speed * math.sin(self.target_angle)
 
-    def render(self):
-        pygame.draw.circle(SCREEN, self.color, (self.x, self.y), self.radius)
-
 #class for buildings
 class Building:
     def __init__(self, x, y, radius):
         self.x = x
         self.y = y
+        self.last_x = x
+        self.last_y = y
         self.radius = radius
 
-    def render(self):
-        pygame.draw.circle(SCREEN, BUILDING_COLOR, (self.x, self.y), self.radius)
-
 #class for ship
 class Ship:
     def __init__(self, x, y, speed, radius, color):
         self.x = x
         self.y = y
+        self.last_x = x
+        self.last_y = y
         self.speed = speed
         self.radius = radius
         self.color = color
 
     def update(self):
+        self.last_x = self.x
+        self.last_y = self.y
         if ((pygame.key.get_pressed()[pygame.K_d] or pygame.key.get_pressed()[pygame.K_RIGHT]) and self.x < WIDTH - self.radius):
             self.x += self.speed
         if ((pygame.key.get_pressed()[pygame.K_a] or pygame.key.get_pressed()[pygame.K_LEFT]) and self.x > self.radius):
@@ -191,9 +233,6 @@ class Ship:
         if ((pygame.key.get_pressed()[pygame.K_w] or pygame.key.get_pressed()[pygame.K_UP]) and self.y > self.radius):
             self.y -= self.speed
 
-    def render(self):
-        pygame.draw.circle(SCREEN, self.color, (self.x, self.y), self.radius)
-
 #state manager interface
 class State:
     def __init__(self):
@@ -205,7 +244,7 @@ class State:
     def update(self):
         pass
 
-    def render(self, screen):
+    def render(self, screen, alpha=1):
         self.screen = screen
 
 #title state
@@ -214,8 +253,8 @@ class TitleState(State):
 
     def __init__(self):
         super().__init__()
-        pygame.mixer.music.load("asteroids/audio/title.ogg")
-        pygame.mixer.music.play(-1)
+        music.load("asteroids/audio/title.ogg")
+        music.play(-1)
 
     def handle_events(self):
         if pygame.key.get_pressed()[pygame.K_SPACE]:
@@ -224,23 +263,20 @@ class TitleState(State):
     def update(self):
         pass
 
-    def render(self, screen):
+    def render(self, screen, alpha=1):
         #clear screen
         screen.fill(BACKGROUND_COLOR)
 
         #display title
-        font = pygame.font.Font(None, 72)
-        text = font.render("ASTEROIDS", True, FONT_COLOR)
+        text = TEXT.render("ASTEROIDS", 72, FONT_COLOR)
         screen.blit(text, ((WIDTH // 2) - (text.get_width() // 2), (HEIGHT // 2) - (text.get_height() // 2)))
 
         #display press spacebar
-        font = pygame.font.Font(None, 18)
-        text_prompt = font.render("press space", True, FONT_COLOR)
+        text_prompt = TEXT.render("press space", 18, FONT_COLOR)
         screen.blit(text_prompt, ((WIDTH // 2) - (text_prompt.get_width() // 2), (HEIGHT // 2) - (text_prompt.get_height() // 2) + (text.get_height() // 2) + 10))
 
         #display top score
-        font = pygame.font.Font(None, 36)
-        text_top_score = font.render(f'TOP SCORE: {TOP_SCORE}', True, FONT_COLOR_TOP_SCORE)
+        text_top_score = TEXT.render(f'TOP SCORE: {TOP_SCORE}', 36, FONT_COLOR_TOP_SCORE)
         screen.blit(text_top_score, ((WIDTH // 2) - (text_top_score.get_width() // 2), 10))
 
 #game state
@@ -251,15 +287,16 @@ class GameState(State):
         FONT_COLOR_TOP_SCORE = FONT_COLOR
         SCORE = INITIAL_SCORE
         LIVES = INITIAL_LIVES
-        pygame.mixer.music.load("asteroids/audio/theme.ogg")
-        pygame.mixer.music.play(-1)
-        pygame.time.delay(500)
-        self.asteroids = []
-        self.bullets = []
-        self.buildings = []
+        music.load("asteroids/audio/theme.ogg")
+        music.play(-1)
+        if not HEADLESS:
+            pygame.time.delay(500)
+        self.asteroids = Entities()
+        self.bullets = Entities()
+        self.buildings = Entities()
         #self.buildings = [Building(WIDTH//6, HEIGHT, BUILDING_RADIUS), Building(2*WIDTH//6, HEIGHT, BUILDING_RADIUS), Building(4*WIDTH//6, HEIGHT, BUILDING_RADIUS), Building(5*WIDTH//6, HEIGHT, BUILDING_RADIUS)]
-        self.missiles = []
-        self.ships = [Ship(WIDTH//2, HEIGHT - TURRET_HEIGHT, TURRET_SPEED, TURRET_RADIUS, TURRET_COLOR)]
+        self.missiles = Entities()
+        self.ships = Entities([Ship(WIDTH//2, HEIGHT - TURRET_HEIGHT, TURRET_SPEED, TURRET_RADIUS, TURRET_COLOR)])
 
     def create_asteroid(self):
             new_asteroid = Asteroid(random.uniform(0, WIDTH), 0, random.uniform(math.pi/4, 3*math.pi/4), ASTEROID_SPEED*random.uniform(0.5, 6), ASTEROID_RADIUS*random.uniform(0.5, 2), ASTEROID_COLOR)
@@ -346,27 +383,27 @@ class GameState(State):
             ship.update()
 
         #update asteroids
-        if pygame.time.get_ticks() - LAST_ASTEROID_TIME > ASTEROID_COOLDOWN:
+        if get_ticks() - LAST_ASTEROID_TIME > ASTEROID_COOLDOWN:
             self.create_asteroid()
-            LAST_ASTEROID_TIME = pygame.time.get_ticks()
+            LAST_ASTEROID_TIME = get_ticks()
         self.update_asteroids()
         for asteroid in self.asteroids:
             asteroid.update()
 
         #update bullets
-        if pygame.mouse.get_pressed()[0] and pygame.time.get_ticks() - LAST_BULLET_TIME > BULLET_COOLDOWN:
+        if pygame.mouse.get_pressed()[0] and get_ticks() - LAST_BULLET_TIME > BULLET_COOLDOWN:
             self.create_bullet()
-            LAST_BULLET_TIME = pygame.time.get_ticks()
+            LAST_BULLET_TIME = get_ticks()
             SOUND_BULLET.play()
         self.update_bullets()
         for bullet in self.bullets:
             bullet.update()
 
         #update missiles
-        if pygame.mouse.get_pressed()[2] and pygame.time.get_ticks() - LAST_MISSILE_TIME > MISSILE_COOLDOWN:
+        if pygame.mouse.get_pressed()[2] and get_ticks() - LAST_MISSILE_TIME > MISSILE_COOLDOWN:
             for asteroid in self.asteroids:
                 self.create_missile(asteroid.x, asteroid.y, asteroid.angle, asteroid.speed)
-                LAST_MISSILE_TIME = pygame.time.get_ticks()
+                LAST_MISSILE_TIME = get_ticks()
                 SOUND_MISSILE.play()
         self.update_missiles()
         for missile in self.missiles:
@@ -450,54 +487,44 @@ class GameState(State):
                         self.next_state = TitleState()
 
     #renders all necessary gameplay items on screen
-    def render(self, screen):
+    def render(self, screen, alpha=1):
         #clear screen
         screen.fill(BACKGROUND_COLOR)
 
-        for asteroid in self.asteroids:
-            asteroid.render()
+        draw_layer(screen, "asteroids", self.asteroids, ASTEROID_COLOR, alpha)
 
-        for bullet in self.bullets:
-            bullet.render()
+        draw_layer(screen, "bullets", self.bullets, BULLET_COLOR, alpha)
 
-        for building in self.buildings:
-            building.render()
+        draw_layer(screen, "buildings", self.buildings, BUILDING_COLOR, alpha)
 
-        for missile in self.missiles:
-            missile.render()
+        draw_layer(screen, "missiles", self.missiles, MISSILE_COLOR, alpha)
 
-        for ship in self.ships:
-            ship.render()
+        draw_layer(screen, "ships", self.ships, TURRET_COLOR, alpha)
 
         #display the turret
         #pygame.draw.circle(screen, TURRET_COLOR, (WIDTH // 2, HEIGHT - TURRET_HEIGHT), TURRET_RADIUS)
         #pygame.draw.line(screen, TURRET_COLOR, (WIDTH // 2, HEIGHT), (WIDTH // 2, HEIGHT - TURRET_HEIGHT), TURRET_RADIUS)
 
         #display score
-        font = pygame.font.Font(None, 36)
-        text_score = font.render(f'SCORE: {SCORE}', True, FONT_COLOR)
+        text_score = TEXT.render(f'SCORE: {SCORE}', 36, FONT_COLOR)
         screen.blit(text_score, (10,10))
 
         #display missile availability
-        if pygame.time.get_ticks() - LAST_MISSILE_TIME > MISSILE_COOLDOWN:
-            font = pygame.font.Font(None, 36)
-            text_missiles = font.render('MISSILES READY', True, FONT_COLOR)
+        if get_ticks() - LAST_MISSILE_TIME > MISSILE_COOLDOWN:
+            text_missiles = TEXT.render('MISSILES READY', 36, FONT_COLOR)
             screen.blit(text_missiles, (10,10 + text_score.get_height() + 10))
 
         #display lives
-        font = pygame.font.Font(None, 36)
-        text_lives = font.render(f'LIVES: {LIVES}', True, FONT_COLOR)
+        text_lives = TEXT.render(f'LIVES: {LIVES}', 36, FONT_COLOR)
         screen.blit(text_lives, (WIDTH - text_lives.get_width() - 10,10))
 
         #display top score
-        font = pygame.font.Font(None, 36)
-        text_top_score = font.render(f'TOP SCORE: {TOP_SCORE}', True, FONT_COLOR_TOP_SCORE)
+        text_top_score = TEXT.render(f'TOP SCORE: {TOP_SCORE}', 36, FONT_COLOR_TOP_SCORE)
         screen.blit(text_top_score, ((WIDTH // 2) - (text_top_score.get_width() // 2), 10))
 
         #display fps
-        font = pygame.font.Font(None, 36)
         fps = clock.get_fps()
-        text_fps = font.render(f'FPS: {fps:.0f}', True, FONT_COLOR)
+        text_fps = TEXT.render(f'FPS: {fps:.0f}', 36, FONT_COLOR)
         screen.blit(text_fps, ((WIDTH // 2) - (text_fps.get_width() // 2), 10 + text_top_score.get_height() + 10))
 
 #start game on title screen
@@ -507,29 +534,54 @@ CURRENT_STATE = TitleState()
 QUIT_GAME = False
 
 #main loop
-while not QUIT_GAME:
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            QUIT_GAME = True
-        if event.type == pygame.KEYDOWN:
-            if event.key == pygame.K_ESCAPE:
-                QUIT_GAME = True
-
-    #handle events and state transitions
-    CURRENT_STATE.handle_events()
-    if CURRENT_STATE.next_state:
-        CURRENT_STATE = CURRENT_STATE.next_state
-    
-    #update and render the current state
-    CURRENT_STATE.update()
-    CURRENT_STATE.render(SCREEN)
+def main():
+    global CURRENT_STATE, QUIT_GAME
+    accumulator = 0
+    while not QUIT_GAME:
 
-    #update display
-    pygame.display.update()
+        #limit to the fps constant, the time since the last frame is simulated below in fixed steps
+        accumulator += clock.tick(FPS) / 1000
 
-    #limit to the fps constant
-    clock.tick(FPS)
-
-#quit pygame
-pygame.quit()
-sys.exit()
\ No newline at end of file
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                QUIT_GAME = True
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE:
+                    QUIT_GAME = True
+
+        #handle events and state transitions
+        CURRENT_STATE.handle_events()
+        if CURRENT_STATE.next_state:
+            CURRENT_STATE = CURRENT_STATE.next_state
+
+        #update the current state in fixed steps, a slow frame runs at most MAX_STEPS and drops the rest of its backlog
+        steps = 0
+        while accumulator >= STEP and steps < MAX_STEPS and not CURRENT_STATE.next_state:
+            CURRENT_STATE.update()
+            CLOCK.advance(STEP)
+            accumulator -= STEP
+            steps += 1
+        if steps == MAX_STEPS:
+            accumulator = min(accumulator, STEP)
+
+        #render the current state between its last two steps
+        CURRENT_STATE.render(SCREEN, min(accumulator / STEP, 1))
+
+        #update display
+        pygame.display.update()
+
+    #quit pygame
+    pygame.quit()
+    sys.exit()
+
+#steps the game with a fixed DELTA as fast as the cpu allows and prints a summary
+def run_headless(args):
+    state, games = run_games(args, CLOCK, GameState, lambda state: state.update(), lambda state: state.render(SCREEN))
+    print(f"games: {games}  score: {SCORE}  top score: {TOP_SCORE}")
+    print(f"asteroids: {len(state.asteroids)}  bullets: {len(state.bullets)}")
+
+if __name__ == "__main__":
+    if HEADLESS:
+        run_headless(ARGS)
+    else:
+        main()
@@ -0,0 +1,97 @@
+#collects sound requests made during update and plays them once per frame
+#requests for the same sound are merged within its time window, each sound has a voice budget
+#and the mixer as a whole has max_voices, a request over budget steals the oldest voice of its own sound
+#or of a lower priority sound, and is dropped when there is none
+class SoundEvents:
+    def __init__(self, max_voices=8):
+        self.max_voices = max_voices
+        self.sounds = []
+        self.requested = 0
+        self.played = 0
+        self.merged = 0
+        self.dropped = 0
+        self.stolen = 0
+
+    #wraps a sound so its play() calls are queued, returns the queued sound
+    def sound(self, sound, voices=2, priority=0, window=50):
+        queued = QueuedSound(sound, voices, priority, window)
+        self.sounds.append(queued)
+        self.sounds.sort(key=lambda entry: entry.priority, reverse=True)
+        return queued
+
+    #live voices of every sound, finished channels are forgotten
+    def live_voices(self):
+        total = 0
+        for queued in self.sounds:
+            queued.voices_playing = [(start, channel) for start, channel in queued.voices_playing if channel.get_busy() and channel.get_sound() is queued.sound]
+            total += len(queued.voices_playing)
+        return total
+
+    #oldest voice of a sound with at most the given priority, or None
+    def victim(self, priority):
+        oldest = None
+        for queued in self.sounds:
+            if queued.priority <= priority and queued.voices_playing and (oldest is None or queued.voices_playing[0][0] < oldest.voices_playing[0][0]):
+                oldest = queued
+        return oldest
+
+    #issues the play() calls for this frame, highest priority first, now is the game clock in milliseconds
+    def flush(self, now):
+        voices = None
+        for queued in self.sounds:
+            if not queued.pending:
+                continue
+            count = queued.pending
+            queued.pending = 0
+            self.requested += count
+            if now - queued.last_played < queued.window:
+                self.merged += count
+                continue
+            self.merged += count - 1
+
+            if voices is None:
+                voices = self.live_voices()
+            if len(queued.voices_playing) >= queued.voices:
+                queued.steal()
+                self.stolen += 1
+                voices -= 1
+            elif voices >= self.max_voices:
+                victim = self.victim(queued.priority)
+                if victim is None:
+                    self.dropped += 1
+                    continue
+                victim.steal()
+                self.stolen += 1
+                voices -= 1
+
+            channel = queued.sound.play()
+            queued.last_played = now
+            self.played += 1
+            if channel is not None:
+                queued.voices_playing.append((now, channel))
+                voices += 1
+
+    def stats(self):
+        return {"requested": self.requested, "played": self.played, "merged": self.merged, "dropped": self.dropped, "stolen": self.stolen}
+
+#a sound whose play() only queues a request for the next SoundEvents.flush
+class QueuedSound:
+    def __init__(self, sound, voices, priority, window):
+        self.sound = sound
+        self.voices = voices
+        self.priority = priority
+        self.window = window
+        self.pending = 0
+        self.last_played = float("-inf")
+        self.voices_playing = []
+
+    def play(self, *args):
+        self.pending += 1
+
+    def set_volume(self, volume):
+        self.sound.set_volume(volume)
+
+    #stops the oldest voice of this sound to make room for a new one
+    def steal(self):
+        start, channel = self.voices_playing.pop(0)
+        channel.stop()
@@ -0,0 +1,131 @@
+import numpy as np
+
+#cell coordinates are packed into one integer key, offset so negative cells stay unique
+KEY_STRIDE = 1 << 21
+KEY_OFFSET = 1 << 20
+
+#neighbour cells visited for pairs within one set, half of the 3x3 block so each pair is seen once
+HALF_NEIGHBOURS = ((1, -1), (1, 0), (1, 1), (0, 1))
+ALL_NEIGHBOURS = ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 0), (0, 1), (1, -1), (1, 0), (1, 1))
+
+#packs cell coordinates into sortable keys
+def cell_keys(cells_x, cells_y):
+    return (cells_x + KEY_OFFSET) * KEY_STRIDE + (cells_y + KEY_OFFSET)
+
+#expands [start, stop) ranges of a sorted array into flat (owner, position) index pairs
+def expand_ranges(owners, starts, stops):
+    counts = stops - starts
+    total = int(counts.sum())
+    if total == 0:
+        empty = np.zeros(0, dtype=np.intp)
+        return empty, empty
+    owner = np.repeat(owners, counts)
+    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    return owner, np.repeat(starts, counts) + offsets
+
+#uniform grid rebuilt every frame by sorting particles on their cell key
+class SpatialHash:
+    def __init__(self, cell_size):
+        self.cell_size = max(float(cell_size), 1.0)
+        self.keys = np.zeros(0, dtype=np.int64)
+        self.order = np.zeros(0, dtype=np.intp)
+        self.cells = np.zeros((0, 2), dtype=np.int64)
+
+    #cell size that keeps every touching pair of circles in neighbouring cells
+    @classmethod
+    def for_radii(cls, *radii):
+        largest = [float(r.max()) for r in radii if len(r)]
+        if not largest:
+            return cls(1.0)
+        if len(radii) == 1:
+            return cls(2 * largest[0])
+        return cls(sum(largest))
+
+    def cells_of(self, position):
+        return np.floor(position / self.cell_size).astype(np.int64)
+
+    #inserts every position into the grid
+    def build(self, position):
+        self.cells = self.cells_of(position)
+        keys = cell_keys(self.cells[:, 0], self.cells[:, 1])
+        self.order = np.argsort(keys, kind="stable")
+        self.keys = keys[self.order]
+        return self
+
+    #inserts axis aligned boxes into every cell they cover, used for swept shapes
+    def build_boxes(self, lo, hi):
+        lo_cells = self.cells_of(lo)
+        spans = self.cells_of(hi) - lo_cells + 1
+        counts = spans[:, 0] * spans[:, 1]
+        owner, offsets = expand_ranges(np.arange(len(lo)), np.zeros(len(lo), dtype=np.intp), counts)
+        self.cells = lo_cells[owner] + np.stack((offsets // spans[owner, 1], offsets % spans[owner, 1]), axis=1)
+        keys = cell_keys(self.cells[:, 0], self.cells[:, 1])
+        order = np.argsort(keys, kind="stable")
+        self.keys = keys[order]
+        self.order = owner[order]
+        return self
+
+    #candidate pairs between points and the built boxes covering their cell
+    def query_points(self, position):
+        if len(position) == 0 or len(self.order) == 0:
+            empty = np.zeros(0, dtype=np.intp)
+            return empty, empty
+        return self.lookup(self.cells_of(position))
+
+    #finds the built entries sharing the given cells, returned as (query, entry) index arrays
+    def lookup(self, cells, owners=None):
+        if owners is None:
+            owners = np.arange(len(cells))
+        keys = cell_keys(cells[:, 0], cells[:, 1])
+        starts = np.searchsorted(self.keys, keys, side="left")
+        stops = np.searchsorted(self.keys, keys, side="right")
+        owner, slots = expand_ranges(owners, starts, stops)
+        return owner, self.order[slots]
+
+    #candidate pairs within the built set, every unordered pair reported exactly once
+    def pairs(self):
+        n = len(self.order)
+        if n < 2:
+            empty = np.zeros(0, dtype=np.intp)
+            return empty, empty
+        owners = np.arange(n)
+        i, j = self.lookup(self.cells, owners)
+        same = i < j
+        first = [i[same]]
+        second = [j[same]]
+        for dx, dy in HALF_NEIGHBOURS:
+            i, j = self.lookup(self.cells + (dx, dy), owners)
+            first.append(i)
+            second.append(j)
+        return np.concatenate(first), np.concatenate(second)
+
+    #candidate pairs between query positions and the built set
+    def query(self, position):
+        if len(position) == 0 or len(self.order) == 0:
+            empty = np.zeros(0, dtype=np.intp)
+            return empty, empty
+        cells = self.cells_of(position)
+        owners = np.arange(len(position))
+        first = []
+        second = []
+        for dx, dy in ALL_NEIGHBOURS:
+            i, j = self.lookup(cells + (dx, dy), owners)
+            first.append(i)
+            second.append(j)
+        return np.concatenate(first), np.concatenate(second)
+
+#candidate pairs among one group of store indices, as positions within the group
+def self_pairs(store, indices):
+    indices = np.asarray(indices, dtype=np.intp)
+    grid = SpatialHash.for_radii(store.radius[indices]).build(store.position[indices])
+    return grid.pairs()
+
+#candidate pairs between two groups of store indices, as positions within each group
+def cross_pairs(store, first, second):
+    first = np.asarray(first, dtype=np.intp)
+    second = np.asarray(second, dtype=np.intp)
+    if len(first) == 0 or len(second) == 0:
+        empty = np.zeros(0, dtype=np.intp)
+        return empty, empty
+    grid = SpatialHash.for_radii(store.radius[first], store.radius[second]).build(store.position[second])
+    return grid.query(store.position[first])
@@ -0,0 +1,173 @@
+import numpy as np
+from broadphase import SpatialHash, cross_pairs
+
+#overlap test for candidate pairs of store indices, returns the touching mask, contact normals and overlaps
+def find_contacts(store, i, j):
+    delta = store.position[j] - store.position[i]
+    distance = np.sqrt((delta * delta).sum(axis=1))
+    reach = store.radius[i] + store.radius[j]
+    touching = distance <= reach
+
+    #coincident centres get a fixed normal instead of dividing by zero
+    normal = np.zeros_like(delta)
+    normal[:, 0] = 1
+    apart = distance > 0
+    normal[apart] = delta[apart] / distance[apart, None]
+    return touching, normal, reach - distance
+
+#elastic impulse and positional separation along each contact normal
+#impulses use the velocities from before the batch and are summed per particle, so a particle in several contacts gets all of them
+#pairs already moving apart, like a bullet that bounced off last step and still overlaps, are skipped so they are not bounced back
+#returns the mask of the contacts that were applied
+def apply_contacts(store, i, j, normal, overlap):
+    relative_velocity = store.velocity[j] - store.velocity[i]
+    closing = (relative_velocity * normal).sum(axis=1)
+    approaching = closing <= 0
+    i, j, normal, overlap, closing = i[approaching], j[approaching], normal[approaching], overlap[approaching], closing[approaching]
+    m1 = store.mass[i]
+    m2 = store.mass[j]
+    impulse = ((2 * m1 * m2 / (m1 + m2)) * closing)[:, None] * normal
+    np.add.at(store.velocity, i, impulse / m1[:, None])
+    np.add.at(store.velocity, j, -impulse / m2[:, None])
+
+    #separate the circles to avoid sticking together
+    separation = 0.5 * overlap[:, None] * normal
+    np.add.at(store.position, i, -separation)
+    np.add.at(store.position, j, separation)
+    return approaching
+
+#resolves every touching candidate pair at once, returns the positions of the colliding pairs within i and j
+def resolve_collisions(store, i, j):
+    i = np.asarray(i, dtype=np.intp)
+    j = np.asarray(j, dtype=np.intp)
+    touching, normal, overlap = find_contacts(store, i, j)
+    hits = np.flatnonzero(touching)
+    if len(hits):
+        hits = hits[apply_contacts(store, i[hits], j[hits], normal[hits], overlap[hits])]
+    return hits
+
+#collisions between single particles and the members of rigid groups, every contact pushes the member's owner body
+#only the deepest contact of a particle with each body counts, so touching several members of one group bounces once
+#returns the positions within particles of the particles that were bounced
+def resolve_member_collisions(store, particles, members):
+    particles = np.asarray(particles, dtype=np.intp)
+    members = np.asarray(members, dtype=np.intp)
+    p, m = cross_pairs(store, particles, members)
+    touching, normal, overlap = find_contacts(store, particles[p], members[m])
+    p, m, normal, overlap = p[touching], m[touching], normal[touching], overlap[touching]
+    if len(p) == 0:
+        return p
+    bodies = store.owner[members[m]]
+    order = np.lexsort((-overlap, bodies, p))
+    first = order[np.r_[True, (p[order][1:] != p[order][:-1]) | (bodies[order][1:] != bodies[order][:-1])]]
+    applied = apply_contacts(store, particles[p[first]], bodies[first], normal[first], overlap[first])
+    return p[first][applied]
+
+#groups with more circle pairs than this find their candidate pairs through a spatial hash instead of comparing all of them
+DENSE_PAIRS = 4096
+
+#deepest touching pair between two groups of circles, returns (normal, overlap) or None when nothing touches
+def deepest_contact(position1, radius1, position2, radius2):
+    if len(position1) * len(position2) > DENSE_PAIRS:
+        a, b = SpatialHash.for_radii(radius1, radius2).build(position2).query(position1)
+        if len(a) == 0:
+            return None
+    else:
+        a, b = np.indices((len(position1), len(position2))).reshape(2, -1)
+    delta = position2[b] - position1[a]
+    distance = np.sqrt((delta * delta).sum(axis=1))
+    overlap = radius1[a] + radius2[b] - distance
+    deepest = np.argmax(overlap)
+    if overlap[deepest] < 0:
+        return None
+    if distance[deepest] > 0:
+        normal = delta[deepest] / distance[deepest]
+    else:
+        normal = np.array([1.0, 0.0])
+    return normal, overlap[deepest]
+
+#collisions between rigid groups of circles, each moved by one body particle
+#bounding circles are tested first so only overlapping groups compare their circles
+#returns the positions of the colliding group pairs
+def resolve_group_collisions(store, bodies, centres, reach, members, radii):
+    if len(bodies) < 2:
+        return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp)
+    grid = SpatialHash.for_radii(reach).build(centres)
+    g1, g2 = grid.pairs()
+    delta = centres[g2] - centres[g1]
+    overlapping = (delta * delta).sum(axis=1) <= (reach[g1] + reach[g2]) ** 2
+    first = []
+    second = []
+    normals = []
+    overlaps = []
+    for a, b in zip(g1[overlapping].tolist(), g2[overlapping].tolist()):
+        contact = deepest_contact(members[a], radii[a], members[b], radii[b])
+        if contact is not None:
+            first.append(a)
+            second.append(b)
+            normals.append(contact[0])
+            overlaps.append(contact[1])
+    first = np.array(first, dtype=np.intp)
+    second = np.array(second, dtype=np.intp)
+    if len(first):
+        applied = apply_contacts(store, bodies[first], bodies[second], np.array(normals), np.array(overlaps))
+        first, second = first[applied], second[applied]
+    return first, second
+
+#earliest time in [0, 1] at which two circles moving along straight segments touch, or inf if they never do
+#circles that start the segment overlapping only count as an impact at 0 while they approach each other
+def time_of_impact(start, motion, reach):
+    a = (motion * motion).sum(axis=1)
+    b = (start * motion).sum(axis=1)
+    c = (start * start).sum(axis=1) - reach * reach
+    discriminant = b * b - a * c
+    moving = (a > 0) & (discriminant >= 0)
+    time = np.full(len(start), np.inf)
+    time[moving] = (-b[moving] - np.sqrt(discriminant[moving])) / a[moving]
+    time[(time < 0) | (time > 1)] = np.inf
+    time[c <= 0] = np.where(b[c <= 0] < 0, 0, np.inf)
+    return time
+
+#swept bullet tests over the last step so fast bullets cannot pass through small targets between frames
+#every particle is swept from its snapshot at the start of the step, so bullets fired this step start at the muzzle
+#bullets that touched a target during the step are moved back to that contact, the discrete pass then resolves the hit
+#returns the positions within bullets of the bullets that were moved
+def sweep_bullets(store, bullets, targets):
+    bullets = np.asarray(bullets, dtype=np.intp)
+    targets = np.asarray(targets, dtype=np.intp)
+    if len(bullets) == 0 or len(targets) == 0:
+        return np.zeros(0, dtype=np.intp)
+
+    #index the swept segment of every bullet, grown by the largest reach it could have
+    #and by the farthest any target moved, targets are looked up where they ended the step
+    start = store.previous[bullets]
+    end = store.position[bullets]
+    travel = store.position[targets] - store.previous[targets]
+    reach = store.radius[bullets].max() + store.radius[targets].max() + np.sqrt((travel * travel).sum(axis=1).max())
+    grid = SpatialHash(max(2 * store.radius[targets].max(), 32))
+    grid.build_boxes(np.minimum(start, end) - reach, np.maximum(start, end) + reach)
+    t, b = grid.query_points(store.position[targets])
+    if len(t) == 0:
+        return np.zeros(0, dtype=np.intp)
+
+    #bullet motion relative to each candidate target over the step
+    target_end = store.position[targets[t]]
+    target_start = store.previous[targets[t]]
+    relative_start = start[b] - target_start
+    relative_motion = (end[b] - start[b]) - (target_end - target_start)
+    time = time_of_impact(relative_start, relative_motion, store.radius[bullets[b]] + store.radius[targets[t]])
+    hit = np.isfinite(time)
+    if not hit.any():
+        return np.zeros(0, dtype=np.intp)
+
+    #earliest contact per bullet
+    t, b, time = t[hit], b[hit], time[hit]
+    relative_start, relative_motion = relative_start[hit], relative_motion[hit]
+    order = np.lexsort((time, b))
+    first = order[np.r_[True, b[order][1:] != b[order][:-1]]]
+    t, b, time = t[first], b[first], time[first]
+
+    #place the bullet at its contact offset from where the target is now, nudged inside so the overlap test passes
+    contact = relative_start[first] + time[:, None] * relative_motion[first]
+    store.position[bullets[b]] = store.position[targets[t]] + 0.999 * contact
+    return b
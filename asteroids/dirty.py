@@ -0,0 +1,90 @@
+import numpy as np
+import pygame
+
+#merges screen boxes (x0, y0, x1, y1) into rects covering the tiles they touch, one rect per horizontal run of tiles
+def merge_boxes(boxes, tile, width, height):
+    columns = -(-width // tile)
+    rows = -(-height // tile)
+    boxes = np.asarray(boxes, dtype=np.int64).reshape(-1, 4)
+    x0 = np.clip(boxes[:, 0], 0, width - 1) // tile
+    y0 = np.clip(boxes[:, 1], 0, height - 1) // tile
+    x1 = np.clip(boxes[:, 2] - 1, 0, width - 1) // tile
+    y1 = np.clip(boxes[:, 3] - 1, 0, height - 1) // tile
+    visible = (boxes[:, 2] > 0) & (boxes[:, 3] > 0) & (boxes[:, 0] < width) & (boxes[:, 1] < height)
+    x0, y0, x1, y1 = x0[visible], y0[visible], x1[visible], y1[visible]
+
+    #mark every tile a box touches
+    spans_x = x1 - x0 + 1
+    counts = spans_x * (y1 - y0 + 1)
+    owner = np.repeat(np.arange(len(counts)), counts)
+    offsets = np.arange(int(counts.sum())) - np.repeat(np.cumsum(counts) - counts, counts)
+    grid = np.zeros((rows, columns + 2), dtype=np.int8)
+    grid[y0[owner] + offsets // spans_x[owner], x0[owner] + offsets % spans_x[owner] + 1] = 1
+
+    #turn runs of marked tiles into rects
+    edges = np.diff(grid, axis=1)
+    start_rows, start_columns = np.nonzero(edges == 1)
+    end_columns = np.nonzero(edges == -1)[1]
+    return [pygame.Rect(x * tile, y * tile, (end - x) * tile, tile) for x, y, end in zip(start_columns.tolist(), start_rows.tolist(), end_columns.tolist())]
+
+def rect_boxes(rects):
+    return np.array([[rect.left, rect.top, rect.right, rect.bottom] for rect in rects], dtype=np.int64).reshape(-1, 4)
+
+#tracks what was drawn last frame and this frame so only those regions are cleared and presented
+class DirtyRects:
+    def __init__(self, enabled, width, height, tile=32):
+        self.enabled = enabled
+        self.width = width
+        self.height = height
+        self.tile = tile
+        self.previous = None
+        self.boxes = []
+        self.rects = []
+        self.begun = False
+        self.full = True
+
+    #clears the regions drawn last frame, or the whole screen when there is no usable previous frame
+    def begin(self, screen, color):
+        self.begun = True
+        self.boxes = []
+        self.rects = []
+        if not self.enabled or self.previous is None:
+            screen.fill(color)
+            self.full = True
+        else:
+            for rect in self.previous:
+                screen.fill(color, rect)
+            self.full = False
+
+    #records boxes (x0, y0, x1, y1) drawn this frame
+    #drawing outside a begun frame, like the title and game over screens, is not tracked, those present the whole screen
+    def add_boxes(self, boxes):
+        if self.enabled and self.begun and len(boxes):
+            self.boxes.append(boxes)
+
+    #records a rect returned by a pygame draw or blit call
+    def add(self, rect):
+        if self.enabled and self.begun:
+            self.rects.append(rect)
+
+    #forces a full redraw next frame, used when the screen was drawn without tracking
+    def invalidate(self):
+        self.previous = None
+
+    #returns the rects to present this frame, None means present the whole screen
+    def flush(self):
+        if not self.enabled or not self.begun:
+            self.previous = None
+            return None
+        self.begun = False
+
+        boxes = np.concatenate(self.boxes + [rect_boxes(self.rects)])
+        current = merge_boxes(boxes, self.tile, self.width, self.height)
+        if self.full:
+            self.previous = current
+            return None
+
+        #present the union of what was cleared and what was drawn
+        rects = merge_boxes(np.concatenate((rect_boxes(self.previous), boxes)), self.tile, self.width, self.height)
+        self.previous = current
+        return rects
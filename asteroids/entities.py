@@ -0,0 +1,112 @@
+#dense container of game entities with constant time removal
+#removing an entity swaps the last one into its place, slots are reused from a free list and every slot has
+#a generation, so a handle kept to an entity that was removed no longer resolves
+#removals made while the container is being iterated are deferred until the outermost loop ends,
+#so loops that remove entities never skip or repeat one
+class Entities:
+    def __init__(self, entities=()):
+        self.items = []
+        self.alive = []
+        self.slot_of = []
+        self.index_of = []
+        self.generation = []
+        self.free = []
+        self.iterating = 0
+        self.removed = []
+        for entity in entities:
+            self.append(entity)
+
+    #adds an entity and returns its handle, which is also stored on the entity
+    def append(self, entity):
+        if self.free:
+            slot = self.free.pop()
+        else:
+            slot = len(self.index_of)
+            self.index_of.append(-1)
+            self.generation.append(0)
+        self.index_of[slot] = len(self.items)
+        self.items.append(entity)
+        self.alive.append(True)
+        self.slot_of.append(slot)
+        entity.handle = (slot, self.generation[slot])
+        return entity.handle
+
+    def extend(self, entities):
+        for entity in entities:
+            self.append(entity)
+
+    #removes an entity, returns False if it was not in the container
+    def remove(self, entity):
+        if entity not in self:
+            return False
+        slot = entity.handle[0]
+        index = self.index_of[slot]
+        self.index_of[slot] = -1
+        self.generation[slot] += 1
+        self.free.append(slot)
+        if self.iterating:
+            self.alive[index] = False
+            self.removed.append(index)
+        else:
+            self.swap_remove(index)
+        return True
+
+    #removes every entity whose active flag is cleared
+    def prune(self):
+        for entity in self:
+            if not entity.active:
+                self.remove(entity)
+
+    def clear(self):
+        for entity in self:
+            self.remove(entity)
+
+    #entity for a handle, or None if it was removed since
+    def get(self, handle):
+        slot, generation = handle
+        if slot < len(self.generation) and self.generation[slot] == generation and self.index_of[slot] >= 0:
+            return self.items[self.index_of[slot]]
+        return None
+
+    def swap_remove(self, index):
+        last = len(self.items) - 1
+        if index != last:
+            self.items[index] = self.items[last]
+            self.alive[index] = self.alive[last]
+            self.slot_of[index] = self.slot_of[last]
+            self.index_of[self.slot_of[index]] = index
+        self.items.pop()
+        self.alive.pop()
+        self.slot_of.pop()
+
+    #applies the removals deferred during iteration, from the back so moved entities are always live ones
+    def compact(self):
+        for index in sorted(self.removed, reverse=True):
+            self.swap_remove(index)
+        self.removed.clear()
+
+    def __iter__(self):
+        self.iterating += 1
+        try:
+            items = self.items
+            alive = self.alive
+            for index in range(len(items)):
+                if alive[index]:
+                    yield items[index]
+        finally:
+            self.iterating -= 1
+            if not self.iterating and self.removed:
+                self.compact()
+
+    def __contains__(self, entity):
+        handle = getattr(entity, "handle", None)
+        return handle is not None and self.get(handle) is entity
+
+    def __len__(self):
+        return len(self.items) - len(self.removed)
+
+    def __getitem__(self, index):
+        return self.items[index]
+
+    def __bool__(self):
+        return len(self) > 0
@@ -0,0 +1,128 @@
+import argparse
+import os
+import random
+import time
+
+import numpy as np
+import pygame
+
+#command line, headless and game clock support shared by the three engines
+#asteroids/main.py imports it from its own directory, asteroids.py and asteroidsdelta.py add this directory to their path
+
+#options every engine takes, delta is the engine's default step, engines add their own options to the parser
+def argument_parser(delta):
+    parser = argparse.ArgumentParser(description="ASTEROIDS")
+    parser.add_argument("--headless", action="store_true", help="simulate without a window or sound")
+    parser.add_argument("--seed", type=int, default=None, help="seed for the random number generators")
+    parser.add_argument("--delta", type=float, default=delta, help="fixed simulation step in seconds")
+    parser.add_argument("--tick-rate", type=float, default=None, help="simulation steps per second, overrides --delta")
+    parser.add_argument("--max-steps", type=int, default=5, help="most simulation steps run to catch up in one frame")
+    parser.add_argument("--frames", type=int, default=None, help="frames to simulate when headless")
+    parser.add_argument("--seconds", type=float, default=None, help="simulated seconds to run when headless")
+    parser.add_argument("--render", action="store_true", help="also render every frame when headless")
+    return parser
+
+#unknown options are ignored so tools running a game can pass their own
+def parse_options(parser, argv):
+    args, unknown = parser.parse_known_args(argv)
+    if args.tick_rate:
+        args.delta = 1 / args.tick_rate
+    return args
+
+#headless runs use the dummy SDL drivers, tools importing a game can select them through the environment
+#returns whether the game runs headless
+def select_drivers(headless):
+    if headless:
+        os.environ["SDL_VIDEODRIVER"] = "dummy"
+        os.environ["SDL_AUDIODRIVER"] = "dummy"
+    return os.environ.get("SDL_VIDEODRIVER") == "dummy"
+
+def seed_random(seed):
+    if seed is not None:
+        random.seed(seed)
+        np.random.seed(seed)
+
+#silent stand-ins for the mixer when headless
+class NullSound:
+    def play(self, *args):
+        pass
+
+    def set_volume(self, volume):
+        pass
+
+class NullMusic:
+    def load(self, filename):
+        pass
+
+    def play(self, loops=0):
+        pass
+
+    def stop(self):
+        pass
+
+#initializes pygame, and the mixer when there is a sound device, returns the music player
+def init_pygame(headless):
+    pygame.init()
+    if headless:
+        return NullMusic()
+    pygame.mixer.init()
+    return pygame.mixer.music
+
+#loads a sound effect, or a silent one when headless
+def load_sound(filename, headless):
+    if headless:
+        return NullSound()
+    return pygame.mixer.Sound(filename)
+
+#game clock in milliseconds, advanced by every simulation step instead of the wall clock
+#so cooldowns and spawns follow simulated time however fast frames are rendered
+class GameClock:
+    def __init__(self):
+        self.ticks = 0
+
+    def get_ticks(self):
+        return self.ticks
+
+    def advance(self, delta):
+        self.ticks += delta * 1000
+
+#steps games with a fixed delta as fast as the cpu allows, a game over starts a new game
+#step(state) runs one frame and render(state) draws it, both are timed, finish(state) ends the frame untimed
+#prints the timings and returns the last state and the number of games for the engine's own summary
+def run_games(args, clock, new_game, step, render, finish=None):
+    if args.frames is not None:
+        frames = args.frames
+    elif args.seconds is not None:
+        frames = int(round(args.seconds / args.delta))
+    else:
+        frames = 60 * 60
+
+    state = new_game()
+    games = 1
+    update_time = 0
+    render_time = 0
+    start = time.perf_counter()
+    for frame in range(frames):
+        pygame.event.pump()
+
+        frame_start = time.perf_counter()
+        step(state)
+        update_time += time.perf_counter() - frame_start
+
+        if args.render:
+            frame_start = time.perf_counter()
+            render(state)
+            render_time += time.perf_counter() - frame_start
+        if finish:
+            finish(state)
+
+        clock.advance(args.delta)
+
+        if state.next_state:
+            state = new_game()
+            games += 1
+    wall = time.perf_counter() - start
+
+    print(f"frames: {frames}  simulated: {frames * args.delta:.1f} s  wall: {wall:.2f} s  ({frames / max(wall, 1e-9):.0f} frames/s)")
+    print(f"update: {1000 * update_time / max(frames, 1):.3f} ms/frame  render: {1000 * render_time / max(frames, 1):.3f} ms/frame")
+    return state, games
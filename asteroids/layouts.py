@@ -0,0 +1,76 @@
+import math
+
+import numpy as np
+from broadphase import SpatialHash
+
+#member offsets for clumps, every layout draws all of its offsets in one vectorized call so clumps of thousands
+#of particles spawn without a per particle loop, rng is numpy's random module or a numpy Generator
+
+#area fraction of the disk that poisson layouts aim for, below the ~0.55 where random dart throwing jams
+POISSON_FILL = 0.4
+
+#spiral scale per member diameter that keeps neighbouring members of a sunflower disk from overlapping
+SUNFLOWER_SCALE = 0.65
+
+#scattered in the square of the member radius around the centre, the original clump shape
+def uniform_layout(rng, count, radius):
+    return rng.uniform(-radius, radius, size=(count, 2))
+
+#sunflower spiral of touching members, the densest layout, turned by a random angle
+def disk_layout(rng, count, radius):
+    index = np.arange(count) + 0.5
+    distance = 2 * radius * SUNFLOWER_SCALE * np.sqrt(index)
+    angle = index * math.pi * (3 - math.sqrt(5)) + rng.uniform(0, 2 * math.pi)
+    return np.stack((distance * np.cos(angle), distance * np.sin(angle)), axis=1)
+
+#members at least one diameter apart at random places in a disk, thrown as darts in batches
+#every round draws candidates for the members still missing, drops the ones too close to placed members
+#and the later of every close pair among themselves, the disk grows when a round places too few
+def poisson_layout(rng, count, radius, rounds=32):
+    spacing = 2 * radius
+    extent = radius * math.sqrt(count / POISSON_FILL)
+    points = np.zeros((0, 2))
+    for attempt in range(rounds):
+        missing = count - len(points)
+        if missing <= 0:
+            break
+        candidates = disk_points(rng, max(2 * missing, count // 4), extent)
+        if len(points):
+            candidates = candidates[~crowded(points, candidates, spacing)]
+        grid = SpatialHash(spacing).build(candidates)
+        i, j = grid.pairs()
+        delta = candidates[j] - candidates[i]
+        close = (delta * delta).sum(axis=1) < spacing * spacing
+        keep = np.ones(len(candidates), dtype=bool)
+        keep[np.maximum(i[close], j[close])] = False
+        added = candidates[keep][:missing]
+        points = np.concatenate((points, added))
+        if len(added) < missing // 4:
+            extent *= 1.1
+    #whatever the rounds could not place is scattered so the clump always has count members
+    missing = count - len(points)
+    if missing > 0:
+        points = np.concatenate((points, disk_points(rng, missing, extent)))
+    return points
+
+#uniform points in a disk around the origin
+def disk_points(rng, count, extent):
+    distance = extent * np.sqrt(rng.uniform(0, 1, size=count))
+    angle = rng.uniform(0, 2 * math.pi, size=count)
+    return np.stack((distance * np.cos(angle), distance * np.sin(angle)), axis=1)
+
+#mask of the candidates closer than spacing to any placed point
+def crowded(points, candidates, spacing):
+    grid = SpatialHash(spacing).build(points)
+    c, p = grid.query(candidates)
+    delta = points[p] - candidates[c]
+    close = (delta * delta).sum(axis=1) < spacing * spacing
+    mask = np.zeros(len(candidates), dtype=bool)
+    mask[c[close]] = True
+    return mask
+
+LAYOUTS = {
+    "uniform": uniform_layout,
+    "disk": disk_layout,
+    "poisson": poisson_layout,
+}
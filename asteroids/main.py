@@ -1,26 +1,80 @@
 import asyncio
+import time
 import pygame
 import sys
 import math
 import random
-import json
+import zlib
 import numpy as np
+from store import ParticleStore, ACTIVE, KINEMATIC, UNCULLED, ENTERING, SHIP, ASTEROID, BULLET, CLUMP, BOX, PORTAL
+from broadphase import self_pairs, cross_pairs
+from text import TextCache
+from sprites import CircleLayer
+from dirty import DirtyRects
+from profiler import Profiler
+from audio import SoundEvents
+from persist import DataFile
+from pool import Pool, GarbageMonitor
+from tethers import TetherSet
+from layouts import LAYOUTS
+from query import WorldQuery
+from replay import InputState, Recorder, Replay
+from spawn import SpawnDirector
+from collision import resolve_collisions, resolve_group_collisions, resolve_member_collisions, sweep_bullets
+from entities import Entities
+from harness import argument_parser, parse_options, select_drivers, seed_random, init_pygame, load_sound, GameClock, run_games
+
+#command line options, only read when run as a script so other tools can import the game
+def parse_args(argv):
+    parser = argument_parser(1/60)
+    parser.add_argument("--dirty-rects", action="store_true", help="clear and present only the regions that changed")
+    parser.add_argument("--profile", action="store_true", help="show the frame profiler overlay, toggled with F3, or print its table when headless")
+    parser.add_argument("--profile-output", default=None, help="record per-frame profiler rows and write them to this .csv or .json file on exit")
+    parser.add_argument("--clump-count", type=int, default=10, help="particles in every clump, thousands are fine with the disk layout")
+    parser.add_argument("--clump-layout", choices=sorted(LAYOUTS), default="uniform", help="how clump particles are placed around the clump centre")
+    parser.add_argument("--record", default=None, help="record the seed, input and steps of every frame to this file")
+    parser.add_argument("--replay", default=None, help="re-run a recorded session headless as fast as the cpu allows")
+    parser.add_argument("--verify", action="store_true", help="with --replay, compare the state checksum of every frame to the recording")
+    return parse_options(parser, argv)
+
+ARGS = parse_args(sys.argv[1:] if __name__ == "__main__" else [])
+
+#a replay runs headless with the settings it was recorded with, a recording always has a seed
+REPLAY = None
+if ARGS.replay:
+    REPLAY = Replay(ARGS.replay)
+    ARGS.headless = True
+    ARGS.seed = REPLAY.header["seed"]
+    ARGS.delta = REPLAY.header["delta"]
+    ARGS.clump_count = REPLAY.header["clump_count"]
+    ARGS.clump_layout = REPLAY.header["clump_layout"]
+elif ARGS.record and ARGS.seed is None:
+    ARGS.seed = random.SystemRandom().randrange(2**32)
+
+HEADLESS = select_drivers(ARGS.headless)
+seed_random(ARGS.seed)
 
 #initialize pygame
-pygame.init()
-pygame.mixer.init()
+music = init_pygame(HEADLESS)
 clock = pygame.time.Clock()
-music = pygame.mixer.music
+CLOCK = GameClock()
+get_ticks = CLOCK.get_ticks
 
 #screen constants
 WIDTH = pygame.display.Info().current_w
 HEIGHT = pygame.display.Info().current_h - 60
+if REPLAY:
+    WIDTH, HEIGHT = REPLAY.header["width"], REPLAY.header["height"]
 #WIDTH,HEIGHT = 800,600
 BACKGROUND_COLOR = (0,0,0)
 
 #fps limiter
 FPS = 60
 
+#fixed simulation step, frames run as many steps as the elapsed time allows up to MAX_STEPS
+STEP = ARGS.delta
+MAX_STEPS = ARGS.max_steps
+
 #font colors
 FONT_COLOR = (255,0,0)
 FONT_COLOR_TOP_SCORE = FONT_COLOR
@@ -29,7 +83,7 @@ FONT_COLOR_NEW_TOP_SCORE = (0,255,0)
 #world constants
 GRAVITY = 9.8 #N/Kg
 FRICTION_COEFFICIENT = 0.6
-LAST_COLOR_CHANGE_TIME = pygame.time.get_ticks()
+LAST_COLOR_CHANGE_TIME = get_ticks()
 COLOR_CHANGE_COOLDOWN = 200
 DIFFICULTY = 1
 DIFFICULTY_RATE = 0.01
@@ -46,38 +100,60 @@ BULLET_SPEED = 1000
 BULLET_RADIUS = 2
 BULLET_COLOR = (0,0,255)
 BULLET_COOLDOWN = 40
-LAST_BULLET_TIME = pygame.time.get_ticks()
+LAST_BULLET_TIME = get_ticks()
 BULLET_DENSITY = 100
 
-#asteroid constants
-ASTEROID_SPEED = 100 * (DIFFICULTY - 0.2) #pixels per second
+#asteroid constants, speeds and cooldowns here are scaled by the live DIFFICULTY below
+ASTEROID_SPEED = 100 #pixels per second
 ASTEROID_RADIUS = 10
 ASTEROID_COLOR = (255,0,0)
-ASTEROID_COOLDOWN = 800 * (1 / (DIFFICULTY - 0.0))
-LAST_ASTEROID_TIME = pygame.time.get_ticks()
+ASTEROID_COOLDOWN = 800
 ASTEROID_DENSITY = 1
 COLOR_DIRECTION = 1
+#every ASTEROID_WAVE_INTERVAL points a wave of ASTEROID_WAVE_SIZE asteroids, times the difficulty, spawns at once
+ASTEROID_WAVE_INTERVAL = 30
+ASTEROID_WAVE_SIZE = 10
 
 #clump constants
-LAST_CLUMP_TIME = pygame.time.get_ticks()
-CLUMP_COOLDOWN = 5000 * (DIFFICULTY - 0.1)
-CLUMP_SPEED = 100 * (DIFFICULTY - 0.2)
+CLUMP_COOLDOWN = 5000
+CLUMP_SPEED = 100
 CLUMP_RADIUS = 10
 CLUMP_DENSITY = 1
 CLUMP_COLOR = (212,175,55)
-CLUMP_COUNT = 10
+CLUMP_COUNT = ARGS.clump_count
+CLUMP_LAYOUT = ARGS.clump_layout
+CLUMP_SPIN = True #off-centre tether pulls turn clumps
 
 #tether constants
 TETHER_COLOR = (240,240,240)
 TETHER_COST = 100
+TETHER_POINTS = 16 #most particles of one clump a tether pulls on, so a large clump does not pull the ship apart
 
 #portal constants
-PORTAL_SPEED = 50 * (DIFFICULTY - 0.0)
+PORTAL_SPEED = 50
 PORTAL_RADIUS = 40
 PORTAL_DENSITY = 1
 PORTAL_COLOR = (0,255,255)
-LAST_PORTAL_TIME = pygame.time.get_ticks()
-PORTAL_COOLDOWN = 10000 * (DIFFICULTY - 0.0)
+PORTAL_COOLDOWN = 10000
+
+#spawn speeds and cooldowns at the live DIFFICULTY, read every step by the spawn director
+def asteroid_speed():
+    return ASTEROID_SPEED * (DIFFICULTY - 0.2)
+
+def asteroid_cooldown():
+    return ASTEROID_COOLDOWN / DIFFICULTY
+
+def clump_speed():
+    return CLUMP_SPEED * (DIFFICULTY - 0.2)
+
+def clump_cooldown():
+    return CLUMP_COOLDOWN * (DIFFICULTY - 0.1)
+
+def portal_speed():
+    return PORTAL_SPEED * DIFFICULTY
+
+def portal_cooldown():
+    return PORTAL_COOLDOWN * DIFFICULTY
 
 #game data
 INITIAL_LIVES = 5
@@ -86,62 +162,135 @@ SCORE = INITIAL_SCORE
 LIVES = INITIAL_LIVES
 
 #update score
-LAST_SCORE_TIME = pygame.time.get_ticks()
+LAST_SCORE_TIME = get_ticks()
 
 #data file
 DATA_FILE = "data.json"
 
+#saves are written atomically, debounced and off the main loop, the browser build has no threads so it writes in place
+DATA = DataFile(DATA_FILE, background=sys.platform != "emscripten")
+
 #load data from file
 def load_data():
-    try:
-        with open(DATA_FILE, "r") as file:
-            data = json.load(file)
-            top_score = data.get("TOP_SCORE", 0)
-            gold = data.get("GOLD", 100)
-            tethers = data.get("TETHERS", 1)
-            return top_score, gold, tethers
-    except (FileNotFoundError, json.decoder.JSONDecodeError):
-        return 0, 100, 1
+    data = DATA.load({"TOP_SCORE": 0, "GOLD": 100, "TETHERS": 1})
+    return data["TOP_SCORE"], data["GOLD"], data["TETHERS"]
     
 #persistant data
 TOP_SCORE, GOLD, TETHERS = load_data()
+if REPLAY:
+    TOP_SCORE, GOLD, TETHERS = REPLAY.header["TOP_SCORE"], REPLAY.header["GOLD"], REPLAY.header["TETHERS"]
 
 #save data to file
 def save_data():
-    data = {"TOP_SCORE": TOP_SCORE, "GOLD": GOLD, "TETHERS": TETHERS}
-    with open(DATA_FILE, "w") as file:
-        json.dump(data, file)
-
-#audio constants
-SOUND_BULLET = pygame.mixer.Sound("audio/bullet.wav")
-SOUND_MISSILE = pygame.mixer.Sound("audio/missile.wav")
-SOUND_HIT = pygame.mixer.Sound("audio/hit.wav")
-SOUND_EXPLOSION = pygame.mixer.Sound("audio/explosion.wav")
-SOUND_GAME_OVER = pygame.mixer.Sound("audio/gameover.wav")
-MUSIC_THEME = pygame.mixer.music.load("audio/theme.ogg")
-MUSIC_TITLE = pygame.mixer.music.load("audio/title.ogg")
+    #headless runs never touch the player's saved data
+    if HEADLESS:
+        return
+    DATA.save({"TOP_SCORE": TOP_SCORE, "GOLD": GOLD, "TETHERS": TETHERS})
+
+#sound requests are queued during update and played once per frame within per sound voice budgets
+AUDIO = SoundEvents(8 if HEADLESS else pygame.mixer.get_num_channels())
+
+#audio constants, voices is the most copies of a sound playing at once and window merges repeats in milliseconds
+SOUND_BULLET = AUDIO.sound(load_sound("audio/bullet.wav", HEADLESS), voices=2, priority=0, window=40)
+SOUND_MISSILE = load_sound("audio/missile.wav", HEADLESS)
+SOUND_HIT = AUDIO.sound(load_sound("audio/hit.wav", HEADLESS), voices=3, priority=1, window=60)
+SOUND_EXPLOSION = AUDIO.sound(load_sound("audio/explosion.wav", HEADLESS), voices=2, priority=2, window=100)
+SOUND_GAME_OVER = AUDIO.sound(load_sound("audio/gameover.wav", HEADLESS), voices=1, priority=3, window=0)
+MUSIC_THEME = music.load("audio/theme.ogg")
+MUSIC_TITLE = music.load("audio/title.ogg")
 
 #audio mixing
 SOUND_BULLET.set_volume(0.3)
 SOUND_HIT.set_volume(0.1)
 SOUND_EXPLOSION.set_volume(0.5)
 
+#fonts and rendered text, shared by every state
+TEXT = TextCache()
+
+#dirty rect mode, on by default in the browser build where presenting a frame is expensive
+DIRTY_RECTS = ARGS.dirty_rects or sys.platform == "emscripten"
+DIRTY = DirtyRects(DIRTY_RECTS, WIDTH, HEIGHT)
+
+#particles preallocated per pooled kind, pools grow on demand past these
+POOL_SIZES = {BULLET: 64, ASTEROID: 64, PORTAL: 8}
+
+#garbage collections and their pause time, reported by the profiler and headless runs
+GARBAGE = GarbageMonitor()
+
+#per-phase frame profiler, its overlay is toggled with PROFILER_KEY
+PROFILER = Profiler(record=ARGS.profile_output is not None)
+PROFILER.visible = ARGS.profile
+PROFILER_KEY = pygame.K_F3
+
+#pre-rendered circle sprites for each entity layer
+SPRITES = {name: CircleLayer() for name in ("portals", "asteroids", "bullets", "clumps", "ships")}
+
+#keyboard and mouse state of the current frame, polled from pygame or set from a replay
+INPUT = InputState((
+    pygame.K_UP, pygame.K_w, pygame.K_DOWN, pygame.K_s, pygame.K_LEFT, pygame.K_a, pygame.K_RIGHT, pygame.K_d,
+    pygame.K_SPACE, pygame.K_RETURN, pygame.K_ESCAPE, pygame.K_m, pygame.K_1,
+))
+
+#records every frame when requested, with the start up settings a replay needs
+RECORDER = None
+if ARGS.record:
+    RECORDER = Recorder(ARGS.record, {
+        "seed": ARGS.seed, "delta": ARGS.delta, "width": WIDTH, "height": HEIGHT,
+        "clump_count": ARGS.clump_count, "clump_layout": ARGS.clump_layout,
+        "TOP_SCORE": TOP_SCORE, "GOLD": GOLD, "TETHERS": TETHERS,
+    })
+
 #setup the screen
 SCREEN = pygame.display.set_mode((WIDTH, HEIGHT))
 pygame.display.set_caption("ASTEROIDS")
 
-#class for particles
+#class for particles, a view onto one slot of the particle store
 class Particle:
-    def __init__(self, position, velocity, acceleration, radius, density, color):
-        self.position = position
-        self.velocity = velocity
-        self.acceleration = acceleration
-        self.force = [0, 0]
+    def __init__(self, store, position, velocity, radius, density, color, kind):
+        self.store = store
         self.radius = radius
         self.density = density
         self.color = color
-        self.mass = math.pi*self.radius*self.radius*density
-        self.active = True
+        self.index = store.add(position, velocity, radius, math.pi*self.radius*self.radius*density, kind)
+
+    @property
+    def position(self):
+        return self.store.position[self.index]
+
+    @position.setter
+    def position(self, value):
+        self.store.position[self.index] = value
+
+    @property
+    def velocity(self):
+        return self.store.velocity[self.index]
+
+    @velocity.setter
+    def velocity(self, value):
+        self.store.velocity[self.index] = value
+
+    @property
+    def force(self):
+        return self.store.force[self.index]
+
+    @property
+    def mass(self):
+        return self.store.mass[self.index]
+
+    @mass.setter
+    def mass(self, value):
+        self.store.mass[self.index] = value
+
+    @property
+    def active(self):
+        return bool(self.store.flags[self.index] & ACTIVE)
+
+    @active.setter
+    def active(self, value):
+        if value:
+            self.store.flags[self.index] |= ACTIVE
+        else:
+            self.store.flags[self.index] &= ~np.uint8(ACTIVE)
 
     def apply_friction(self, coefficient):
         velocity_magnitude = np.linalg.norm(self.velocity)
@@ -159,113 +308,147 @@ class Particle:
         self.apply_force(friction_force_x, friction_force_y)
 
     def apply_force(self, force_0, force_1):
-        self.force[0] += force_0
-        self.force[1] += force_1
+        self.store.force[self.index, 0] += force_0
+        self.store.force[self.index, 1] += force_1
 
-    def is_invisible(self):
-        if (self.position[0] < 0 or self.position[0] > WIDTH or self.position[1] < 0 or self.position[1] > HEIGHT):
-            return True
-        else:
-            return False
+    #position between the last two simulation steps
+    def interpolated(self, alpha):
+        return self.store.interpolate(self.index, alpha)
 
-    def update(self, DELTA):
-        if self.is_invisible():
-            self.active = False
+    #returns the slot to the store, the particle must not be used afterwards
+    def release(self):
+        self.store.release(self.index)
 
-        else:
-            #update acceleration
-            self.acceleration = (self.force[0] / self.mass, self.force[1] / self.mass)
-            
-            #update velocity
-            self.velocity = (self.velocity[0] + self.acceleration[0]*DELTA, self.velocity[1] + self.acceleration[1]*DELTA)
+    #reuses a pooled particle, keeping its store slot and kind
+    def reset(self, position, velocity, radius, density, color):
+        self.radius = radius
+        self.density = density
+        self.color = color
+        self.store.reset(self.index, position, velocity, radius, math.pi*radius*radius*density)
 
-            #update position
-            self.position = (self.position[0] + self.velocity[0]*DELTA, self.position[1] + self.velocity[1]*DELTA)
+    #parks a pooled particle, its slot stays claimed until it is reused
+    def retire(self):
+        self.store.deactivate(self.index)
 
-            #remove applied force
-            self.force = [0, 0]
-        
-    def render(self, color):
-        pygame.draw.circle(SCREEN, color, (self.position[0], self.position[1]), self.radius)
-
-
-#class for tethers
-class Tether:
-    def __init__(self, start_particle, end_clump, end_particle):
-        self.start_particle = start_particle
-        self.end_clump = end_clump
-        self.end_particle = end_particle
-        self.distance = np.linalg.norm(np.array(end_particle.position) - np.array(start_particle.position))
-        self.color = TETHER_COLOR
-        self.active = True
 
-    def update(self, DELTA):
-        if self.end_particle not in self.end_clump.clump:
-            self.active = False
-        else:
-            # Calculate the displacement vector between the particles
-            displacement = np.array(self.end_particle.position) - np.array(self.start_particle.position)
-            current_length = np.linalg.norm(displacement)
-            if current_length != 0:
-                #force_magnitude = current_length - self.distance
-                force_magnitude = current_length - 2*(self.end_particle.radius + self.start_particle.radius)
-                force_direction = displacement / current_length
-                force = force_direction * force_magnitude * 10000
-
-                # Check if the tether has become tight
-                    #if current_length > self.distance:  # Change to self.distance
-                self.start_particle.apply_force(force[0], force[1])
-                self.end_clump.box.apply_force(-force[0], -force[1])
-
-    def render(self, color):
-        pygame.draw.aaline(SCREEN, color, self.start_particle.position, self.end_particle.position)
-
-#class for clumps
+#class for clumps, a rigid body moved by its box particle
+#member offsets are kept in the body frame around the centre of mass, members are placed from the box every step
+#instead of being integrated, mass and moment of inertia are reduced incrementally as members are destroyed
+#the particles are store slots only, claimed and released in bulk, so clumps of thousands of particles are cheap
 class Clump:
-    def __init__(self, position, velocity, acceleration, radius, density, color, count):
+    def __init__(self, store, position, velocity, radius, density, color, count, layout=None):
+        self.store = store
         self.position = position
         self.velocity = velocity
-        self.acceleration = acceleration
         self.radius = radius
         self.density = density
         self.color = color
-        self.init_clump = []
         self.count = count
-        self.clump = self.recursive_clump(self.init_clump, self.count)
-        self.mass = len(self.clump) * self.density * math.pi * self.radius * self.radius
-        self.box = Particle(position, velocity, acceleration, radius, density, color)
+        self.box = Particle(store, position, velocity, radius, density, color, BOX)
         self.active = True
 
-    def recursive_clump(self, clump, count):
-            position = np.array([self.position[0] + random.uniform(-self.radius, self.radius), self.position[1] + random.uniform(-self.radius, self.radius)])
-            if(len(clump) < count):
-                clump.append(Particle(position, self.velocity, self.acceleration, self.radius, self.density, self.color))
-                return self.recursive_clump(clump, count)
-            else:
-                return clump
-
+        #every member is a disc of the same mass
+        self.member_mass = self.density * math.pi * self.radius * self.radius
+        offsets = LAYOUTS[layout or CLUMP_LAYOUT](np.random, count, radius)
+        self.indices = store.add_many(self.box.position + offsets, velocity, radius, self.member_mass, CLUMP)
+        store.flags[self.indices] |= KINEMATIC | ENTERING
+        store.owner[self.indices] = self.box.index
+
+        #centre the box on the members, their offsets are then the body frame positions
+        #the centre can start off screen, so the box lives as long as its particles instead of being culled
+        store.flags[self.box.index] |= UNCULLED
+        centre = offsets.mean(axis=0)
+        self.box.position = self.box.position + centre
+        self.offsets = offsets - centre
+        self.reach = self.bounding_radius()
+
+        self.mass = len(self.indices) * self.member_mass
+        self.inertia = self.member_mass * ((self.offsets * self.offsets).sum() + len(self.indices) * self.radius * self.radius / 2)
+        self.sync()
+
+    def bounding_radius(self):
+        if len(self.offsets) == 0:
+            return 0.0
+        return float(np.sqrt((self.offsets * self.offsets).sum(axis=1)).max() + self.radius)
+
+    #member offsets turned by the body angle
+    def rotated_offsets(self):
+        angle = self.store.angle[self.box.index]
+        cos, sin = math.cos(angle), math.sin(angle)
+        x, y = self.offsets[:, 0], self.offsets[:, 1]
+        return np.stack((cos * x - sin * y, sin * x + cos * y), axis=1)
+
+    #world positions of the particles, taken from the box so they are exact between follow steps
+    def world_positions(self):
+        return self.box.position + self.rotated_offsets()
+
+    #body mass and inertia in the store, members carry the whole mass so hits push like the body would
+    def sync(self):
+        mass = self.mass + 0.000001 #minimum mass to prevent error in particle update
+        self.box.mass = mass
+        self.store.inertia[self.box.index] = self.inertia + 0.000001
+        self.store.mass[self.indices] = mass
+
+    #drops destroyed particles, updating mass, inertia and centre of mass from the destroyed ones only
     def update(self, DELTA):
-        self.velocity = self.box.velocity
-        self.acceleration = self.box.acceleration
-        self.mass = len(self.clump) * self.density * math.pi * self.radius * self.radius  + 0.000001 #minimum mass to prevent error in particle update
-        self.box.mass = self.mass
-        self.box.update(DELTA)
-        for particle in self.clump:
-            if not particle.active:
-                self.clump.remove(particle)
-            else:
-                particle.velocity = self.velocity
-                particle.acceleration = self.acceleration
-                particle.mass = self.mass
-                particle.update(DELTA)
+        alive = (self.store.flags[self.indices] & ACTIVE) != 0
+        if not alive.all():
+            self.store.release_many(self.indices[~alive])
+            removed = self.offsets[~alive]
+            self.indices = self.indices[alive]
+            self.offsets = self.offsets[alive]
+            self.mass -= len(removed) * self.member_mass
+            self.inertia -= self.member_mass * ((removed * removed).sum() + len(removed) * self.radius * self.radius / 2)
+
+            #move the body to the new centre of mass
+            if len(self.indices):
+                shift = -self.member_mass * removed.sum(axis=0) / self.mass
+                self.inertia = max(self.inertia - self.mass * float(shift @ shift), 0)
+                self.offsets -= shift
+                angle = self.store.angle[self.box.index]
+                cos, sin = math.cos(angle), math.sin(angle)
+                world_shift = np.array([cos * shift[0] - sin * shift[1], sin * shift[0] + cos * shift[1]])
+                spin = self.store.spin[self.box.index]
+                self.box.position = self.box.position + world_shift
+                self.box.velocity = self.box.velocity + spin * np.array([-world_shift[1], world_shift[0]])
+            self.reach = self.bounding_radius()
+            self.sync()
 
-
-        if len(self.clump) == 0:
+        self.velocity = self.box.velocity
+        #the box is unculled, so it dies with its last member instead of colliding until the clump is pruned
+        if len(self.indices) == 0:
             self.active = False
-        
-    def render(self, color):
-        for particle in self.clump:
-            particle.render(color)
+            self.box.active = False
+
+    #puts the clump at a new centre as if it had spawned there, so rendering does not interpolate from the old one
+    def place(self, centre):
+        self.box.position = centre
+        self.follow()
+        moved = np.append(self.indices, self.box.index)
+        self.store.previous[moved] = self.store.position[moved]
+
+    #places the particles rigidly around the box after it was integrated or pushed by a collision
+    def follow(self):
+        if len(self.indices):
+            arms = self.rotated_offsets()
+            spin = self.store.spin[self.box.index]
+            self.store.position[self.indices] = self.box.position + arms
+            self.store.velocity[self.indices] = self.box.velocity + spin * np.stack((-arms[:, 1], arms[:, 0]), axis=1)
+
+    #store indices of at most count particles spread around the clump, the outermost one in each of count sectors
+    def anchors(self, count):
+        if len(self.indices) <= count:
+            return self.indices
+        x, y = self.offsets[:, 0], self.offsets[:, 1]
+        sector = np.minimum(((np.arctan2(y, x) + math.pi) / (2 * math.pi) * count).astype(np.intp), count - 1)
+        order = np.lexsort((-(x * x + y * y), sector))
+        first = order[np.r_[True, sector[order][1:] != sector[order][:-1]]]
+        return self.indices[first]
+
+    #returns the box slot to the store once the clump is gone
+    def release(self):
+        self.store.release_many(self.indices)
+        self.box.release()
 
 #state manager interface
 class State:
@@ -278,9 +461,13 @@ class State:
     def update(self, DELTA):
         pass
 
-    def render(self, screen):
+    def render(self, screen, alpha=1):
         self.screen = screen
 
+    #entity counts recorded with each profiler frame
+    def counts(self):
+        return {}
+
 #initial state to start music
 class FirstState(State):
 
@@ -297,7 +484,7 @@ class FirstState(State):
     def update(self, DELTA):
         pass
 
-    def render(self, screen):
+    def render(self, screen, alpha=1):
         #clear screen
         screen.fill(BACKGROUND_COLOR)
 
@@ -309,32 +496,29 @@ class TitleState(State):
         super().__init__()
 
     def handle_events(self):
-        if pygame.key.get_pressed()[pygame.K_SPACE]:
+        if INPUT.key(pygame.K_SPACE):
             music.stop()
             self.next_state = GameState()
-        if pygame.key.get_pressed()[pygame.K_m]:
+        if INPUT.key(pygame.K_m):
             self.next_state = MenuState()
 
     def update(self, DELTA):
         pass
 
-    def render(self, screen):
+    def render(self, screen, alpha=1):
         #clear screen
         screen.fill(BACKGROUND_COLOR)
 
         #display title
-        font = pygame.font.Font(None, 72)
-        text = font.render("ASTEROIDS", True, FONT_COLOR)
+        text = TEXT.render("ASTEROIDS", 72, FONT_COLOR)
         screen.blit(text, ((WIDTH // 2) - (text.get_width() // 2), (HEIGHT // 2) - (text.get_height() // 2)))
 
         #display press spacebar
-        font = pygame.font.Font(None, 18)
-        text_prompt = font.render("Press  [ space ]  to  play.  Press  [ m ]  for  MENU:  Instructions,  Controls,  Store", True, FONT_COLOR)
+        text_prompt = TEXT.render("Press  [ space ]  to  play.  Press  [ m ]  for  MENU:  Instructions,  Controls,  Store", 18, FONT_COLOR)
         screen.blit(text_prompt, ((WIDTH // 2) - (text_prompt.get_width() // 2), (HEIGHT // 2) - (text_prompt.get_height() // 2) + (text.get_height() // 2) + 10))
 
         #display top score
-        font = pygame.font.Font(None, 36)
-        text_top_score = font.render(f'TOP  SCORE :  {TOP_SCORE}', True, FONT_COLOR_TOP_SCORE)
+        text_top_score = TEXT.render(f'TOP  SCORE :  {TOP_SCORE}', 36, FONT_COLOR_TOP_SCORE)
         screen.blit(text_top_score, ((WIDTH // 2) - (text_top_score.get_width() // 2), 10))
 
 #menu state
@@ -346,12 +530,12 @@ class MenuState(State):
         self.key_1_pressed = False
 
     def handle_events(self):
-        if pygame.key.get_pressed()[pygame.K_ESCAPE]:
+        if INPUT.key(pygame.K_ESCAPE):
             self.next_state = TitleState()
 
     def update(self, DELTA):
         global GOLD, TETHERS
-        pressed_1 = pygame.key.get_pressed()[pygame.K_1]
+        pressed_1 = INPUT.key(pygame.K_1)
         if pressed_1 and not self.key_1_pressed:
             if GOLD >= TETHER_COST:
                 GOLD -= TETHER_COST
@@ -360,53 +544,44 @@ class MenuState(State):
         elif not pressed_1:
             self.key_1_pressed = False
 
-    def render(self, screen):
+    def render(self, screen, alpha=1):
         #clear screen
         screen.fill(BACKGROUND_COLOR)
 
         #display title
-        font = pygame.font.Font(None, 72)
-        text = font.render("MENU", True, FONT_COLOR)
+        text = TEXT.render("MENU", 72, FONT_COLOR)
         screen.blit(text, ((WIDTH // 2) - (text.get_width() // 2), (HEIGHT // 2) - (text.get_height() // 2)))
 
         #display press spacebar
-        font = pygame.font.Font(None, 18)
-        text_prompt = font.render("INSTRUCTIONS :  avoid  the  red  asteroids.  use  tethers  to  drag  gold  asteroids  into  rainbow  portals.  Press  [ escape ]  for  Title  Screen.", True, FONT_COLOR)
+        text_prompt = TEXT.render("INSTRUCTIONS :  avoid  the  red  asteroids.  use  tethers  to  drag  gold  asteroids  into  rainbow  portals.  Press  [ escape ]  for  Title  Screen.", 18, FONT_COLOR)
         screen.blit(text_prompt, ((WIDTH // 2) - (text_prompt.get_width() // 2), (HEIGHT // 2) - (text_prompt.get_height() // 2) + (text.get_height() // 2) + 10))
 
         #display controls
-        font = pygame.font.Font(None, 18)
-        text_move = font.render("MOVEMENT :  wasd  /  arrow  keys", True, FONT_COLOR)
+        text_move = TEXT.render("MOVEMENT :  wasd  /  arrow  keys", 18, FONT_COLOR)
         screen.blit(text_move, ((WIDTH // 2) - (text_move.get_width() // 2), (HEIGHT // 2) - (text_move.get_height() // 2) + (text.get_height() // 2 + 10) + (text_prompt.get_height() // 2 + 10)))
 
         #display controls
-        font = pygame.font.Font(None, 18)
-        text_shoot = font.render("SHOOT :  space  key  /  left  click  towards  target", True, FONT_COLOR)
+        text_shoot = TEXT.render("SHOOT :  space  key  /  left  click  towards  target", 18, FONT_COLOR)
         screen.blit(text_shoot, ((WIDTH // 2) - (text_shoot.get_width() // 2), (HEIGHT // 2) - (text_shoot.get_height() // 2) + (text.get_height() // 2 + 10) + (text_prompt.get_height() // 2 + 10) + (text_move.get_height() // 2 + 10)))
 
         #display controls
-        font = pygame.font.Font(None, 18)
-        text_tether = font.render("TETHER :  return  key  /  right  click  on  gold  asteroid", True, FONT_COLOR)
+        text_tether = TEXT.render("TETHER :  return  key  /  right  click  on  gold  asteroid", 18, FONT_COLOR)
         screen.blit(text_tether, ((WIDTH // 2) - (text_tether.get_width() // 2), (HEIGHT // 2) - (text_tether.get_height() // 2) + (text.get_height() // 2 + 10) + (text_prompt.get_height() // 2 + 10) + (text_move.get_height() // 2 + 10) + (text_shoot.get_height() // 2 + 10)))
 
         #display top score
-        font = pygame.font.Font(None, 36)
-        text_top_score = font.render(f'TOP  SCORE :  {TOP_SCORE}', True, FONT_COLOR_TOP_SCORE)
+        text_top_score = TEXT.render(f'TOP  SCORE :  {TOP_SCORE}', 36, FONT_COLOR_TOP_SCORE)
         screen.blit(text_top_score, ((WIDTH // 2) - (text_top_score.get_width() // 2), 10))
 
         #display store
-        font = pygame.font.Font(None, 36)
-        text_score = font.render(f'STORE:', True, FONT_COLOR)
+        text_score = TEXT.render(f'STORE:', 36, FONT_COLOR)
         screen.blit(text_score, (10,10))
 
         #display gold
-        font = pygame.font.Font(None, 36)
-        text_gold = font.render(f'GOLD:  {GOLD}', True, CLUMP_COLOR)
+        text_gold = TEXT.render(f'GOLD:  {GOLD}', 36, CLUMP_COLOR)
         screen.blit(text_gold, (10,10 + text_score.get_height() + 10))
 
         #display tethers
-        font = pygame.font.Font(None, 36)
-        text_tethers = font.render(f'Tethers:  {TETHERS} (${TETHER_COST}  each,  to  buy  more  press  1)', True, TETHER_COLOR)
+        text_tethers = TEXT.render(f'Tethers:  {TETHERS} (${TETHER_COST}  each,  to  buy  more  press  1)', 36, TETHER_COLOR)
         screen.blit(text_tethers, (10,10 + text_score.get_height() + 10 + text_gold.get_height() + 10))
 
 #game state
@@ -419,85 +594,169 @@ class GameState(State):
         LIVES = INITIAL_LIVES
         music.load("audio/theme.ogg")
         music.play(-1)
-        pygame.time.delay(500)
-        self.asteroids = []
-        self.ships = [Particle((WIDTH / 2, 2 * HEIGHT / 3), (0, 0), (0, 0), SHIP_RADIUS, SHIP_DENSITY, SHIP_COLOR)]
-        self.bullets = []
-        self.clumps = []
-        self.tethers = []
-        self.portals = []
+        if not HEADLESS:
+            pygame.time.delay(500)
+        self.store = ParticleStore()
+        self.pools = {kind: Pool(lambda kind=kind: Particle(self.store, (0, 0), (0, 0), 1, 1, None, kind), size) for kind, size in POOL_SIZES.items()}
+        self.asteroids = Entities()
+        self.ships = Entities([Particle(self.store, (WIDTH / 2, 2 * HEIGHT / 3), (0, 0), SHIP_RADIUS, SHIP_DENSITY, SHIP_COLOR, SHIP)])
+        self.bullets = Entities()
+        self.clumps = Entities()
+        self.tethers = TetherSet()
+        self.portals = Entities()
+        #tether targeting only looks for clump particles, so only they are indexed
+        self.world = WorldQuery(self.store, CLUMP)
+
+        #spawn schedules and random spawn states, seeded from the global generator so --seed decides every game
+        #the seed is drawn as uint32 because the default int is 32-bit in the wasm32 browser build
+        self.spawner = SpawnDirector(int(np.random.randint(2**32, dtype=np.uint32)), get_ticks())
+        self.spawner.add("asteroids", asteroid_cooldown)
+        self.spawner.add("clumps", clump_cooldown)
+        self.spawner.add("portals", portal_cooldown)
         
 
     def handle_events(self):
-        if pygame.key.get_pressed()[pygame.K_ESCAPE]:
+        if INPUT.key(pygame.K_ESCAPE):
             music.stop()
             self.next_state = FirstState()
 
-    def create_asteroid(self):
-        #random initial particle state
-        position = np.array([random.uniform(0, WIDTH), 0])
-        angle = random.uniform(math.pi/4, 3*math.pi/4)
-        speed = ASTEROID_SPEED*random.uniform(0.5, 6)
-        velocity = np.array([speed * math.cos(angle), speed * math.sin(angle)])
-        #acceleration = np.array([random.uniform(-100, 100),random.uniform(-100, 100)])
-        acceleration = np.array([0,0])
-        radius = ASTEROID_RADIUS*random.uniform(0.5, 2)
-        density = ASTEROID_DENSITY
-        color = ASTEROID_COLOR
-
-        #create the asteroid
-        new_asteroid = Particle(position, velocity, acceleration, radius, density, color)
-
-        #add asteroid to list
-        self.asteroids.append(new_asteroid)
+    #random initial states for count spawns of a kind, entering at the top of the screen
+    def spawn_states(self, name, count, speed, radius):
+        x, angle, speed_factor, size = self.spawner.take(name, count)
+        position = np.stack((x * WIDTH, np.zeros(count)), axis=1)
+        speed = speed * speed_factor
+        velocity = np.stack((speed * np.cos(angle), speed * np.sin(angle)), axis=1)
+        return position, velocity, radius * size
+
+    #takes count particles from a pool and writes their store rows in one call
+    def spawn_pooled(self, kind, count, position, velocity, radius, density, color):
+        particles = self.pools[kind].acquire_many(count)
+        self.store.reset(self.indices(particles), position, velocity, radius, math.pi * radius * radius * density)
+        for particle, size in zip(particles, radius.tolist()):
+            particle.radius = size
+            particle.density = density
+            particle.color = color
+        return particles
+
+    def create_asteroids(self, count):
+        position, velocity, radius = self.spawn_states("asteroids", count, asteroid_speed(), ASTEROID_RADIUS)
+        self.asteroids.extend(self.spawn_pooled(ASTEROID, count, position, velocity, radius, ASTEROID_DENSITY, ASTEROID_COLOR))
 
+    def create_asteroid(self):
+        self.create_asteroids(1)
+
+    def create_portals(self, count):
+        position, velocity, radius = self.spawn_states("portals", count, portal_speed(), PORTAL_RADIUS)
+        self.portals.extend(self.spawn_pooled(PORTAL, count, position, velocity, radius, PORTAL_DENSITY, PORTAL_COLOR))
+
+    #clumps are built one by one, each places all of its particles in one call
+    #and starts just above the top edge, so large clumps slide in whole instead of losing the members above the screen
+    def create_clumps(self, count):
+        position, velocity, radius = self.spawn_states("clumps", count, clump_speed(), CLUMP_RADIUS)
+        for row in range(count):
+            clump = Clump(self.store, position[row], velocity[row], radius[row], CLUMP_DENSITY, CLUMP_COLOR, CLUMP_COUNT)
+            clump.place((clump.box.position[0], -clump.reach))
+            self.clumps.append(clump)
+
+    #fires a bullet from the ship towards the mouse, returns whether one was fired
+    #there is no direction to fire in while the mouse is on the ship's centre
     def create_bullet(self):
         if self.ships and len(self.ships) > 0:
 
-            mouse_x, mouse_y = pygame.mouse.get_pos()
-            direction = np.array((mouse_x - self.ships[0].position[0], mouse_y - self.ships[0].position[1]))
-            magnitude = np.linalg.norm(direction)
-            unit_direction = direction / magnitude
+            #plain floats for the direction, this runs every BULLET_COOLDOWN while fire is held
+            mouse_x, mouse_y = INPUT.mouse
+            x, y = self.ships[0].position.tolist()
+            magnitude = math.hypot(mouse_x - x, mouse_y - y)
+            if magnitude == 0:
+                return False
+            velocity = ((mouse_x - x) / magnitude * BULLET_SPEED, (mouse_y - y) / magnitude * BULLET_SPEED)
 
-            new_bullet = Particle(self.ships[0].position, unit_direction * BULLET_SPEED, [0,0], BULLET_RADIUS, BULLET_DENSITY, BULLET_COLOR)
+            new_bullet = self.pools[BULLET].acquire((x, y), velocity, BULLET_RADIUS, BULLET_DENSITY, BULLET_COLOR)
             self.bullets.append(new_bullet)
-
-    def elastic_collision(self, p1, p2):
-        v1 = np.array(p1.velocity)
-        v2 = np.array(p2.velocity)
-        x1 = np.array(p1.position)
-        x2 = np.array(p2.position)
-
-        distance = np.linalg.norm(x1 - x2)
-        normal = (x2 - x1) / distance
-
-        if (distance <= p1.radius + p2.radius):
-            # Calculate relative velocity
-            relative_velocity = v2 - v1
-
-            # Calculate the impulse
-            impulse = (2 * p1.mass * p2.mass / (p1.mass + p2.mass)) * np.dot(relative_velocity, normal) * normal
-
-            # Update velocities
-            p1.velocity = v1 + impulse / p1.mass
-            p2.velocity = v2 - impulse / p2.mass
-
-            # Separate the circles to avoid sticking together (assuming they have some overlap)
-            overlap = p1.radius + p2.radius - distance
-            separation = 0.5 * overlap * normal
-            p1.position = x1 - separation
-            p2.position = x2 + separation
-
             return True
+        return False
+
+    #tethers the particles of a clump to the ship, every particle of small clumps and TETHER_POINTS around large ones
+    def tether(self, clump):
+        self.tethers.add(self.store, self.ships[0].index, clump.anchors(TETHER_POINTS), clump.box.index)
+
+    def tethered(self, clump):
+        return self.tethers.attached(clump.box.index)
+
+    #query filter keeping the particles whose clump has no tether
+    def untethered(self, indices):
+        owners = np.fromiter(self.tethers.owners, dtype=np.intp, count=len(self.tethers.owners))
+        return ~np.isin(self.store.owner[indices], owners)
+
+    #clump of a particle handle returned by a world query, or None
+    def clump_of(self, handle):
+        index = self.store.resolve(handle)
+        if index is None:
+            return None
+        owner = self.store.owner[index]
+        for clump in self.clumps:
+            if clump.box.index == owner:
+                return clump
+        return None
+
+    #store indices of the particles of tethered clumps inside a portal, each once however many portals reach it
+    #only clumps whose bounding circle touches a portal are searched, through a spatial query around the portals
+    def captures(self):
+        portals = self.indices(self.portals)
+        clumps = [clump for clump in self.clumps if len(clump.indices) and self.tethered(clump)]
+        if len(portals) == 0 or not clumps:
+            return np.zeros(0, dtype=np.intp)
+        centres = np.array([clump.box.position for clump in clumps])
+        reach = np.array([clump.reach for clump in clumps])
+        delta = centres[:, None] - self.store.position[portals][None]
+        near = ((delta * delta).sum(axis=2) < (reach[:, None] + self.store.radius[portals][None]) ** 2).any(axis=1)
+        if not near.any():
+            return np.zeros(0, dtype=np.intp)
+        members = np.concatenate([clump.indices for clump, close in zip(clumps, near.tolist()) if close])
+        members = members[(self.store.flags[members] & ACTIVE) != 0]
+        p, m = cross_pairs(self.store, portals, members)
+        delta = self.store.position[members[m]] - self.store.position[portals[p]]
+        inside = (delta * delta).sum(axis=1) < self.store.radius[portals[p]] ** 2
+        return np.unique(members[m[inside]])
+
+    #store indices of a list of particles
+    def indices(self, particles):
+        return np.fromiter((particle.index for particle in particles), dtype=np.intp, count=len(particles))
+
+    #store indices of the particles of every clump
+    def members(self):
+        return np.concatenate([clump.indices for clump in self.clumps] + [np.zeros(0, dtype=np.intp)])
+
+    #resolves collisions within one group of store indices, or between two groups
+    #returns the positions of the colliding pairs within each group as plain lists
+    def collide(self, first, second=None):
+        if second is None:
+            a, b = self_pairs(self.store, first)
+            second = first
         else:
-            return False
+            a, b = cross_pairs(self.store, first, second)
+        hits = resolve_collisions(self.store, first[a], second[b])
+        return a[hits].tolist(), b[hits].tolist()
+
+    #removes inactive particles in place and returns them to their pool, or their slots to the store
+    def prune(self, particles, pool=None):
+        for particle in particles:
+            if not particle.active:
+                particles.remove(particle)
+                if pool is not None:
+                    pool.release(particle)
+                else:
+                    particle.release()
 
     #updates position of all items on screen, removes them if a collision is detected or they move off screen
     def update(self, DELTA):
-        global LAST_BULLET_TIME, LAST_ASTEROID_TIME, LIVES, SCORE, TOP_SCORE, FONT_COLOR, FONT_COLOR_TOP_SCORE, FORCE, MAX_SHIP_SPEED, ASTEROID_COLOR, LAST_CLUMP_TIME, CLUMP_COLOR, GOLD, LAST_SCORE_TIME, FONT_COLOR_NEW_TOP_SCORE, TETHERS, LAST_PORTAL_TIME, LAST_COLOR_CHANGE_TIME, PORTAL_COLOR, DIFFICULTY_RATE, DIFFICULTY, COLOR_DIRECTION
+        global LAST_BULLET_TIME, LIVES, SCORE, TOP_SCORE, FONT_COLOR, FONT_COLOR_TOP_SCORE, FORCE, MAX_SHIP_SPEED, ASTEROID_COLOR, CLUMP_COLOR, GOLD, LAST_SCORE_TIME, FONT_COLOR_NEW_TOP_SCORE, TETHERS, LAST_COLOR_CHANGE_TIME, PORTAL_COLOR, DIFFICULTY_RATE, DIFFICULTY, COLOR_DIRECTION
+
+        #keep the positions from before this step for render interpolation
+        self.store.snapshot()
 
         #update the score
-        current_time = pygame.time.get_ticks()
+        current_time = get_ticks()
         if current_time - LAST_SCORE_TIME >= 1000:
             SCORE += 1
             if SCORE > TOP_SCORE:
@@ -506,21 +765,29 @@ class GameState(State):
             LAST_SCORE_TIME = current_time
             #update the difficulty
             DIFFICULTY = 1 + SCORE * DIFFICULTY_RATE
+            if SCORE % ASTEROID_WAVE_INTERVAL == 0:
+                self.spawner.burst("asteroids", int(ASTEROID_WAVE_SIZE * DIFFICULTY))
 
         
 
         #remove inactive objects
-        self.asteroids = [asteroid for asteroid in self.asteroids if asteroid.active]
-        self.ships = [ship for ship in self.ships if ship.active]
-        self.bullets = [bullet for bullet in self.bullets if bullet.active]
-        self.clumps = [clump for clump in self.clumps if clump.active]
-        self.tethers = [tether for tether in self.tethers if tether.active]
-        self.portals = [portal for portal in self.portals if portal.active]
+        self.prune(self.asteroids, self.pools[ASTEROID])
+        self.prune(self.ships)
+        self.prune(self.bullets, self.pools[BULLET])
+        for clump in self.clumps:
+            if not clump.active:
+                self.tethers.detach(clump.box.index)
+                clump.release()
+                self.clumps.remove(clump)
+        self.tethers.prune(self.store)
+        self.prune(self.portals, self.pools[PORTAL])
+
+        PROFILER.mark("prune")
 
         #update colors
-        if pygame.time.get_ticks() - LAST_COLOR_CHANGE_TIME > COLOR_CHANGE_COOLDOWN:
+        if get_ticks() - LAST_COLOR_CHANGE_TIME > COLOR_CHANGE_COOLDOWN:
             PORTAL_COLOR = (random.uniform(0,222), random.uniform(10,222), random.uniform(0,222))
-            LAST_COLOR_CHANGE_TIME = pygame.time.get_ticks()
+            LAST_COLOR_CHANGE_TIME = get_ticks()
         if (ASTEROID_COLOR[0] == 100):
             COLOR_DIRECTION = 5
         if (ASTEROID_COLOR[0] == 255):
@@ -528,276 +795,265 @@ class GameState(State):
         ASTEROID_COLOR = ((ASTEROID_COLOR[0] + COLOR_DIRECTION),0,0)
 
         #create portals
-        if pygame.time.get_ticks() - LAST_PORTAL_TIME > PORTAL_COOLDOWN:
-            #random initial particle state
-            position = np.array([random.uniform(0, WIDTH), 0])
-            angle = random.uniform(math.pi/4, 3*math.pi/4)
-            speed = PORTAL_SPEED*random.uniform(0.5, 6)
-            velocity = np.array([speed * math.cos(angle), speed * math.sin(angle)])
-            #acceleration = np.array([random.uniform(-100, 100),random.uniform(-100, 100)])
-            acceleration = np.array([0,0])
-            radius = PORTAL_RADIUS*random.uniform(0.5, 2)
-            density = PORTAL_DENSITY
-            color = PORTAL_COLOR
-
-            new_portal = Particle(position, velocity, acceleration, radius, density, color)
-            self.portals.append(new_portal)
-            LAST_PORTAL_TIME = pygame.time.get_ticks()
-
-        #update portals
-        for portal in self.portals:
-            portal.update(DELTA)
-
-        #portal collisions
-        for portal in self.portals:
-            for tether in self.tethers:
-                clump = tether.end_clump
-                for p1 in clump.clump:
-                    distance = np.linalg.norm(np.array(p1.position) - np.array(portal.position))
-                    if distance < portal.radius:
-                        p1.active = False
-                        GOLD += 10
-        
-        #create asteroids
-        if pygame.time.get_ticks() - LAST_ASTEROID_TIME > ASTEROID_COOLDOWN:
-            self.create_asteroid()
-            LAST_ASTEROID_TIME = pygame.time.get_ticks()
+        count = self.spawner.due("portals", get_ticks())
+        if count:
+            self.create_portals(count)
+
+        PROFILER.mark("spawn")
+
+        #portal collisions, every captured particle is taken and credited once
+        captured = self.captures()
+        self.store.flags[captured] &= ~np.uint8(ACTIVE)
+        GOLD += 10 * len(captured)
         
-        #update asteroids
-        for asteroid in self.asteroids:
-            asteroid.update(DELTA)
+        PROFILER.mark("portals")
 
-        #asteroid collisions
-        for p1 in self.asteroids:
-            for p2 in self.asteroids:
-                if p1 != p2:
-                    self.elastic_collision(p1,p2)
-                    
-        #update ships
+        #create asteroids, a burst of them when the schedule owes several this step
+        count = self.spawner.due("asteroids", get_ticks())
+        if count:
+            self.create_asteroids(count)
+
+        PROFILER.mark("spawn")
+
+        #ship friction
         for ship in self.ships:
             ship.apply_friction(0.1)
-            ship.update(DELTA)
-            if (ship.position[0] <= ship.radius and ship.velocity[0] <= 0) or (ship.position[0] >= WIDTH - ship.radius and ship.velocity[0] >= 0):
-                ship.velocity = (-1*ship.velocity[0], ship.velocity[1])
-            if (ship.position[1] <= ship.radius and ship.velocity[1] <= 0) or (ship.position[1] >= HEIGHT - ship.radius and ship.velocity[1] >= 0):
-                ship.velocity = (ship.velocity[0], -1*ship.velocity[1])
 
         #ship controls
         for ship in self.ships:
             FORCE = SHIP_ACCELERATION * ship.mass
-            keys = pygame.key.get_pressed()
-            if keys[pygame.K_UP] or keys[pygame.K_w]:
+            if INPUT.key(pygame.K_UP) or INPUT.key(pygame.K_w):
                     ship.apply_force(0 ,-FORCE)
-            if keys[pygame.K_DOWN] or keys[pygame.K_s]:
+            if INPUT.key(pygame.K_DOWN) or INPUT.key(pygame.K_s):
                     ship.apply_force(0 , FORCE)
-            if keys[pygame.K_LEFT] or keys[pygame.K_a]:
+            if INPUT.key(pygame.K_LEFT) or INPUT.key(pygame.K_a):
                     ship.apply_force(-FORCE , 0)
-            if keys[pygame.K_RIGHT] or keys[pygame.K_d]:
+            if INPUT.key(pygame.K_RIGHT) or INPUT.key(pygame.K_d):
                     ship.apply_force(FORCE , 0)
-            
-        #ship collisions
-        for p1 in self.asteroids:
-            for p2 in self.ships:
-                if p1 != p2:
-                    if self.elastic_collision(p1,p2):
-                        LIVES -= 1
-                        SOUND_EXPLOSION.play()
-                        if LIVES <= 0:
-                            ship.active = False
-                            LIVES = 4
-                            save_data()
-                            SOUND_GAME_OVER.play()
-                            music.stop()
-                            self.next_state = FirstState()
-                
-        #update bullets
-        if (pygame.mouse.get_pressed()[0] and pygame.time.get_ticks() - LAST_BULLET_TIME > BULLET_COOLDOWN):
-            self.create_bullet()
-            LAST_BULLET_TIME = pygame.time.get_ticks()
-            SOUND_BULLET.play()
-        if (pygame.key.get_pressed()[pygame.K_SPACE] and pygame.time.get_ticks() - LAST_BULLET_TIME > BULLET_COOLDOWN):
-            self.bullets.append(Particle(self.ships[0].position, (self.ships[0].velocity[0], self.ships[0].velocity[1] - BULLET_SPEED), (0,0), BULLET_RADIUS, BULLET_DENSITY, BULLET_COLOR))
-            LAST_BULLET_TIME = pygame.time.get_ticks()
+
+        PROFILER.mark("controls")
+
+        #create bullets
+        if (INPUT.button(0) and get_ticks() - LAST_BULLET_TIME > BULLET_COOLDOWN):
+            if self.create_bullet():
+                LAST_BULLET_TIME = get_ticks()
+                SOUND_BULLET.play()
+        if (INPUT.key(pygame.K_SPACE) and get_ticks() - LAST_BULLET_TIME > BULLET_COOLDOWN):
+            x, y = self.ships[0].position.tolist()
+            vx, vy = self.ships[0].velocity.tolist()
+            self.bullets.append(self.pools[BULLET].acquire((x, y), (vx, vy - BULLET_SPEED), BULLET_RADIUS, BULLET_DENSITY, BULLET_COLOR))
+            LAST_BULLET_TIME = get_ticks()
             SOUND_BULLET.play()
-        for bullet in self.bullets:
-            bullet.update(DELTA)
 
-        #create tethers on entire asteroid clump
+        #create clumps
+        count = self.spawner.due("clumps", get_ticks())
+        if count:
+            self.create_clumps(count)
+
+        PROFILER.mark("spawn")
+
+        #update clumps
+        for clump in self.clumps:
+            clump.update(DELTA)
+
+        #queries from here on see this step's spawns and removals
+        self.world.invalidate()
+
+        PROFILER.mark("clumps")
+
+        #create tethers on the untethered clump under the mouse
         if (TETHERS > 0):
-            if pygame.mouse.get_pressed()[2]:
-                mouse_x, mouse_y = pygame.mouse.get_pos()
-                for clump in self.clumps:
-                    flag = False
-                    for circle in clump.clump:
-                        distance = np.linalg.norm(np.array(circle.position) - np.array((mouse_x, mouse_y)))
-                        if distance <= circle.radius:
-                            flag = True
-                        if flag:
-                            if not any(tether.end_clump == clump for tether in self.tethers):
-                                for circle in clump.clump:
-                                    self.tethers.append(Tether(self.ships[0], clump, circle))
-                                TETHERS -= 1
-
-        #create tethers on return key press
+            if INPUT.button(2):
+                clump = self.clump_of(self.world.pick(INPUT.mouse, CLUMP, self.untethered))
+                if clump is not None:
+                    self.tether(clump)
+                    TETHERS -= 1
+
+        #create tethers on return key press, on the untethered clump with the particle closest to the ship
         if (TETHERS > 0):
-            if pygame.key.get_pressed()[pygame.K_RETURN]:
-                closest_clump = None
-                closest_distance = math.inf
-                for clump in self.clumps:
-                    if not any(tether.end_clump == clump for tether in self.tethers):
-                        for circle in clump.clump:
-                            distance = np.linalg.norm(np.array(circle.position) - np.array((self.ships[0].position)))
-                            if distance < closest_distance:
-                                closest_distance = distance
-                                closest_clump = clump
-                if closest_clump:
-                    if not any(tether.end_clump == closest_clump for tether in self.tethers):
-                        for circle in closest_clump.clump:
-                            self.tethers.append(Tether(self.ships[0], closest_clump, circle))
-                        TETHERS -= 1
-
-        #update tethers
-        for tether in self.tethers:
-            tether.end_clump.box.apply_friction(FRICTION_COEFFICIENT / 10)
-            tether.update(DELTA)
+            if INPUT.key(pygame.K_RETURN):
+                closest_clump = self.clump_of(self.world.nearest(self.ships[0].position, CLUMP, self.untethered))
+                if closest_clump is not None:
+                    self.tether(closest_clump)
+                    TETHERS -= 1
+
+        #update tethers, every spring and the drag on tethered clumps in one pass
+        self.tethers.update(self.store, FRICTION_COEFFICIENT / 10, GRAVITY, CLUMP_SPIN)
+
+        PROFILER.mark("tethers")
+
+        #integrate every particle and deactivate the ones off screen, then place clump particles around their boxes
+        self.store.integrate(DELTA, WIDTH, HEIGHT)
+        for clump in self.clumps:
+            clump.follow()
+
+        #bounce ships off the screen edges
+        for ship in self.ships:
+            if (ship.position[0] <= ship.radius and ship.velocity[0] <= 0) or (ship.position[0] >= WIDTH - ship.radius and ship.velocity[0] >= 0):
+                ship.velocity = (-1*ship.velocity[0], ship.velocity[1])
+            if (ship.position[1] <= ship.radius and ship.velocity[1] <= 0) or (ship.position[1] >= HEIGHT - ship.radius and ship.velocity[1] >= 0):
+                ship.velocity = (ship.velocity[0], -1*ship.velocity[1])
+
+        PROFILER.mark("integrate")
+
+        #swept bullet tests so fast bullets cannot pass through asteroids and clump particles between frames
+        asteroids = self.indices(self.asteroids)
+        bullets = self.indices(self.bullets)
+        particles = self.members()
+        sweep_bullets(self.store, bullets, np.concatenate((asteroids, particles)))
+
+        PROFILER.mark("sweep")
+
+        #asteroid collisions
+        self.collide(asteroids)
             
+        PROFILER.mark("collide_asteroids")
+
+        #ship collisions
+        ships = self.indices(self.ships)
+        for a, s in zip(*self.collide(asteroids, ships)):
+            LIVES -= 1
+            SOUND_EXPLOSION.play()
+            if LIVES <= 0:
+                self.ships[s].active = False
+                LIVES = 4
+                save_data()
+                SOUND_GAME_OVER.play()
+                music.stop()
+                self.next_state = FirstState()
+            
+        PROFILER.mark("collide_ships")
+
         #bullet-asteroid collisions
-        for asteroid in self.asteroids:
-            for bullet in self.bullets:
-                if asteroid != bullet:
-                    if self.elastic_collision(asteroid,bullet):
-                        SOUND_HIT.play()
-                        
-        #create clumps
-        if pygame.time.get_ticks() - LAST_CLUMP_TIME > CLUMP_COOLDOWN:
-            LAST_CLUMP_TIME = pygame.time.get_ticks()
+        for a, b in zip(*self.collide(asteroids, bullets)):
+            SOUND_HIT.play()
+        
+        PROFILER.mark("collide_bullets")
 
-            position = np.array([random.uniform(0, WIDTH), 0])
-            angle = random.uniform(math.pi/4, 3*math.pi/4)
-            speed = CLUMP_SPEED*random.uniform(0.5, 6)
-            velocity = np.array([speed * math.cos(angle), speed * math.sin(angle)])
-            #acceleration = np.array([random.uniform(-100, 100),random.uniform(-100, 100)])
-            acceleration = np.array([0,0])
-            radius = CLUMP_RADIUS*random.uniform(0.5, 2)
-            density = CLUMP_DENSITY
-            color = CLUMP_COLOR
+        #clump on asteroids and ship collisions, against the particles so a clump is solid out to its edge
+        #contacts push the box, the particles follow it below
+        resolve_member_collisions(self.store, asteroids, particles)
+        resolve_member_collisions(self.store, ships, particles)
 
-            self.clumps.append(Clump(position, velocity, acceleration, radius, density, color, CLUMP_COUNT))
+        PROFILER.mark("collide_boxes")
 
-        #update clumps
+        #clump on clump collisions, bounding circles first, then the particles of overlapping clumps
+        clumps = [clump for clump in self.clumps if len(clump.indices) > 0]
+        resolve_group_collisions(
+            self.store,
+            self.indices([clump.box for clump in clumps]),
+            np.array([clump.box.position for clump in clumps]).reshape(-1, 2),
+            np.array([clump.reach for clump in clumps]),
+            [clump.world_positions() for clump in clumps],
+            [self.store.radius[clump.indices] for clump in clumps],
+        )
+
+        PROFILER.mark("collide_clumps")
+
+        #move clump particles with their boxes
         for clump in self.clumps:
-            clump.update(DELTA)
+            clump.follow()
         
-        #clump on asteroids and ship collisions
-        for list in [self.asteroids, self.ships]:
-            for p1 in list:
-                for clump in self.clumps:
-                        p2 = clump.box
-                        if p1 != p2:
-                            if self.elastic_collision(p1,p2):
-                                clump.velocity = p2.velocity
-        
-        #clump on bullet collision
-        for p1 in self.bullets:
-                for clump in self.clumps:
-                    for p2 in clump.clump:
-                        if p1 != p2:
-                            if self.elastic_collision(p1,p2):
-                                clump.velocity = p2.velocity
-                                p2.active = False
-                                GOLD += 1
-                                SOUND_HIT.play()
-
-        #clump on clump collision simplified
-        for clump1 in self.clumps:
-            for clump2 in self.clumps:
-                if clump1 != clump2:
-                    p1 = clump1.box
-                    p2 = clump2.box
-                    if p1 != p2:
-                        if self.elastic_collision(p1,p2):
-                            clump1.velocity = p1.velocity
-                            clump2.velocity = p2.velocity
+        PROFILER.mark("follow")
 
-        '''
-        #clump on clump collisions (needs pruning step to be functionally efficient)
-        for clump1 in self.clumps:
-            for clump2 in self.clumps:
-                for p1 in clump1.clump:
-                    for p2 in clump2.clump:
-                        if p1 != p2:
-                            if self.elastic_collision(p1,p2):
-                                clump1.velocity = p1.velocity
-                                clump2.velocity = p2.velocity
-        '''                  
+        #clump on bullet collision
+        b, m = self.collide(bullets, particles)
+        self.store.flags[particles[m]] &= ~np.uint8(ACTIVE)
+        for hit in m:
+            GOLD += 1
+            SOUND_HIT.play()
+        PROFILER.mark("collide_members")
+
+    def counts(self):
+        return {
+            "asteroids": len(self.asteroids),
+            "bullets": len(self.bullets),
+            "clump_particles": sum(len(clump.indices) for clump in self.clumps),
+            "tethers": len(self.tethers),
+            "allocations": sum(pool.allocated for pool in self.pools.values()),
+            "gc_collections": sum(GARBAGE.collections),
+        }
+
+    #draws one layer of particles from the store with its sprite layer, alpha places them between the last two steps
+    def draw_layer(self, screen, name, indices, color, alpha):
+        DIRTY.add_boxes(SPRITES[name].draw(screen, self.store.interpolate(indices, alpha), self.store.radius[indices], color))
+        PROFILER.mark(f"draw_{name}")
 
     #renders all necessary gameplay items on screen
-    def render(self, screen):
+    def render(self, screen, alpha=1):
         #clear screen
-        screen.fill(BACKGROUND_COLOR)
+        DIRTY.begin(screen, BACKGROUND_COLOR)
+        PROFILER.mark("clear")
 
-        for portal in self.portals:
-            portal.render(PORTAL_COLOR)
+        self.draw_layer(screen, "portals", self.indices(self.portals), PORTAL_COLOR, alpha)
 
-        for asteroid in self.asteroids:
-            asteroid.render(ASTEROID_COLOR)
+        self.draw_layer(screen, "asteroids", self.indices(self.asteroids), ASTEROID_COLOR, alpha)
 
-        for tether in self.tethers:
-            tether.render(TETHER_COLOR)
+        starts, ends = self.tethers.segments(self.store, alpha)
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            DIRTY.add(pygame.draw.aaline(screen, TETHER_COLOR, start, end))
+        PROFILER.mark("draw_tethers")
 
-        for bullet in self.bullets:
-            bullet.render(BULLET_COLOR) 
+        self.draw_layer(screen, "bullets", self.indices(self.bullets), BULLET_COLOR, alpha)
 
-        for clump in self.clumps:
-            clump.render(CLUMP_COLOR)
+        self.draw_layer(screen, "clumps", self.members(), CLUMP_COLOR, alpha)
 
-        for ship in self.ships:
-            ship.render(SHIP_COLOR)
+        self.draw_layer(screen, "ships", self.indices(self.ships), SHIP_COLOR, alpha)
         
 
         #display score
-        font = pygame.font.Font(None, 36)
-        text_score = font.render(f'SCORE : {SCORE}', True, FONT_COLOR)
-        screen.blit(text_score, (10,10))
+        text_score = TEXT.render(f'SCORE : {SCORE}', 36, FONT_COLOR)
+        DIRTY.add(screen.blit(text_score, (10,10)))
 
         '''
         #display missile availability
-        if pygame.time.get_ticks() - LAST_MISSILE_TIME > MISSILE_COOLDOWN:
-            font = pygame.font.Font(None, 36)
-            text_missiles = font.render('MISSILES READY', True, FONT_COLOR)
-            screen.blit(text_missiles, (10,10 + text_score.get_height() + 10))
+        if get_ticks() - LAST_MISSILE_TIME > MISSILE_COOLDOWN:
+            text_missiles = TEXT.render('MISSILES READY', 36, FONT_COLOR)
+            DIRTY.add(screen.blit(text_missiles, (10,10 + text_score.get_height() + 10)))
         '''
 
         #display gold
-        font = pygame.font.Font(None, 36)
-        text_gold = font.render(f'GOLD :  {GOLD}', True, CLUMP_COLOR)
-        screen.blit(text_gold, (10,10 + text_score.get_height() + 10))
+        text_gold = TEXT.render(f'GOLD :  {GOLD}', 36, CLUMP_COLOR)
+        DIRTY.add(screen.blit(text_gold, (10,10 + text_score.get_height() + 10)))
 
         #display tethers
-        font = pygame.font.Font(None, 36)
-        text_tethers = font.render(f'TETHERS :  {TETHERS}', True, TETHER_COLOR)
-        screen.blit(text_tethers, (10,10 + text_score.get_height() + 10 + text_gold.get_height() + 10))
+        text_tethers = TEXT.render(f'TETHERS :  {TETHERS}', 36, TETHER_COLOR)
+        DIRTY.add(screen.blit(text_tethers, (10,10 + text_score.get_height() + 10 + text_gold.get_height() + 10)))
 
         #display lives
-        font = pygame.font.Font(None, 36)
-        text_lives = font.render(f'LIVES :  {LIVES}', True, SHIP_COLOR)
-        screen.blit(text_lives, (WIDTH - text_lives.get_width() - 10,10))
+        text_lives = TEXT.render(f'LIVES :  {LIVES}', 36, SHIP_COLOR)
+        DIRTY.add(screen.blit(text_lives, (WIDTH - text_lives.get_width() - 10,10)))
 
         #display difficulty factor
-        font = pygame.font.Font(None, 36)
-        text_difficulty = font.render(f'DIFFICULTY :  {-100 + 100*DIFFICULTY:.0f}%', True, FONT_COLOR)
-        screen.blit(text_difficulty, (WIDTH - text_difficulty.get_width() - 10, 10 + text_lives.get_height() + 10))
+        text_difficulty = TEXT.render(f'DIFFICULTY :  {-100 + 100*DIFFICULTY:.0f}%', 36, FONT_COLOR)
+        DIRTY.add(screen.blit(text_difficulty, (WIDTH - text_difficulty.get_width() - 10, 10 + text_lives.get_height() + 10)))
 
         #display top score
-        font = pygame.font.Font(None, 36)
-        text_top_score = font.render(f'TOP  SCORE :  {TOP_SCORE}', True, FONT_COLOR_TOP_SCORE)
-        screen.blit(text_top_score, ((WIDTH // 2) - (text_top_score.get_width() // 2), 10))
+        text_top_score = TEXT.render(f'TOP  SCORE :  {TOP_SCORE}', 36, FONT_COLOR_TOP_SCORE)
+        DIRTY.add(screen.blit(text_top_score, ((WIDTH // 2) - (text_top_score.get_width() // 2), 10)))
 
         #display fps
-        font = pygame.font.Font(None, 36)
         fps = clock.get_fps()
-        text_fps = font.render(f'FPS :  {fps:.0f}', True, FONT_COLOR)
-        screen.blit(text_fps, ((WIDTH // 2) - (text_fps.get_width() // 2), 10 + text_top_score.get_height() + 10))
+        text_fps = TEXT.render(f'FPS :  {fps:.0f}', 36, FONT_COLOR)
+        DIRTY.add(screen.blit(text_fps, ((WIDTH // 2) - (text_fps.get_width() // 2), 10 + text_top_score.get_height() + 10)))
+        PROFILER.mark("hud")
+
+#draws the profiler table in the bottom left corner, slowest phases first
+def render_profiler(screen):
+    if not PROFILER.visible:
+        return
+    lines = [f"{name} :  p50 {p50:.2f}  p99 {p99:.2f} ms" for name, p50, p99 in PROFILER.summary()]
+    y = HEIGHT - 10
+    for line in reversed(lines):
+        text = TEXT.render(line, 20, FONT_COLOR)
+        y -= text.get_height()
+        DIRTY.add(screen.blit(text, (10, y)))
+    PROFILER.mark("overlay")
+
+#writes the recorded profiler rows when an output file was requested
+def export_profile():
+    if ARGS.profile_output:
+        PROFILER.export(ARGS.profile_output)
 
 #start game on title screen
 CURRENT_STATE = FirstState()
@@ -805,33 +1061,153 @@ CURRENT_STATE = FirstState()
 #exit variable
 QUIT_GAME = False
 
+#handles the frame's input and state transitions, then runs up to steps simulation steps of delta seconds
+#returns the steps actually run, a state transition ends the frame early
+def step_frame(steps, delta):
+    global CURRENT_STATE
+    CURRENT_STATE.handle_events()
+    if CURRENT_STATE.next_state:
+        save_data()
+        CURRENT_STATE = CURRENT_STATE.next_state
+    PROFILER.mark("events")
+
+    run = 0
+    while run < steps and not CURRENT_STATE.next_state:
+        CURRENT_STATE.update(delta)
+        CLOCK.advance(delta)
+        run += 1
+    return run
+
+#crc of the simulation state, a replay compares it frame by frame to find where it diverged
+def state_checksum():
+    crc = zlib.crc32(f"{type(CURRENT_STATE).__name__} {SCORE} {LIVES} {GOLD} {TETHERS} {CLOCK.ticks}".encode())
+    store = getattr(CURRENT_STATE, "store", None)
+    if store is not None:
+        for array in (store.position, store.velocity, store.flags):
+            crc = zlib.crc32(array[:store.count].tobytes(), crc)
+    return crc
+
 #main loop
 async def main():
     global CURRENT_STATE
+    accumulator = 0
     while True:
 
-        #limit to the fps constant
-        DELTA = clock.tick(FPS) / 1000
+        #limit to the fps constant, the time since the last frame is simulated below in fixed steps
+        accumulator += clock.tick(FPS) / 1000
+        PROFILER.begin_frame()
 
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 save_data()
+                DATA.flush()
+                export_profile()
+                if RECORDER:
+                    RECORDER.save()
                 QUIT_GAME = True
-        
-
-        #handle events and state transitions
-        CURRENT_STATE.handle_events()
-        if CURRENT_STATE.next_state:
-            save_data()
-            CURRENT_STATE = CURRENT_STATE.next_state
-        
-        #update and render the current state
-        CURRENT_STATE.update(DELTA)
-        CURRENT_STATE.render(SCREEN)
-
-        #update display
-        pygame.display.update()
+            if event.type == pygame.KEYDOWN and event.key == PROFILER_KEY:
+                PROFILER.visible = not PROFILER.visible
+        INPUT.poll()
+
+        #handle events and state transitions, then update the current state in fixed steps
+        #a slow frame runs at most MAX_STEPS and drops the rest of its backlog
+        steps = step_frame(min(int(accumulator / STEP), MAX_STEPS), STEP)
+        accumulator -= steps * STEP
+        if steps == MAX_STEPS:
+            accumulator = min(accumulator, STEP)
+        if RECORDER:
+            RECORDER.frame(INPUT, steps, STEP, state_checksum())
+
+        #play the sounds requested by this frame's steps
+        AUDIO.flush(get_ticks())
+        PROFILER.mark("audio")
+
+        #render the current state between its last two steps
+        CURRENT_STATE.render(SCREEN, min(accumulator / STEP, 1))
+        PROFILER.mark("render")
+        render_profiler(SCREEN)
+
+        #update display, only the regions that changed in dirty rect mode
+        rects = DIRTY.flush()
+        if rects is None:
+            pygame.display.update()
+        else:
+            pygame.display.update(rects)
+        PROFILER.mark("display")
+        PROFILER.end_frame(CURRENT_STATE.counts())
 
         await asyncio.sleep(0)
 
-asyncio.run(main())
\ No newline at end of file
+#re-runs a recorded session frame by frame as fast as the cpu allows
+#with verify every frame's checksum is compared and the first frame that differs is reported
+def run_replay(args):
+    mismatch = None
+    update_time = 0
+    start = time.perf_counter()
+    for frame in range(len(REPLAY)):
+        pygame.event.pump()
+        PROFILER.begin_frame()
+        INPUT.set(REPLAY.keys[frame], REPLAY.mouse[frame], REPLAY.buttons[frame])
+
+        frame_start = time.perf_counter()
+        step_frame(REPLAY.steps[frame], REPLAY.delta[frame])
+        update_time += time.perf_counter() - frame_start
+        AUDIO.flush(get_ticks())
+
+        if args.render:
+            CURRENT_STATE.render(SCREEN)
+            DIRTY.flush()
+            PROFILER.mark("render")
+        PROFILER.end_frame(CURRENT_STATE.counts())
+
+        if args.verify and state_checksum() != REPLAY.checksums[frame]:
+            mismatch = frame
+            break
+    wall = time.perf_counter() - start
+
+    frames = len(REPLAY) if mismatch is None else mismatch + 1
+    print(f"replay: {args.replay}  seed: {REPLAY.header['seed']}  frames: {frames}/{len(REPLAY)}  wall: {wall:.2f} s  ({frames / max(wall, 1e-9):.0f} frames/s)")
+    print(f"update: {1000 * update_time / max(frames, 1):.3f} ms/frame")
+    print(f"state: {type(CURRENT_STATE).__name__}  score: {SCORE}  top score: {TOP_SCORE}  gold: {GOLD}  tethers: {TETHERS}")
+    if args.profile:
+        for name, p50, p99 in PROFILER.stats():
+            print(f"{name:18} p50 {p50:8.3f}  p99 {p99:8.3f} ms")
+    export_profile()
+    if args.verify:
+        if mismatch is None:
+            print("verified: every frame matches the recording")
+        else:
+            print(f"diverged at frame {mismatch}")
+            sys.exit(1)
+
+#steps the game with a fixed DELTA as fast as the cpu allows and prints a summary
+def run_headless(args):
+    def step(state):
+        INPUT.poll()
+        PROFILER.begin_frame()
+        state.update(args.delta)
+        AUDIO.flush(get_ticks())
+
+    def render(state):
+        state.render(SCREEN)
+        DIRTY.flush()
+        PROFILER.mark("render")
+
+    state, games = run_games(args, CLOCK, GameState, step, render, lambda state: PROFILER.end_frame(state.counts()))
+    print(f"games: {games}  score: {SCORE}  top score: {TOP_SCORE}  gold: {GOLD}")
+    print(f"asteroids: {len(state.asteroids)}  bullets: {len(state.bullets)}  clumps: {len(state.clumps)}  tethers: {len(state.tethers)}")
+    print("pools: " + "  ".join(f"{name}: {state.pools[kind].stats()}" for name, kind in (("bullets", BULLET), ("asteroids", ASTEROID), ("portals", PORTAL))))
+    print(f"gc: {GARBAGE.stats()}")
+    print("sounds: " + "  ".join(f"{name}: {count}" for name, count in AUDIO.stats().items()))
+    if args.profile:
+        for name, p50, p99 in PROFILER.stats():
+            print(f"{name:18} p50 {p50:8.3f}  p99 {p99:8.3f} ms")
+    export_profile()
+
+if __name__ == "__main__":
+    if REPLAY:
+        run_replay(ARGS)
+    elif HEADLESS:
+        run_headless(ARGS)
+    else:
+        asyncio.run(main())
\ No newline at end of file
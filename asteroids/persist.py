@@ -0,0 +1,81 @@
+import atexit
+import json
+import os
+import tempfile
+import threading
+import time
+
+#json save file written atomically off the main loop
+#save() only hands over a snapshot, a writer thread writes it at most delay seconds later so a burst of saves is one write
+#every write goes to a temporary file in the same directory that is then renamed over the old one,
+#so an interrupted write leaves the previous file intact instead of a truncated one
+class DataFile:
+    def __init__(self, path, delay=1.0, background=True):
+        self.path = path
+        self.delay = delay
+        self.background = background
+        self.pending = None
+        self.lock = threading.Lock()
+        self.changed = threading.Condition(self.lock)
+        self.writing = threading.Lock()
+        self.thread = None
+        self.writes = 0
+        atexit.register(self.flush)
+
+    def load(self, defaults):
+        try:
+            with open(self.path, "r") as file:
+                data = json.load(file)
+        except (FileNotFoundError, json.decoder.JSONDecodeError):
+            return dict(defaults)
+        return {key: data.get(key, value) for key, value in defaults.items()}
+
+    #queues a snapshot of the data, written by the background thread or right away without one
+    def save(self, data):
+        if not self.background:
+            self.write(dict(data))
+            return
+        with self.lock:
+            self.pending = dict(data)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name="DataFile", daemon=True)
+                self.thread.start()
+            self.changed.notify()
+
+    #writes whatever is pending now, used on exit so the last save is never lost
+    def flush(self):
+        with self.writing:
+            with self.lock:
+                data = self.pending
+                self.pending = None
+            if data is not None:
+                self.write(data)
+
+    def run(self):
+        while True:
+            with self.lock:
+                while self.pending is None:
+                    self.changed.wait()
+            #let further saves in the debounce interval replace the snapshot
+            time.sleep(self.delay)
+            #snapshots are taken and written under one lock so an older one never replaces a newer file
+            with self.writing:
+                with self.lock:
+                    data = self.pending
+                    self.pending = None
+                if data is not None:
+                    self.write(data)
+
+    def write(self, data):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        descriptor, temporary = tempfile.mkstemp(prefix=".data", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(descriptor, "w") as file:
+                json.dump(data, file)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temporary, self.path)
+            self.writes += 1
+        except BaseException:
+            os.unlink(temporary)
+            raise
@@ -0,0 +1,64 @@
+import gc
+import time
+
+#recycles objects of one kind instead of allocating new ones, grows on demand when it runs dry
+#pooled objects implement reset(*args) to be reused and retire() when they go back to the pool
+class Pool:
+    def __init__(self, factory, size=0):
+        self.factory = factory
+        self.free = []
+        self.allocated = 0
+        self.reused = 0
+        for _ in range(size):
+            item = factory()
+            item.retire()
+            self.free.append(item)
+        self.preallocated = size
+
+    def acquire(self, *args):
+        if self.free:
+            item = self.free.pop()
+            self.reused += 1
+        else:
+            item = self.factory()
+            self.allocated += 1
+        item.reset(*args)
+        return item
+
+    #takes count items without resetting them, the caller initializes them all at once
+    def acquire_many(self, count):
+        reused = min(count, len(self.free))
+        items = self.free[len(self.free) - reused:]
+        del self.free[len(self.free) - reused:]
+        self.reused += reused
+        for _ in range(count - reused):
+            items.append(self.factory())
+        self.allocated += count - reused
+        return items
+
+    def release(self, item):
+        item.retire()
+        self.free.append(item)
+
+    def stats(self):
+        return {"preallocated": self.preallocated, "allocated": self.allocated, "reused": self.reused, "free": len(self.free)}
+
+#counts garbage collections per generation and the time spent in them through gc.callbacks
+class GarbageMonitor:
+    def __init__(self):
+        self.collections = [0, 0, 0]
+        self.collected = 0
+        self.pause = 0
+        self.started = 0
+        gc.callbacks.append(self.callback)
+
+    def callback(self, phase, info):
+        if phase == "start":
+            self.started = time.perf_counter()
+        else:
+            self.collections[info["generation"]] += 1
+            self.collected += info["collected"]
+            self.pause += time.perf_counter() - self.started
+
+    def stats(self):
+        return {"collections": list(self.collections), "collected": self.collected, "pause_ms": 1000 * self.pause}
@@ -0,0 +1,79 @@
+import csv
+import json
+import time
+from collections import deque
+
+import numpy as np
+
+#times the phases of every frame with perf_counter marks and keeps rolling p50/p99 per phase
+#a mark charges the time since the previous mark to its phase, phases marked several times in a frame are summed
+#so a frame that runs several simulation steps reports the total per phase
+class Profiler:
+    def __init__(self, window=300, record=False, rows=36000, refresh=0.5):
+        self.window = window
+        self.record = record
+        self.rows = deque(maxlen=rows)
+        self.refresh = refresh
+        self.samples = {}
+        self.current = {}
+        self.frame = 0
+        self.started = self.last = time.perf_counter()
+        self.visible = False
+        self.summary_time = 0
+        self.summary_rows = []
+
+    def begin_frame(self):
+        self.current = {}
+        self.started = self.last = time.perf_counter()
+
+    def mark(self, name):
+        now = time.perf_counter()
+        self.current[name] = self.current.get(name, 0) + now - self.last
+        self.last = now
+
+    #closes the frame, counts are the entity counts stored with the frame's row
+    def end_frame(self, counts=None):
+        self.current["frame"] = time.perf_counter() - self.started
+        for name, seconds in self.current.items():
+            samples = self.samples.get(name)
+            if samples is None:
+                samples = self.samples[name] = deque(maxlen=self.window)
+            samples.append(seconds)
+        if self.record:
+            row = {"frame": self.frame}
+            row.update((f"{name}_ms", round(1000 * seconds, 4)) for name, seconds in self.current.items())
+            row.update(counts or {})
+            self.rows.append(row)
+        self.frame += 1
+
+    #(phase, p50, p99) in milliseconds over the rolling window, slowest p99 first
+    def stats(self):
+        stats = []
+        for name, samples in self.samples.items():
+            p50, p99 = np.percentile(np.fromiter(samples, dtype=np.float64, count=len(samples)), (50, 99)) * 1000
+            stats.append((name, float(p50), float(p99)))
+        stats.sort(key=lambda stat: stat[2], reverse=True)
+        return stats
+
+    #stats for the overlay, recomputed at most once per refresh interval so the text stays readable and cached
+    def summary(self):
+        now = time.perf_counter()
+        if now - self.summary_time >= self.refresh:
+            self.summary_time = now
+            self.summary_rows = self.stats()
+        return self.summary_rows
+
+    #writes the recorded frame rows as csv or json, chosen by the file extension
+    def export(self, path):
+        rows = list(self.rows)
+        if path.endswith(".json"):
+            with open(path, "w") as file:
+                json.dump({"stats": self.stats(), "frames": rows}, file)
+            return
+        fields = {}
+        for row in rows:
+            fields.update(dict.fromkeys(row))
+        with open(path, "w", newline="") as file:
+            writer = csv.DictWriter(file, fieldnames=list(fields))
+            writer.writeheader()
+            writer.writerows(rows)
@@ -0,0 +1,112 @@
+import numpy as np
+from store import ACTIVE
+from broadphase import SpatialHash
+
+#point queries over the active particles of a store, or only those of one kind, answered from a spatial hash
+#the hash is built by the first query after invalidate(), so a step without queries costs nothing
+#and indexing only the kind that is queried keeps that build from sorting the whole world
+#results are store handles, (index, generation) pairs that ParticleStore.resolve turns back into an index while the particle lives
+class WorldQuery:
+    def __init__(self, store, kind=None, cell_size=32):
+        self.store = store
+        self.kind = kind
+        self.grid = SpatialHash(cell_size)
+        self.indices = np.zeros(0, dtype=np.intp)
+        self.largest = 0.0
+        self.lo = self.hi = np.zeros(2, dtype=np.int64)
+        self.stale = True
+
+    #marks the index out of date, called once particles moved or were added
+    def invalidate(self):
+        self.stale = True
+
+    def build(self):
+        if not self.stale:
+            return
+        self.indices = self.store.active(self.kind)
+        self.grid.build(self.store.position[self.indices])
+        if len(self.indices):
+            self.largest = float(self.store.radius[self.indices].max())
+            self.lo = self.grid.cells.min(axis=0)
+            self.hi = self.grid.cells.max(axis=0)
+        self.stale = False
+
+    #live particles in the given cells that pass the kind and filter tests, as store indices
+    #filter is called with an array of store indices and returns a mask over it
+    def lookup(self, cells, kind=None, filter=None):
+        owner, slots = self.grid.lookup(cells)
+        found = self.indices[slots]
+        found = found[(self.store.flags[found] & ACTIVE) != 0]
+        if kind is not None:
+            found = found[self.store.kind[found] == kind]
+        if filter is not None and len(found):
+            found = found[filter(found)]
+        return found
+
+    #cells covering the square of half size reach around point
+    def cells_around(self, point, reach):
+        lo = self.grid.cells_of(point - reach)
+        hi = self.grid.cells_of(point + reach)
+        x, y = np.meshgrid(np.arange(lo[0], hi[0] + 1), np.arange(lo[1], hi[1] + 1), indexing="ij")
+        return np.stack((x.ravel(), y.ravel()), axis=1)
+
+    #cells at chebyshev distance ring from a centre cell
+    def ring_cells(self, centre, ring):
+        if ring == 0:
+            return centre[None]
+        side = np.arange(-ring, ring + 1)
+        inner = side[1:-1]
+        x = np.concatenate((side, side, np.full(len(inner), -ring), np.full(len(inner), ring)))
+        y = np.concatenate((np.full(len(side), -ring), np.full(len(side), ring), inner, inner))
+        return centre + np.stack((x, y), axis=1)
+
+    #handle of the particle under a point, the one whose centre is closest when several overlap, or None
+    def pick(self, point, kind=None, filter=None):
+        self.build()
+        if len(self.indices) == 0:
+            return None
+        point = np.asarray(point, dtype=np.float64)
+        found = self.lookup(self.cells_around(point, self.largest), kind, filter)
+        delta = self.store.position[found] - point
+        distance = (delta * delta).sum(axis=1)
+        inside = distance <= self.store.radius[found] ** 2
+        if not inside.any():
+            return None
+        return self.store.handle(found[inside][np.argmin(distance[inside])])
+
+    #handle of the particle whose centre is closest to a point, searched ring by ring outwards, or None
+    def nearest(self, point, kind=None, filter=None):
+        self.build()
+        if len(self.indices) == 0:
+            return None
+        point = np.asarray(point, dtype=np.float64)
+        centre = self.grid.cells_of(point)
+        rings = int(max(np.abs(centre - self.lo).max(), np.abs(self.hi - centre).max()))
+        best = None
+        best_distance = np.inf
+        for ring in range(rings + 1):
+            #every cell of this ring is at least ring - 1 cells away from the point
+            if (ring - 1) * self.grid.cell_size > best_distance:
+                break
+            found = self.lookup(self.ring_cells(centre, ring), kind, filter)
+            if len(found) == 0:
+                continue
+            delta = self.store.position[found] - point
+            distance = np.sqrt((delta * delta).sum(axis=1))
+            closest = np.argmin(distance)
+            if distance[closest] < best_distance:
+                best = found[closest]
+                best_distance = distance[closest]
+        return None if best is None else self.store.handle(best)
+
+    #handles of every particle overlapping the circle of radius around a point
+    def within(self, point, radius, kind=None, filter=None):
+        self.build()
+        if len(self.indices) == 0:
+            return []
+        point = np.asarray(point, dtype=np.float64)
+        found = self.lookup(self.cells_around(point, radius + self.largest), kind, filter)
+        delta = self.store.position[found] - point
+        reach = radius + self.store.radius[found]
+        found = found[(delta * delta).sum(axis=1) <= reach * reach]
+        return [self.store.handle(index) for index in found.tolist()]
@@ -0,0 +1,85 @@
+import atexit
+import json
+
+import numpy as np
+import pygame
+
+#file format version, replays of another version are refused instead of silently diverging
+VERSION = 1
+
+#one row per frame of the main loop: the input the frame saw, the steps it ran with their DELTA
+#and a checksum of the state after them
+FRAME = np.dtype([
+    ("keys", "<u2"),
+    ("mouse", "<i2", (2,)),
+    ("buttons", "u1"),
+    ("steps", "<u2"),
+    ("delta", "<f8"),
+    ("checksum", "<u4"),
+])
+
+#keyboard and mouse state read once per frame, the game asks this instead of pygame so a replay can supply it
+#only the keys the game uses are kept, as one bit each
+class InputState:
+    def __init__(self, keys):
+        self.bits = {key: 1 << bit for bit, key in enumerate(keys)}
+        self.keys = 0
+        self.mouse = (0, 0)
+        self.buttons = 0
+
+    #reads the live state from pygame
+    def poll(self):
+        pressed = pygame.key.get_pressed()
+        self.keys = sum(bit for key, bit in self.bits.items() if pressed[key])
+        self.mouse = pygame.mouse.get_pos()
+        self.buttons = sum(1 << button for button, down in enumerate(pygame.mouse.get_pressed()) if down)
+
+    def set(self, keys, mouse, buttons):
+        self.keys = keys
+        self.mouse = mouse
+        self.buttons = buttons
+
+    def key(self, key):
+        return bool(self.keys & self.bits[key])
+
+    def button(self, button):
+        return bool(self.buttons >> button & 1)
+
+#collects the frames of a session and writes them with the settings needed to replay it
+#header holds the seed, screen size and everything else the simulation read at start up
+class Recorder:
+    def __init__(self, path, header):
+        self.path = path
+        self.header = dict(header, version=VERSION)
+        self.rows = []
+        self.saved = 0
+        atexit.register(self.save)
+
+    def frame(self, state, steps, delta, checksum):
+        self.rows.append((state.keys, state.mouse, state.buttons, steps, delta, checksum))
+
+    #writes every frame so far, a no-op when nothing was added since the last save
+    def save(self):
+        if len(self.rows) == self.saved:
+            return
+        with open(self.path, "wb") as file:
+            np.savez_compressed(file, header=np.array(json.dumps(self.header)), frames=np.array(self.rows, dtype=FRAME))
+        self.saved = len(self.rows)
+
+#a recorded session, header settings and the frame rows as plain lists for a fast replay loop
+class Replay:
+    def __init__(self, path):
+        with np.load(path) as data:
+            self.header = json.loads(str(data["header"]))
+            frames = data["frames"]
+        if self.header.get("version") != VERSION:
+            raise ValueError(f"{path} is a version {self.header.get('version')} replay, expected version {VERSION}")
+        self.keys = frames["keys"].tolist()
+        self.mouse = [tuple(mouse) for mouse in frames["mouse"].tolist()]
+        self.buttons = frames["buttons"].tolist()
+        self.steps = frames["steps"].tolist()
+        self.delta = frames["delta"].tolist()
+        self.checksums = frames["checksum"].tolist()
+
+    def __len__(self):
+        return len(self.steps)
@@ -0,0 +1,71 @@
+import math
+
+import numpy as np
+
+#shortest cooldown in milliseconds, keeps a runaway difficulty from asking for unbounded spawns in one step
+MIN_COOLDOWN = 1
+
+#random spawn states of one kind drawn ahead in chunks from its own generator
+#rows are unit draws (x across the screen, heading, speed factor, size factor) that the game scales when it takes them,
+#so speeds and sizes follow the live difficulty without redrawing
+class SpawnStream:
+    def __init__(self, rng, chunk):
+        self.rng = rng
+        self.chunk = chunk
+        self.rows = np.zeros((0, 4))
+        self.next = 0
+
+    def refill(self, count):
+        size = max(self.chunk, count)
+        rows = np.empty((size, 4))
+        rows[:, 0] = self.rng.uniform(0, 1, size)
+        rows[:, 1] = self.rng.uniform(math.pi / 4, 3 * math.pi / 4, size)
+        rows[:, 2] = self.rng.uniform(0.5, 6, size)
+        rows[:, 3] = self.rng.uniform(0.5, 2, size)
+        self.rows = np.concatenate((self.rows[self.next:], rows))
+        self.next = 0
+
+    #the next count rows as (x, angle, speed, size) arrays
+    def take(self, count):
+        if self.next + count > len(self.rows):
+            self.refill(count)
+        rows = self.rows[self.next:self.next + count]
+        self.next += count
+        return rows[:, 0], rows[:, 1], rows[:, 2], rows[:, 3]
+
+#decides how many of every kind spawn each step and hands out their random states in batches
+#cooldowns are functions read every step, so rates follow the live difficulty, a step can owe several spawns of a kind
+#and burst() adds a wave on top of the schedule, every kind draws from its own stream of one seed
+class SpawnDirector:
+    def __init__(self, seed=None, start=0, chunk=256):
+        self.seeds = np.random.SeedSequence(seed)
+        self.start = start
+        self.chunk = chunk
+        self.cooldowns = {}
+        self.last = {}
+        self.waves = {}
+        self.streams = {}
+
+    #registers a kind, cooldown returns the milliseconds between two spawns at the current difficulty
+    def add(self, name, cooldown):
+        self.cooldowns[name] = cooldown
+        self.last[name] = self.start
+        self.waves[name] = 0
+        self.streams[name] = SpawnStream(np.random.default_rng(self.seeds.spawn(1)[0]), self.chunk)
+
+    #queues count extra spawns of a kind for the next step
+    def burst(self, name, count):
+        self.waves[name] += count
+
+    #spawns of a kind owed at game time now in milliseconds, the schedule keeps its phase instead of restarting at now
+    def due(self, name, now):
+        cooldown = max(self.cooldowns[name](), MIN_COOLDOWN)
+        count = int((now - self.last[name]) // cooldown)
+        if count > 0:
+            self.last[name] += count * cooldown
+        count += self.waves[name]
+        self.waves[name] = 0
+        return count
+
+    def take(self, name, count):
+        return self.streams[name].take(count)
@@ -0,0 +1,56 @@
+import numpy as np
+import pygame
+
+#pre-rendered circle sprites for one entity layer, drawn with a single blits call per frame
+#sprites are 8-bit surfaces where palette entry 1 is the circle, so a new layer colour is one palette write
+#per sprite instead of rasterizing every circle again, which keeps pulsing and randomized colours cheap
+class CircleLayer:
+    def __init__(self, quantum=1.0):
+        self.quantum = quantum
+        self.sprites = {}
+        self.color = (255, 255, 255)
+
+    #sprite for a quantized radius, created the first time that size is drawn
+    def sprite(self, bucket):
+        entry = self.sprites.get(bucket)
+        if entry is None:
+            radius = max(int(bucket * self.quantum), 1)
+            sprite = pygame.Surface((2 * radius + 1, 2 * radius + 1), depth=8)
+            sprite.set_palette_at(0, (0, 0, 0))
+            sprite.set_palette_at(1, self.color)
+            sprite.fill(0)
+            pygame.draw.circle(sprite, 1, (radius, radius), radius)
+            sprite.set_colorkey(0)
+            entry = (sprite, radius)
+            self.sprites[bucket] = entry
+        return entry
+
+    def set_color(self, color):
+        color = tuple(int(channel) for channel in color[:3])
+        if color != self.color:
+            self.color = color
+            for sprite, radius in self.sprites.values():
+                sprite.set_palette_at(1, color)
+
+    #draws circles at the given centres and radii in one call, returns their boxes as (x0, y0, x1, y1) rows
+    def draw(self, screen, position, radius, color):
+        self.set_color(color)
+        if len(position) == 0:
+            return np.zeros((0, 4), dtype=np.int64)
+        buckets = (np.asarray(radius) / self.quantum).astype(np.int64)
+        centres = np.asarray(position, dtype=np.int64)
+        sizes = np.maximum((buckets * self.quantum).astype(np.int64), 1)
+        corners = centres - sizes[:, None]
+        sequence = []
+        for bucket, x, y in zip(buckets.tolist(), corners[:, 0].tolist(), corners[:, 1].tolist()):
+            sequence.append((self.sprite(bucket)[0], (x, y)))
+        blit(screen, sequence)
+        return np.concatenate((corners, centres + sizes[:, None] + 1), axis=1)
+
+#pygame-ce has fblits, plain pygame falls back to blits without collecting rects
+def blit(screen, sequence):
+    fblits = getattr(screen, "fblits", None)
+    if fblits is not None:
+        fblits(sequence)
+    else:
+        screen.blits(sequence, doreturn=False)
@@ -0,0 +1,174 @@
+import numpy as np
+
+#particle kinds
+SHIP = 0
+ASTEROID = 1
+BULLET = 2
+CLUMP = 3
+BOX = 4
+PORTAL = 5
+
+#particle flags
+ACTIVE = 1
+#moved by its owner instead of integrated, like the members of a rigid clump
+KINEMATIC = 2
+#never deactivated for leaving the screen, its owner decides when it dies, like the body of a clump
+UNCULLED = 4
+#spawned off screen and not deactivated above or beside it until it first comes on screen, like the members of a
+#clump spawned above the top edge, it is still deactivated below the screen, and above it once its body moves up,
+#so nothing that misses the screen or is knocked back out of it lingers
+ENTERING = 8
+
+#structure of arrays holding the state of every particle in the game
+class ParticleStore:
+    def __init__(self, capacity=256):
+        self.capacity = capacity
+        self.count = 0
+        self.position = np.zeros((capacity, 2), dtype=np.float64)
+        self.previous = np.zeros((capacity, 2), dtype=np.float64)
+        self.velocity = np.zeros((capacity, 2), dtype=np.float64)
+        self.force = np.zeros((capacity, 2), dtype=np.float64)
+        self.radius = np.zeros(capacity, dtype=np.float64)
+        self.mass = np.ones(capacity, dtype=np.float64)
+        self.angle = np.zeros(capacity, dtype=np.float64)
+        self.spin = np.zeros(capacity, dtype=np.float64)
+        self.inertia = np.zeros(capacity, dtype=np.float64)
+        self.torque = np.zeros(capacity, dtype=np.float64)
+        self.flags = np.zeros(capacity, dtype=np.uint8)
+        self.kind = np.zeros(capacity, dtype=np.uint8)
+        self.generation = np.zeros(capacity, dtype=np.uint32)
+        #store index of the body that moves a particle, like the box of a clump, or -1
+        self.owner = np.full(capacity, -1, dtype=np.intp)
+        self.free = []
+
+    #double the capacity of every array, keeping existing slots in place
+    def grow(self):
+        capacity = 2 * self.capacity
+        for name in ("position", "previous", "velocity", "force", "radius", "mass", "angle", "spin", "inertia", "torque", "flags", "kind", "generation", "owner"):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.capacity] = old
+            setattr(self, name, new)
+        self.mass[self.capacity:] = 1
+        self.owner[self.capacity:] = -1
+        self.capacity = capacity
+
+    #claims a slot for a new particle and returns its index
+    def add(self, position, velocity, radius, mass, kind):
+        if self.free:
+            index = self.free.pop()
+        else:
+            if self.count == self.capacity:
+                self.grow()
+            index = self.count
+            self.count += 1
+        self.kind[index] = kind
+        self.reset(index, position, velocity, radius, mass)
+        return index
+
+    #claims slots for many particles of one kind at once, freed slots first, and returns their indices
+    #every argument but kind can be one value for all of them or one row per particle
+    def add_many(self, position, velocity, radius, mass, kind):
+        count = len(position)
+        reused = min(count, len(self.free))
+        indices = np.empty(count, dtype=np.intp)
+        indices[:reused] = self.free[len(self.free) - reused:]
+        del self.free[len(self.free) - reused:]
+        while self.count + count - reused > self.capacity:
+            self.grow()
+        indices[reused:] = np.arange(self.count, self.count + count - reused)
+        self.count += count - reused
+        self.kind[indices] = kind
+        self.reset(indices, position, velocity, radius, mass)
+        return indices
+
+    #restarts a claimed slot, or an array of them, as a fresh active particle of the same kind
+    #every restart bumps the slot's generation so references kept from an earlier life can tell
+    def reset(self, index, position, velocity, radius, mass):
+        self.generation[index] += 1
+        self.position[index] = position
+        self.previous[index] = position
+        self.velocity[index] = velocity
+        self.force[index] = 0
+        self.radius[index] = radius
+        self.mass[index] = mass
+        self.angle[index] = 0
+        self.spin[index] = 0
+        self.inertia[index] = 0
+        self.torque[index] = 0
+        self.owner[index] = -1
+        self.flags[index] = ACTIVE
+
+    #stops simulating a slot without giving it up, used by pooled particles
+    def deactivate(self, index):
+        self.flags[index] = 0
+        self.force[index] = 0
+        self.torque[index] = 0
+
+    #returns a slot to the free list once nothing references it
+    def release(self, index):
+        self.deactivate(index)
+        self.free.append(index)
+
+    def release_many(self, indices):
+        self.deactivate(indices)
+        self.free.extend(np.asarray(indices).tolist())
+
+    #handle of a slot, it resolves until the slot is released or restarted
+    def handle(self, index):
+        return (int(index), int(self.generation[index]))
+
+    #index of a live particle from its handle, or None
+    def resolve(self, handle):
+        if handle is None:
+            return None
+        index, generation = handle
+        if self.generation[index] == generation and self.flags[index] & ACTIVE:
+            return index
+        return None
+
+    #indices of every active particle, optionally of one kind
+    def active(self, kind=None):
+        mask = (self.flags[:self.count] & ACTIVE) != 0
+        if kind is not None:
+            mask &= self.kind[:self.count] == kind
+        return np.flatnonzero(mask)
+
+    #remembers the positions at the start of a simulation step so rendering can interpolate towards the next one
+    def snapshot(self):
+        self.previous[:self.count] = self.position[:self.count]
+
+    #positions between the last two simulation steps, alpha 0 is the previous step and 1 the current one
+    def interpolate(self, indices, alpha):
+        previous = self.previous[indices]
+        return previous + (self.position[indices] - previous) * alpha
+
+    #deactivates particles that left the screen, then integrates the rest in one step
+    #kinematic particles are only deactivated, their owner places them, particles with inertia also rotate
+    def integrate(self, DELTA, width, height):
+        n = self.count
+        position = self.position[:n]
+        flags = self.flags[:n]
+        active = (flags & ACTIVE) != 0
+        below = position[:, 1] > height
+        outside = below | (position[:, 0] < 0) | (position[:, 0] > width) | (position[:, 1] < 0)
+        flags[active & ~outside] &= ~np.uint8(ENTERING)
+        entering = (flags & ENTERING) != 0
+        #owned particles rise with their body, so the spin of a clump does not cull members that are still coming in
+        body = np.where(self.owner[:n] >= 0, self.owner[:n], np.arange(n))
+        leaving = (position[:, 1] < 0) & (self.velocity[body, 1] < 0)
+        invisible = active & ((flags & UNCULLED) == 0) & np.where(entering, below | leaving, outside)
+        flags[invisible] &= ~np.uint8(ACTIVE)
+
+        moving = active & ~invisible & ((self.flags[:n] & KINEMATIC) == 0)
+        acceleration = self.force[:n][moving] / self.mass[:n][moving, None]
+        self.velocity[:n][moving] += acceleration * DELTA
+        self.position[:n][moving] += self.velocity[:n][moving] * DELTA
+
+        rotating = moving & (self.inertia[:n] > 0)
+        self.spin[:n][rotating] += self.torque[:n][rotating] / self.inertia[:n][rotating] * DELTA
+        self.angle[:n][rotating] += self.spin[:n][rotating] * DELTA
+
+        #remove applied force
+        self.force[:n][moving] = 0
+        self.torque[:n][moving] = 0
@@ -0,0 +1,89 @@
+import numpy as np
+from store import ACTIVE
+
+#every tether as one row of store indices, all springs are solved in one numpy pass
+#a row pulls its start particle towards its end particle and pulls the end's body, which moves the end, back the other way
+#rows die when one of their particles is no longer active or its slot was released, checked with the store flags and generations
+#owners counts the rows of every body, so whether a body is tethered is a dictionary lookup
+class TetherSet:
+    def __init__(self, strength=10000):
+        self.strength = strength
+        self.start = np.zeros(0, dtype=np.intp)
+        self.end = np.zeros(0, dtype=np.intp)
+        self.body = np.zeros(0, dtype=np.intp)
+        self.generations = np.zeros((0, 3), dtype=np.uint32)
+        self.owners = {}
+
+    #tethers one start particle to several end particles that move with one body
+    def add(self, store, start, ends, body):
+        ends = np.asarray(ends, dtype=np.intp)
+        start = np.full(len(ends), start, dtype=np.intp)
+        body = np.full(len(ends), body, dtype=np.intp)
+        self.start = np.concatenate((self.start, start))
+        self.end = np.concatenate((self.end, ends))
+        self.body = np.concatenate((self.body, body))
+        generations = np.stack((store.generation[start], store.generation[ends], store.generation[body]), axis=1)
+        self.generations = np.concatenate((self.generations, generations))
+        if len(ends):
+            self.owners[int(body[0])] = self.owners.get(int(body[0]), 0) + len(ends)
+
+    #whether any tether pulls on a body
+    def attached(self, body):
+        return body in self.owners
+
+    #drops every tether of a body at once, used when the body is removed
+    def detach(self, body):
+        if self.owners.pop(body, None) is not None:
+            self.keep(self.body != body)
+
+    #drops the rows whose particles died since the last step
+    def prune(self, store):
+        alive = np.ones(len(self.end), dtype=bool)
+        for column, indices in enumerate((self.start, self.end, self.body)):
+            alive &= ((store.flags[indices] & ACTIVE) != 0) & (store.generation[indices] == self.generations[:, column])
+        if not alive.all():
+            bodies, rows = np.unique(self.body[~alive], return_counts=True)
+            for body, count in zip(bodies.tolist(), rows.tolist()):
+                remaining = self.owners.get(body, 0) - count
+                if remaining > 0:
+                    self.owners[body] = remaining
+                else:
+                    self.owners.pop(body, None)
+            self.keep(alive)
+
+    def keep(self, mask):
+        self.start = self.start[mask]
+        self.end = self.end[mask]
+        self.body = self.body[mask]
+        self.generations = self.generations[mask]
+
+    #spring forces on the start particles and bodies, plus the friction each row applies to its body
+    #with spin the pull acts at the end particle, so an off-centre tether also turns the body
+    def update(self, store, friction, gravity, spin=True):
+        self.prune(store)
+        if len(self.end) == 0:
+            return
+        displacement = store.position[self.end] - store.position[self.start]
+        length = np.sqrt((displacement * displacement).sum(axis=1))
+        magnitude = length - 2 * (store.radius[self.end] + store.radius[self.start])
+        force = np.zeros_like(displacement)
+        taut = length != 0
+        force[taut] = displacement[taut] * (magnitude[taut] * self.strength / length[taut])[:, None]
+
+        #friction opposite the body velocity, scaled by its mass and the gravity constant
+        drag = -friction * gravity * store.mass[self.body, None] * store.velocity[self.body]
+        np.add.at(store.force, self.start, force)
+        np.add.at(store.force, self.body, drag - force)
+
+        if spin:
+            arm = store.position[self.end] - store.position[self.body]
+            torque = arm[:, 1] * force[:, 0] - arm[:, 0] * force[:, 1]
+            angular_drag = -friction * gravity * store.inertia[self.body] * store.spin[self.body]
+            np.add.at(store.torque, self.body, torque + angular_drag)
+
+    #start and end points of every tether between the last two simulation steps
+    def segments(self, store, alpha):
+        return store.interpolate(self.start, alpha), store.interpolate(self.end, alpha)
+
+    def __len__(self):
+        return len(self.end)
@@ -0,0 +1,39 @@
+from collections import OrderedDict
+
+import pygame
+
+#loads each font once per size and keeps rendered text surfaces in a bounded lru cache
+#text that did not change since the last frame is blitted from the cache instead of being rendered again
+class TextCache:
+    def __init__(self, capacity=256, antialias=True):
+        self.capacity = capacity
+        self.antialias = antialias
+        self.fonts = {}
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def font(self, size):
+        font = self.fonts.get(size)
+        if font is None:
+            font = pygame.font.Font(None, size)
+            self.fonts[size] = font
+        return font
+
+    def render(self, text, size, color):
+        key = (text, size, tuple(color))
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = self.font(size).render(text, self.antialias, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.capacity:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def clear(self):
+        self.surfaces.clear()
@@ -1,3 +1,4 @@
+import os
 import pygame
 import sys
 import math
@@ -5,10 +6,23 @@ import random
 import json
 import numpy as np
 
+#entity container, headless harness, sprite layers and text cache shared with asteroids/main.py
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "asteroids"))
+from entities import Entities
+from harness import argument_parser, parse_options, select_drivers, seed_random, init_pygame, load_sound, GameClock, run_games
+from sprites import CircleLayer
+from text import TextCache
+
+#command line options, only read when run as a script so other tools can import the game
+ARGS = parse_options(argument_parser(1/60), sys.argv[1:] if __name__ == "__main__" else [])
+HEADLESS = select_drivers(ARGS.headless)
+seed_random(ARGS.seed)
+
 #initialize pygame
-pygame.init()
-pygame.mixer.init()
+music = init_pygame(HEADLESS)
 clock = pygame.time.Clock()
+CLOCK = GameClock()
+get_ticks = CLOCK.get_ticks
 
 #screen constants
 WIDTH = pygame.display.Info().current_w
@@ -19,6 +33,10 @@ BACKGROUND_COLOR = (0,0,0)
 #fps limiter
 FPS = 60
 
+#fixed simulation step, frames run as many steps as the elapsed time allows up to MAX_STEPS
+STEP = ARGS.delta
+MAX_STEPS = ARGS.max_steps
+
 #font colors
 FONT_COLOR = (255,0,0)
 FONT_COLOR_TOP_SCORE = FONT_COLOR
@@ -27,7 +45,7 @@ FONT_COLOR_NEW_TOP_SCORE = (0,255,0)
 #world constants
 GRAVITY = 9.8 #N/Kg
 FRICTION_COEFFICIENT = 0.4
-LAST_COLOR_CHANGE_TIME = pygame.time.get_ticks()
+LAST_COLOR_CHANGE_TIME = get_ticks()
 COLOR_CHANGE_COOLDOWN = 200
 
 #ship constants
@@ -42,7 +60,7 @@ BULLET_SPEED = 1000
 BULLET_RADIUS = 2
 BULLET_COLOR = (0,0,255)
 BULLET_COOLDOWN = 50
-LAST_BULLET_TIME = pygame.time.get_ticks()
+LAST_BULLET_TIME = get_ticks()
 BULLET_DENSITY = 100
 
 #asteroid constants
@@ -50,11 +68,11 @@ ASTEROID_SPEED = 100 #pixels per second
 ASTEROID_RADIUS = 10
 ASTEROID_COLOR = (0,255,0)
 ASTEROID_COOLDOWN = 800
-LAST_ASTEROID_TIME = pygame.time.get_ticks()
+LAST_ASTEROID_TIME = get_ticks()
 ASTEROID_DENSITY = 1
 
 #clump constants
-LAST_CLUMP_TIME = pygame.time.get_ticks()
+LAST_CLUMP_TIME = get_ticks()
 CLUMP_COOLDOWN = 1500
 CLUMP_SPEED = 50
 CLUMP_RADIUS = 20
@@ -71,7 +89,7 @@ PORTAL_SPEED = 50
 PORTAL_RADIUS = 40
 PORTAL_DENSITY = 1
 PORTAL_COLOR = (0,255,255)
-LAST_PORTAL_TIME = pygame.time.get_ticks()
+LAST_PORTAL_TIME = get_ticks()
 PORTAL_COOLDOWN = 5000
 
 #game data
@@ -81,7 +99,7 @@ SCORE = INITIAL_SCORE
 LIVES = INITIAL_LIVES
 
 #update score
-LAST_SCORE_TIME = pygame.time.get_ticks()
+LAST_SCORE_TIME = get_ticks()
 
 #data file
 DATA_FILE = "data.json"
@@ -103,18 +121,20 @@ TOP_SCORE, GOLD, TETHERS = load_data()
 
 #save data to file
 def save_data():
+    if HEADLESS:
+        return
     data = {"TOP_SCORE": TOP_SCORE, "GOLD": GOLD, "TETHERS": TETHERS}
     with open(DATA_FILE, "w") as file:
         json.dump(data, file)
 
 #audio constants
-SOUND_BULLET = pygame.mixer.Sound("asteroids/audio/bullet.wav")
-SOUND_MISSILE = pygame.mixer.Sound("asteroids/audio/missile.wav")
-SOUND_HIT = pygame.mixer.Sound("asteroids/audio/hit.wav")
-SOUND_EXPLOSION = pygame.mixer.Sound("asteroids/audio/explosion.wav")
-SOUND_GAME_OVER = pygame.mixer.Sound("asteroids/audio/gameover.wav")
-MUSIC_THEME = pygame.mixer.music.load("asteroids/audio/theme.ogg")
-MUSIC_TITLE = pygame.mixer.music.load("asteroids/audio/title.ogg")
+SOUND_BULLET = load_sound("asteroids/audio/bullet.wav", HEADLESS)
+SOUND_MISSILE = load_sound("asteroids/audio/missile.wav", HEADLESS)
+SOUND_HIT = load_sound("asteroids/audio/hit.wav", HEADLESS)
+SOUND_EXPLOSION = load_sound("asteroids/audio/explosion.wav", HEADLESS)
+SOUND_GAME_OVER = load_sound("asteroids/audio/gameover.wav", HEADLESS)
+MUSIC_THEME = music.load("asteroids/audio/theme.ogg")
+MUSIC_TITLE = music.load("asteroids/audio/title.ogg")
 
 #audio mixing
 SOUND_BULLET.set_volume(0.3)
@@ -123,8 +143,17 @@ SOUND_EXPLOSION.set_volume(0.5)
 
 #setup the screen
 SCREEN = pygame.display.set_mode((WIDTH, HEIGHT))
+#fonts and rendered text, shared by every state
+TEXT = TextCache()
+
 pygame.display.set_caption("ASTEROIDS")
 
+#pre-rendered circle sprites, every particle layer is drawn with one blits call
+SPRITES = {name: CircleLayer() for name in ("portals", "asteroids", "ships", "bullets", "clumps")}
+
+def draw_layer(screen, name, particles, color, alpha):
+    SPRITES[name].draw(screen, [particle.interpolated(alpha) for particle in particles], [particle.radius for particle in particles], color)
+
 #class for particles
 class Particle:
     def __init__(self, position, velocity, acceleration, radius, density, color):
@@ -137,6 +166,7 @@ class Particle:
         self.color = color
         self.mass = math.pi*self.radius*self.radius*density
         self.active = True
+        self.previous = tuple(position)
 
     def apply_friction(self, coefficient):
         velocity_magnitude = np.linalg.norm(self.velocity)
@@ -164,6 +194,9 @@ class Particle:
             return False
 
     def update(self, DELTA):
+        #keep the position from before this step for render interpolation
+        self.previous = (self.position[0], self.position[1])
+
         if self.is_invisible():
             self.active = False
 
@@ -180,8 +213,9 @@ class Particle:
             #remove applied force
             self.force = [0, 0]
         
-    def render(self):
-        pygame.draw.circle(SCREEN, self.color, (self.position[0], self.position[1]), self.radius)
+    #position between the last two simulation steps
+    def interpolated(self, alpha):
+        return (self.previous[0] + (self.position[0] - self.previous[0]) * alpha, self.previous[1] + (self.position[1] - self.previous[1]) * alpha)
 
 
 #class for tethers
@@ -212,8 +246,8 @@ class Tether:
                 self.start_particle.apply_force(force[0], force[1])
                 self.end_clump.box.apply_force(-force[0], -force[1])
 
-    def render(self):
-        pygame.draw.aaline(SCREEN, self.color, self.start_particle.position, self.end_particle.position)
+    def render(self, alpha=1):
+        pygame.draw.aaline(SCREEN, self.color, self.start_particle.interpolated(alpha), self.end_particle.interpolated(alpha))
 
 #class for clumps
 class Clump:
@@ -224,7 +258,7 @@ class Clump:
         self.radius = radius
         self.density = density
         self.color = color
-        self.init_clump = []
+        self.init_clump = Entities()
         self.count = count
         self.clump = self.recursive_clump(self.init_clump, self.count)
         self.mass = len(self.clump) * self.density * math.pi * self.radius * self.radius
@@ -257,10 +291,6 @@ class Clump:
 
         if len(self.clump) == 0:
             self.active = False
-        
-    def render(self):
-        for particle in self.clump:
-            particle.render()
 
 #state manager interface
 class State:
@@ -273,7 +303,7 @@ class State:
     def update(self):
         pass
 
-    def render(self, screen):
+    def render(self, screen, alpha=1):
         self.screen = screen
 
 #title state
@@ -282,8 +312,8 @@ class TitleState(State):
 
     def __init__(self):
         super().__init__()
-        pygame.mixer.music.load("asteroids/audio/title.ogg")
-        pygame.mixer.music.play(-1)
+        music.load("asteroids/audio/title.ogg")
+        music.play(-1)
 
     def handle_events(self):
         if pygame.key.get_pressed()[pygame.K_SPACE]:
@@ -294,23 +324,20 @@ class TitleState(State):
     def update(self, DELTA):
         pass
 
-    def render(self, screen):
+    def render(self, screen, alpha=1):
         #clear screen
         screen.fill(BACKGROUND_COLOR)
 
         #display title
-        font = pygame.font.Font(None, 72)
-        text = font.render("ASTEROIDS", True, FONT_COLOR)
+        text = TEXT.render("ASTEROIDS", 72, FONT_COLOR)
         screen.blit(text, ((WIDTH // 2) - (text.get_width() // 2), (HEIGHT // 2) - (text.get_height() // 2)))
 
         #display press spacebar
-        font = pygame.font.Font(None, 18)
-        text_prompt = font.render("press space to play, m for menu", True, FONT_COLOR)
+        text_prompt = TEXT.render("press space to play, m for menu", 18, FONT_COLOR)
         screen.blit(text_prompt, ((WIDTH // 2) - (text_prompt.get_width() // 2), (HEIGHT // 2) - (text_prompt.get_height() // 2) + (text.get_height() // 2) + 10))
 
         #display top score
-        font = pygame.font.Font(None, 36)
-        text_top_score = font.render(f'TOP SCORE: {TOP_SCORE}', True, FONT_COLOR_TOP_SCORE)
+        text_top_score = TEXT.render(f'TOP SCORE: {TOP_SCORE}', 36, FONT_COLOR_TOP_SCORE)
         screen.blit(text_top_score, ((WIDTH // 2) - (text_top_score.get_width() // 2), 10))
 
 #menu state
@@ -319,8 +346,8 @@ class MenuState(State):
 
     def __init__(self):
         super().__init__()
-        pygame.mixer.music.load("asteroids/audio/title.ogg")
-        pygame.mixer.music.play(-1)
+        music.load("asteroids/audio/title.ogg")
+        music.play(-1)
         self.key_1_pressed = False
 
     def handle_events(self):
@@ -338,38 +365,32 @@ class MenuState(State):
         elif not pressed_1:
             self.key_1_pressed = False
 
-    def render(self, screen):
+    def render(self, screen, alpha=1):
         #clear screen
         screen.fill(BACKGROUND_COLOR)
 
         #display title
-        font = pygame.font.Font(None, 72)
-        text = font.render("MENU", True, FONT_COLOR)
+        text = TEXT.render("MENU", 72, FONT_COLOR)
         screen.blit(text, ((WIDTH // 2) - (text.get_width() // 2), (HEIGHT // 2) - (text.get_height() // 2)))
 
         #display press spacebar
-        font = pygame.font.Font(None, 18)
-        text_prompt = font.render("press escape for titlescreen", True, FONT_COLOR)
+        text_prompt = TEXT.render("press escape for titlescreen", 18, FONT_COLOR)
         screen.blit(text_prompt, ((WIDTH // 2) - (text_prompt.get_width() // 2), (HEIGHT // 2) - (text_prompt.get_height() // 2) + (text.get_height() // 2) + 10))
 
         #display top score
-        font = pygame.font.Font(None, 36)
-        text_top_score = font.render(f'TOP SCORE: {TOP_SCORE}', True, FONT_COLOR_TOP_SCORE)
+        text_top_score = TEXT.render(f'TOP SCORE: {TOP_SCORE}', 36, FONT_COLOR_TOP_SCORE)
         screen.blit(text_top_score, ((WIDTH // 2) - (text_top_score.get_width() // 2), 10))
 
         #display score
-        font = pygame.font.Font(None, 36)
-        text_score = font.render(f'SCORE: {SCORE}', True, FONT_COLOR)
+        text_score = TEXT.render(f'SCORE: {SCORE}', 36, FONT_COLOR)
         #screen.blit(text_score, (10,10))
 
         #display gold
-        font = pygame.font.Font(None, 36)
-        text_gold = font.render(f'GOLD: {GOLD}', True, FONT_COLOR)
+        text_gold = TEXT.render(f'GOLD: {GOLD}', 36, FONT_COLOR)
         screen.blit(text_gold, (10,10 + text_score.get_height() + 10))
 
         #display tethers
-        font = pygame.font.Font(None, 36)
-        text_tethers = font.render(f'Tethers: {TETHERS} (${TETHER_COST} each, to buy more press 1)', True, FONT_COLOR)
+        text_tethers = TEXT.render(f'Tethers: {TETHERS} (${TETHER_COST} each, to buy more press 1)', 36, FONT_COLOR)
         screen.blit(text_tethers, (10,10 + text_score.get_height() + 10 + text_gold.get_height() + 10))
 
 #game state
@@ -380,15 +401,16 @@ class GameState(State):
         FONT_COLOR_TOP_SCORE = FONT_COLOR
         SCORE = INITIAL_SCORE
         LIVES = INITIAL_LIVES
-        pygame.mixer.music.load("asteroids/audio/theme.ogg")
-        pygame.mixer.music.play(-1)
-        pygame.time.delay(500)
-        self.asteroids = []
-        self.ships = [Particle((WIDTH / 2, 2 * HEIGHT / 3), (0, 0), (0, 0), SHIP_RADIUS, SHIP_DENSITY, SHIP_COLOR)]
-        self.bullets = []
-        self.clumps = []
-        self.tethers = []
-        self.portals = []
+        music.load("asteroids/audio/theme.ogg")
+        music.play(-1)
+        if not HEADLESS:
+            pygame.time.delay(500)
+        self.asteroids = Entities()
+        self.ships = Entities([Particle((WIDTH / 2, 2 * HEIGHT / 3), (0, 0), (0, 0), SHIP_RADIUS, SHIP_DENSITY, SHIP_COLOR)])
+        self.bullets = Entities()
+        self.clumps = Entities()
+        self.tethers = Entities()
+        self.portals = Entities()
         
 
     def handle_events(self):
@@ -459,7 +481,7 @@ class GameState(State):
         global LAST_BULLET_TIME, LAST_ASTEROID_TIME, LIVES, SCORE, TOP_SCORE, FONT_COLOR, FONT_COLOR_TOP_SCORE, FORCE, MAX_SHIP_SPEED, ASTEROID_COLOR, LAST_CLUMP_TIME, CLUMP_COLOR, GOLD, LAST_SCORE_TIME, FONT_COLOR_NEW_TOP_SCORE, TETHERS, LAST_PORTAL_TIME, LAST_COLOR_CHANGE_TIME, PORTAL_COLOR
 
         #update the score
-        current_time = pygame.time.get_ticks()
+        current_time = get_ticks()
         if current_time - LAST_SCORE_TIME >= 1000:
             SCORE += 1
             if SCORE > TOP_SCORE:
@@ -468,21 +490,21 @@ class GameState(State):
             LAST_SCORE_TIME = current_time
 
         #remove inactive objects
-        self.asteroids = [asteroid for asteroid in self.asteroids if asteroid.active]
-        self.ships = [ship for ship in self.ships if ship.active]
-        self.bullets = [bullet for bullet in self.bullets if bullet.active]
-        self.clumps = [clump for clump in self.clumps if clump.active]
-        self.tethers = [tether for tether in self.tethers if tether.active]
-        self.portals = [portal for portal in self.portals if portal.active]
+        self.asteroids.prune()
+        self.ships.prune()
+        self.bullets.prune()
+        self.clumps.prune()
+        self.tethers.prune()
+        self.portals.prune()
 
         #update colors
-        if pygame.time.get_ticks() - LAST_COLOR_CHANGE_TIME > COLOR_CHANGE_COOLDOWN:
+        if get_ticks() - LAST_COLOR_CHANGE_TIME > COLOR_CHANGE_COOLDOWN:
             PORTAL_COLOR = (random.uniform(0,255), random.uniform(10,255), random.uniform(0,255))
-            LAST_COLOR_CHANGE_TIME = pygame.time.get_ticks()
+            LAST_COLOR_CHANGE_TIME = get_ticks()
 
 
         #create portals
-        if pygame.time.get_ticks() - LAST_PORTAL_TIME > PORTAL_COOLDOWN:
+        if get_ticks() - LAST_PORTAL_TIME > PORTAL_COOLDOWN:
             #random initial particle state
             position = np.array([random.uniform(0, WIDTH), 0])
             angle = random.uniform(math.pi/4, 3*math.pi/4)
@@ -496,7 +518,7 @@ class GameState(State):
 
             new_portal = Particle(position, velocity, acceleration, radius, density, color)
             self.portals.append(new_portal)
-            LAST_PORTAL_TIME = pygame.time.get_ticks()
+            LAST_PORTAL_TIME = get_ticks()
 
         #update portals
         for portal in self.portals:
@@ -513,9 +535,9 @@ class GameState(State):
                         GOLD += 10
         
         #create asteroids
-        if pygame.time.get_ticks() - LAST_ASTEROID_TIME > ASTEROID_COOLDOWN:
+        if get_ticks() - LAST_ASTEROID_TIME > ASTEROID_COOLDOWN:
             self.create_asteroid()
-            LAST_ASTEROID_TIME = pygame.time.get_ticks()
+            LAST_ASTEROID_TIME = get_ticks()
         
         #update asteroids
         for asteroid in self.asteroids:
@@ -566,9 +588,9 @@ class GameState(State):
                             self.next_state = TitleState()
                 
         #update bullets
-        if (pygame.mouse.get_pressed()[0] or pygame.key.get_pressed()[pygame.K_SPACE]) and pygame.time.get_ticks() - LAST_BULLET_TIME > BULLET_COOLDOWN:
+        if (pygame.mouse.get_pressed()[0] or pygame.key.get_pressed()[pygame.K_SPACE]) and get_ticks() - LAST_BULLET_TIME > BULLET_COOLDOWN:
             self.create_bullet()
-            LAST_BULLET_TIME = pygame.time.get_ticks()
+            LAST_BULLET_TIME = get_ticks()
             SOUND_BULLET.play()
         for bullet in self.bullets:
             bullet.update(DELTA)
@@ -602,8 +624,8 @@ class GameState(State):
                         SOUND_HIT.play()
                         
         #create clumps
-        if pygame.time.get_ticks() - LAST_CLUMP_TIME > CLUMP_COOLDOWN:
-            LAST_CLUMP_TIME = pygame.time.get_ticks()
+        if get_ticks() - LAST_CLUMP_TIME > CLUMP_COOLDOWN:
+            LAST_CLUMP_TIME = get_ticks()
 
             position = np.array([random.uniform(0, WIDTH), 0])
             angle = random.uniform(math.pi/4, 3*math.pi/4)
@@ -665,66 +687,54 @@ class GameState(State):
         '''                  
 
     #renders all necessary gameplay items on screen
-    def render(self, screen):
+    def render(self, screen, alpha=1):
         #clear screen
         screen.fill(BACKGROUND_COLOR)
 
-        for portal in self.portals:
-            pygame.draw.circle(SCREEN, PORTAL_COLOR, (portal.position[0], portal.position[1]), portal.radius)
+        draw_layer(screen, "portals", self.portals, PORTAL_COLOR, alpha)
 
-        for asteroid in self.asteroids:
-            asteroid.render()
+        draw_layer(screen, "asteroids", self.asteroids, ASTEROID_COLOR, alpha)
 
         for tether in self.tethers:
-            tether.render()
+            tether.render(alpha)
 
-        for ship in self.ships:
-            ship.render()
+        draw_layer(screen, "ships", self.ships, SHIP_COLOR, alpha)
 
-        for bullet in self.bullets:
-            bullet.render() 
+        draw_layer(screen, "bullets", self.bullets, BULLET_COLOR, alpha)
 
-        for clump in self.clumps:
-            clump.render()
+        draw_layer(screen, "clumps", [particle for clump in self.clumps for particle in clump.clump], CLUMP_COLOR, alpha)
         
 
         #display score
-        font = pygame.font.Font(None, 36)
-        text_score = font.render(f'SCORE: {SCORE}', True, FONT_COLOR)
+        text_score = TEXT.render(f'SCORE: {SCORE}', 36, FONT_COLOR)
         screen.blit(text_score, (10,10))
 
         '''
         #display missile availability
-        if pygame.time.get_ticks() - LAST_MISSILE_TIME > MISSILE_COOLDOWN:
-            font = pygame.font.Font(None, 36)
-            text_missiles = font.render('MISSILES READY', True, FONT_COLOR)
+        if get_ticks() - LAST_MISSILE_TIME > MISSILE_COOLDOWN:
+            text_missiles = TEXT.render('MISSILES READY', 36, FONT_COLOR)
             screen.blit(text_missiles, (10,10 + text_score.get_height() + 10))
         '''
 
         #display gold
-        font = pygame.font.Font(None, 36)
-        text_gold = font.render(f'GOLD: {GOLD}', True, FONT_COLOR)
+        text_gold = TEXT.render(f'GOLD: {GOLD}', 36, FONT_COLOR)
         screen.blit(text_gold, (10,10 + text_score.get_height() + 10))
 
         #display tethers
-        font = pygame.font.Font(None, 36)
-        text_tethers = font.render(f'Tethers: {TETHERS}', True, FONT_COLOR)
+        text_tethers = TEXT.render(f'Tethers: {TETHERS}', 36, FONT_COLOR)
         screen.blit(text_tethers, (10,10 + text_score.get_height() + 10 + text_gold.get_height() + 10))
 
         #display lives
-        font = pygame.font.Font(None, 36)
-        text_lives = font.render(f'LIVES: {LIVES}', True, FONT_COLOR)
+        text_lives = TEXT.render(f'LIVES: {LIVES}', 36, FONT_COLOR)
         screen.blit(text_lives, (WIDTH - text_lives.get_width() - 10,10))
 
         #display top score
-        font = pygame.font.Font(None, 36)
-        text_top_score = font.render(f'TOP SCORE: {TOP_SCORE}', True, FONT_COLOR_TOP_SCORE)
+        text_top_score = TEXT.render(f'TOP SCORE: {TOP_SCORE}', 36, FONT_COLOR_TOP_SCORE)
         screen.blit(text_top_score, ((WIDTH // 2) - (text_top_score.get_width() // 2), 10))
 
         #display fps
-        font = pygame.font.Font(None, 36)
         fps = clock.get_fps()
-        text_fps = font.render(f'FPS: {fps:.0f}', True, FONT_COLOR)
+        text_fps = TEXT.render(f'FPS: {fps:.0f}', 36, FONT_COLOR)
         screen.blit(text_fps, ((WIDTH // 2) - (text_fps.get_width() // 2), 10 + text_top_score.get_height() + 10))
 
 #start game on title screen
@@ -734,32 +744,54 @@ CURRENT_STATE = TitleState()
 QUIT_GAME = False
 
 #main loop
-while not QUIT_GAME:
+def main():
+    global CURRENT_STATE, QUIT_GAME
+    accumulator = 0
+    while not QUIT_GAME:
 
-    #limit to the fps constant
-    DELTA = clock.tick(FPS) / 1000
+        #limit to the fps constant, the time since the last frame is simulated below in fixed steps
+        accumulator += clock.tick(FPS) / 1000
 
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            save_data()
-            QUIT_GAME = True
-      
-
-    #handle events and state transitions
-    CURRENT_STATE.handle_events()
-    if CURRENT_STATE.next_state:
-        save_data()
-        CURRENT_STATE = CURRENT_STATE.next_state
-    
-    #update and render the current state
-    CURRENT_STATE.update(DELTA)
-    CURRENT_STATE.render(SCREEN)
-
-    #update display
-    pygame.display.update()
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                save_data()
+                QUIT_GAME = True
 
 
-
-#quit pygame
-pygame.quit()
-sys.exit()
\ No newline at end of file
+        #handle events and state transitions
+        CURRENT_STATE.handle_events()
+        if CURRENT_STATE.next_state:
+            save_data()
+            CURRENT_STATE = CURRENT_STATE.next_state
+
+        #update the current state in fixed steps, a slow frame runs at most MAX_STEPS and drops the rest of its backlog
+        steps = 0
+        while accumulator >= STEP and steps < MAX_STEPS and not CURRENT_STATE.next_state:
+            CURRENT_STATE.update(STEP)
+            CLOCK.advance(STEP)
+            accumulator -= STEP
+            steps += 1
+        if steps == MAX_STEPS:
+            accumulator = min(accumulator, STEP)
+
+        #render the current state between its last two steps
+        CURRENT_STATE.render(SCREEN, min(accumulator / STEP, 1))
+
+        #update display
+        pygame.display.update()
+
+    #quit pygame
+    pygame.quit()
+    sys.exit()
+
+#steps the game with a fixed DELTA as fast as the cpu allows and prints a summary
+def run_headless(args):
+    state, games = run_games(args, CLOCK, GameState, lambda state: state.update(args.delta), lambda state: state.render(SCREEN))
+    print(f"games: {games}  score: {SCORE}  top score: {TOP_SCORE}")
+    print(f"asteroids: {len(state.asteroids)}  bullets: {len(state.bullets)}")
+
+if __name__ == "__main__":
+    if HEADLESS:
+        run_headless(ARGS)
+    else:
+        main()
@@ -0,0 +1,241 @@
+import argparse
+import importlib.util
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+#engines, each is benchmarked in its own process so their module globals never mix
+#the reference engines are optimized as well, they share the harness, entity container, sprite layers and text cache
+#of asteroids/, only their per-object particle simulation is kept, so comparisons against main measure the store,
+#the vectorized physics and what main alone adds on top
+ROOT = os.path.dirname(os.path.abspath(__file__))
+ENGINES = {
+    "main": os.path.join(ROOT, "asteroids", "main.py"),
+    "delta": os.path.join(ROOT, "asteroidsdelta.py"),
+    "classic": os.path.join(ROOT, "asteroids.py"),
+}
+
+#scripted scenarios, entity counts are topped up before every frame so they stay constant
+SCENARIOS = {
+    "asteroids_50": {"asteroids": 50},
+    "asteroids_200": {"asteroids": 200},
+    "asteroids_1000": {"asteroids": 1000},
+    "clumps_10": {"asteroids": 50, "clumps": 10},
+    "clumps_50": {"asteroids": 50, "clumps": 50},
+    "tethered_20": {"asteroids": 50, "clumps": 20, "tethered": 20},
+    "bullets": {"asteroids": 200, "bullets": True},
+    "bullets_clumps": {"asteroids": 50, "clumps": 10, "bullets": True},
+    "large_clump": {"asteroids": 50, "clumps": 1, "members": 2000, "layout": "disk", "bullets": True},
+    "large_tethered": {"asteroids": 50, "clumps": 1, "members": 2000, "layout": "poisson", "tethered": 1},
+}
+
+#timing statistics in milliseconds
+def summarize(samples):
+    samples = np.asarray(samples) * 1000
+    if len(samples) == 0:
+        return {"mean": 0.0, "p50": 0.0, "p99": 0.0, "max": 0.0}
+    return {
+        "mean": float(samples.mean()),
+        "p50": float(np.percentile(samples, 50)),
+        "p99": float(np.percentile(samples, 99)),
+        "max": float(samples.max()),
+    }
+
+#imports an engine headless without running its main loop
+def load_engine(path):
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    os.environ["SDL_AUDIODRIVER"] = "dummy"
+    os.environ["PYGAME_HIDE_SUPPORT_PROMPT"] = "1"
+    directory = os.path.dirname(path)
+    os.chdir(directory)
+    sys.path.insert(0, directory)
+    spec = importlib.util.spec_from_file_location("engine", path)
+    engine = importlib.util.module_from_spec(spec)
+    sys.modules["engine"] = engine
+    spec.loader.exec_module(engine)
+    return engine
+
+#moves a freshly spawned entity to a random point on screen
+def scatter(engine, entity, rng):
+    x = rng.uniform(0, engine.WIDTH)
+    y = rng.uniform(0, engine.HEIGHT)
+    if hasattr(entity, "x"):
+        entity.x, entity.y = x, y
+    else:
+        entity.position = (x, y)
+
+#large clump scenarios set the particle count and layout, engines without layouts get CLUMP_COUNT
+def create_clump(engine, state, rng, scenario):
+    margin = 4 * engine.CLUMP_RADIUS
+    position = np.array([rng.uniform(margin, engine.WIDTH - margin), rng.uniform(margin, engine.HEIGHT - margin)])
+    angle = rng.uniform(0, 2 * math.pi)
+    speed = engine.clump_speed() if hasattr(engine, "clump_speed") else engine.CLUMP_SPEED
+    velocity = np.array([speed * math.cos(angle), speed * math.sin(angle)])
+    if hasattr(engine, "LAYOUTS"):
+        count = scenario.get("members", engine.CLUMP_COUNT)
+        clump = engine.Clump(state.store, position, velocity, engine.CLUMP_RADIUS, engine.CLUMP_DENSITY, engine.CLUMP_COLOR, count, scenario.get("layout"))
+    elif hasattr(state, "store"):
+        clump = engine.Clump(state.store, position, velocity, engine.CLUMP_RADIUS, engine.CLUMP_DENSITY, engine.CLUMP_COLOR, engine.CLUMP_COUNT)
+    else:
+        clump = engine.Clump(position, velocity, (0, 0), engine.CLUMP_RADIUS, engine.CLUMP_DENSITY, engine.CLUMP_COLOR, engine.CLUMP_COUNT)
+    state.clumps.append(clump)
+    return clump
+
+#engines with a batched tether set answer this themselves, the others keep one Tether object per particle
+def is_tethered(state, clump):
+    if hasattr(state, "tethered"):
+        return state.tethered(clump)
+    return any(tether.end_clump is clump and tether.active for tether in state.tethers)
+
+#keeps the scenario's entity counts constant, runs outside the timed region
+def populate(engine, state, scenario, rng):
+    while len(state.asteroids) < scenario.get("asteroids", 0):
+        state.create_asteroid()
+        scatter(engine, state.asteroids[-1], rng)
+    if not hasattr(engine, "Clump"):
+        return
+    live = [clump for clump in state.clumps if clump.active]
+    while len(live) < scenario.get("clumps", 0):
+        live.append(create_clump(engine, state, rng, scenario))
+    tethered = {id(clump) for clump in live if is_tethered(state, clump)}
+    for clump in live:
+        if len(tethered) >= scenario.get("tethered", 0) or not state.ships:
+            break
+        if id(clump) not in tethered:
+            if hasattr(state, "tether"):
+                state.tether(clump)
+            else:
+                for circle in clump.clump:
+                    state.tethers.append(engine.Tether(state.ships[0], clump, circle))
+            tethered.add(id(clump))
+
+#runs one scenario on one engine and returns its timings
+#slow engines stop early once the time limit is spent, the result records how many frames were timed
+def run_scenario(engine_name, scenario_name, frames, warmup, seed, delta, time_limit):
+    engine = load_engine(ENGINES[engine_name])
+    scenario = SCENARIOS[scenario_name]
+    if (scenario.get("clumps") or scenario.get("tethered")) and not hasattr(engine, "Clump"):
+        return {"skipped": "engine has no clumps"}
+    random.seed(seed)
+    np.random.seed(seed)
+    rng = random.Random(seed)
+    update = []
+    render = []
+    state = engine.GameState()
+    last_bullet = 0
+    started = time.perf_counter()
+    for frame in range(warmup + frames):
+        if time.perf_counter() - started > time_limit and update:
+            break
+        engine.pygame.event.pump()
+        engine.LIVES = 10**9
+        if state.next_state or not state.ships:
+            state = engine.GameState()
+        populate(engine, state, scenario, rng)
+        if scenario.get("bullets") and engine.get_ticks() - last_bullet >= engine.BULLET_COOLDOWN:
+            state.create_bullet()
+            last_bullet = engine.get_ticks()
+
+        start = time.perf_counter()
+        if engine_name == "classic":
+            state.update()
+        else:
+            state.update(delta)
+        middle = time.perf_counter()
+        state.render(engine.SCREEN)
+        end = time.perf_counter()
+        engine.CLOCK.advance(delta)
+
+        if frame >= warmup:
+            update.append(middle - start)
+            render.append(end - middle)
+    return {"update": summarize(update), "render": summarize(render), "frames": len(update)}
+
+#runs every requested scenario in a fresh worker process
+def run_all(engines, scenarios, frames, warmup, seed, delta, time_limit):
+    results = {}
+    for engine_name in engines:
+        results[engine_name] = {}
+        for scenario_name in scenarios:
+            command = [sys.executable, os.path.abspath(__file__), "--worker", engine_name, scenario_name,
+                       "--frames", str(frames), "--warmup", str(warmup), "--seed", str(seed), "--delta", str(delta), "--time-limit", str(time_limit)]
+            output = subprocess.run(command, capture_output=True, text=True)
+            if output.returncode != 0:
+                results[engine_name][scenario_name] = {"error": output.stderr.strip().splitlines()[-1:]}
+            else:
+                results[engine_name][scenario_name] = json.loads(output.stdout.strip().splitlines()[-1])
+            print(f"{engine_name:8} {scenario_name:16} {describe(results[engine_name][scenario_name])}", file=sys.stderr)
+    return results
+
+def describe(result):
+    if "update" not in result:
+        return result.get("skipped") or f"error: {result.get('error')}"
+    update = result["update"]
+    render = result["render"]
+    return (f"frames {result['frames']:4}  update mean {update['mean']:7.3f}  p50 {update['p50']:7.3f}  p99 {update['p99']:7.3f}  max {update['max']:7.3f} ms | "
+            f"render mean {render['mean']:7.3f}  p50 {render['p50']:7.3f}  p99 {render['p99']:7.3f}  max {render['max']:7.3f} ms")
+
+#compares results against a stored baseline, returns the regressions beyond the threshold
+def compare(results, baseline, threshold):
+    regressions = []
+    for engine_name, scenarios in results.items():
+        for scenario_name, result in scenarios.items():
+            previous = baseline.get("results", {}).get(engine_name, {}).get(scenario_name, {})
+            for phase in ("update", "render"):
+                if phase not in result or phase not in previous:
+                    continue
+                for stat in ("mean", "p50", "p99"):
+                    before = previous[phase][stat]
+                    after = result[phase][stat]
+                    if before > 0 and after > before * (1 + threshold):
+                        regressions.append(f"{engine_name} {scenario_name} {phase} {stat}: {before:.3f} -> {after:.3f} ms (+{100 * (after / before - 1):.0f}%)")
+    return regressions
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="ASTEROIDS scenario benchmarks")
+    parser.add_argument("--engines", nargs="+", default=list(ENGINES), choices=list(ENGINES))
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument("--frames", type=int, default=600, help="timed frames per scenario")
+    parser.add_argument("--warmup", type=int, default=60, help="untimed frames before timing starts")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--delta", type=float, default=1/60)
+    parser.add_argument("--time-limit", type=float, default=60, help="wall seconds per scenario before timing stops early")
+    parser.add_argument("--output", help="write the results to this json file")
+    parser.add_argument("--baseline", help="compare against results stored in this json file")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown against the baseline, 0.10 is 10%%")
+    parser.add_argument("--worker", nargs=2, metavar=("ENGINE", "SCENARIO"), help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+def main(argv):
+    args = parse_args(argv)
+    if args.worker:
+        result = run_scenario(args.worker[0], args.worker[1], args.frames, args.warmup, args.seed, args.delta, args.time_limit)
+        print(json.dumps(result))
+        return 0
+
+    results = run_all(args.engines, args.scenarios, args.frames, args.warmup, args.seed, args.delta, args.time_limit)
+    report = {
+        "meta": {"frames": args.frames, "warmup": args.warmup, "seed": args.seed, "delta": args.delta, "time_limit": args.time_limit, "python": sys.version.split()[0], "time": time.strftime("%Y-%m-%dT%H:%M:%S")},
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file), args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
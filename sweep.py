@@ -0,0 +1,227 @@
+import argparse
+import csv
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+#one BLAS thread per worker, the workers already use every core
+os.environ.setdefault("OMP_NUM_THREADS", "1")
+os.environ.setdefault("OPENBLAS_NUM_THREADS", "1")
+
+import numpy as np
+
+from benchmark import ENGINES, load_engine, summarize
+
+#save data every swept game starts with, the defaults of a new player
+START_GOLD = 100
+START_TETHERS = 1
+
+#distance at which the bot starts fleeing the closest asteroid
+BOT_FLEE_DISTANCE = 200
+
+#scripted player: flees the closest asteroid while shooting at it, drifts back to the centre otherwise
+#and tethers the nearest clump whenever it has a tether left
+def bot_input(engine, state):
+    pygame = engine.pygame
+    bits = engine.INPUT.bits
+    keys = 0
+    mouse = (0, 0)
+    buttons = 0
+    if not state.ships:
+        engine.INPUT.set(keys, mouse, buttons)
+        return
+    x, y = state.ships[0].position.tolist()
+    goal_x, goal_y = engine.WIDTH / 2, 2 * engine.HEIGHT / 3
+    asteroids = state.indices(state.asteroids)
+    if len(asteroids):
+        delta = state.store.position[asteroids] - (x, y)
+        distance = (delta * delta).sum(axis=1)
+        closest = int(np.argmin(distance))
+        target_x, target_y = state.store.position[asteroids[closest]].tolist()
+        mouse = (int(target_x), int(target_y))
+        buttons |= 1
+        if distance[closest] < BOT_FLEE_DISTANCE * BOT_FLEE_DISTANCE:
+            goal_x, goal_y = 2 * x - target_x, 2 * y - target_y
+    if goal_x < x - 20:
+        keys |= bits[pygame.K_LEFT]
+    elif goal_x > x + 20:
+        keys |= bits[pygame.K_RIGHT]
+    if goal_y < y - 20:
+        keys |= bits[pygame.K_UP]
+    elif goal_y > y + 20:
+        keys |= bits[pygame.K_DOWN]
+    if engine.TETHERS > 0 and state.clumps:
+        keys |= bits[pygame.K_RETURN]
+    engine.INPUT.set(keys, mouse, buttons)
+
+#plays one seeded headless game until game over or the time limit, in a fresh worker process
+#params are module globals of the engine set before the game starts, input is a recording to play instead of the bot
+def play_game(task):
+    params, seed, seconds, delta, input_path = task
+    engine = load_engine(ENGINES["main"])
+    for name, value in params.items():
+        if not hasattr(engine, name):
+            return dict(params, seed=seed, error=f"unknown parameter {name}")
+        setattr(engine, name, value)
+    random.seed(seed)
+    np.random.seed(seed)
+    engine.TOP_SCORE, engine.GOLD, engine.TETHERS = 0, START_GOLD, START_TETHERS
+    recording = engine.Replay(input_path) if input_path else None
+
+    #a recording starts on the title screen, its frames are followed through the menus up to the frame that
+    #started the recorded game, so every later frame's input lines up with the game it was recorded in
+    frame = 0
+    if recording is None:
+        engine.CURRENT_STATE = engine.GameState()
+    else:
+        engine.CURRENT_STATE = engine.FirstState()
+        while frame < len(recording) and not isinstance(engine.CURRENT_STATE, engine.GameState):
+            engine.pygame.event.pump()
+            engine.INPUT.set(recording.keys[frame], recording.mouse[frame], recording.buttons[frame])
+            engine.step_frame(recording.steps[frame], recording.delta[frame])
+            frame += 1
+        if not isinstance(engine.CURRENT_STATE, engine.GameState):
+            return dict(params, seed=seed, error=f"{input_path} never starts a game")
+    state = engine.CURRENT_STATE
+    start = engine.get_ticks()
+
+    #simulated milliseconds to play, half a step short so float drift in the clock never adds a step
+    limit = start + seconds * 1000 - delta * 500
+    cost = []
+    counts = {}
+    while engine.get_ticks() < limit:
+        engine.pygame.event.pump()
+        steps, step = 1, delta
+        if recording is None:
+            bot_input(engine, state)
+        elif frame < len(recording):
+            engine.INPUT.set(recording.keys[frame], recording.mouse[frame], recording.buttons[frame])
+            steps, step = recording.steps[frame], recording.delta[frame]
+        else:
+            engine.INPUT.set(0, (0, 0), 0)
+        frame += 1
+
+        frame_start = time.perf_counter()
+        engine.step_frame(steps, step)
+        cost.append(time.perf_counter() - frame_start)
+        engine.AUDIO.flush(engine.get_ticks())
+
+        for name, count in state.counts().items():
+            counts.setdefault(name, []).append(count)
+        if engine.CURRENT_STATE is not state or state.next_state:
+            break
+
+    update = summarize(cost)
+    result = dict(params, seed=seed)
+    result.update({
+        "survival_s": round((engine.get_ticks() - start) / 1000, 3),
+        "game_over": bool(state.next_state) or engine.CURRENT_STATE is not state,
+        "score": engine.SCORE,
+        "gold": engine.GOLD - START_GOLD,
+        "frames": len(cost),
+        "update_mean_ms": round(update["mean"], 4),
+        "update_p99_ms": round(update["p99"], 4),
+    })
+    for name in ("asteroids", "bullets", "clump_particles", "tethers"):
+        values = counts.get(name, [0])
+        result[f"{name}_mean"] = round(float(np.mean(values)), 2)
+        result[f"{name}_max"] = int(np.max(values))
+    return result
+
+#NAME=v1,v2,... into (name, [values]), numbers are kept as ints when they have no fraction
+def parse_param(text):
+    name, _, values = text.partition("=")
+    if not name or not values:
+        raise argparse.ArgumentTypeError(f"expected NAME=v1,v2,... got {text!r}")
+    parsed = []
+    for value in values.split(","):
+        number = float(value)
+        parsed.append(int(number) if number.is_integer() and "." not in value else number)
+    return name, parsed
+
+#every combination of the swept values
+def grid(params):
+    names = [name for name, values in params]
+    return [dict(zip(names, combination)) for combination in itertools.product(*(values for name, values in params))]
+
+#mean of every metric per parameter combination, in grid order
+def aggregate(results, names):
+    groups = {}
+    for result in results:
+        if "error" in result:
+            continue
+        groups.setdefault(tuple(result[name] for name in names), []).append(result)
+    table = []
+    for key, games in groups.items():
+        row = dict(zip(names, key), games=len(games))
+        for metric in ("survival_s", "score", "gold", "asteroids_mean", "tethers_mean", "update_mean_ms", "update_p99_ms"):
+            row[metric] = round(float(np.mean([game[metric] for game in games])), 3)
+        table.append(row)
+    table.sort(key=lambda row: tuple(row[name] for name in names))
+    return table
+
+def print_table(table):
+    if not table:
+        return
+    columns = list(table[0])
+    widths = {column: max(len(column), *(len(str(row[column])) for row in table)) for column in columns}
+    print("  ".join(column.rjust(widths[column]) for column in columns))
+    for row in table:
+        print("  ".join(str(row[column]).rjust(widths[column]) for column in columns))
+
+#writes the per game rows as csv or json, chosen by the file extension
+def export(path, results, table):
+    if path.endswith(".json"):
+        with open(path, "w") as file:
+            json.dump({"summary": table, "games": results}, file, indent=2)
+        return
+    fields = {}
+    for result in results:
+        fields.update(dict.fromkeys(result))
+    with open(path, "w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=list(fields))
+        writer.writeheader()
+        writer.writerows(results)
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="ASTEROIDS parameter sweeps over seeded headless games")
+    parser.add_argument("--param", type=parse_param, action="append", default=[], metavar="NAME=v1,v2", help="module global of asteroids/main.py and the values to sweep, repeatable")
+    parser.add_argument("--seeds", type=int, default=10, help="games per parameter combination")
+    parser.add_argument("--seed", type=int, default=1, help="first seed")
+    parser.add_argument("--seconds", type=float, default=300, help="simulated seconds before a surviving game is stopped")
+    parser.add_argument("--delta", type=float, default=1/60)
+    parser.add_argument("--input", default=None, help="play a recorded session's input instead of the bot")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--output", help="write every game's row, and the summary for .json, to this .csv or .json file")
+    return parser.parse_args(argv)
+
+def main(argv):
+    args = parse_args(argv)
+    names = [name for name, values in args.param]
+    tasks = [(params, seed, args.seconds, args.delta, args.input) for params in grid(args.param) for seed in range(args.seed, args.seed + args.seeds)]
+
+    #a fresh process per game, so module globals never leak from one game into the next
+    results = []
+    start = time.perf_counter()
+    with multiprocessing.get_context("spawn").Pool(args.jobs, maxtasksperchild=1) as pool:
+        for result in pool.imap_unordered(play_game, tasks):
+            results.append(result)
+            label = "  ".join(f"{name}={result[name]}" for name in names)
+            outcome = result.get("error") or f"survived {result['survival_s']:.1f} s  score {result['score']}  gold {result['gold']}"
+            print(f"[{len(results)}/{len(tasks)}] {label}  seed {result['seed']}  {outcome}", file=sys.stderr)
+    wall = time.perf_counter() - start
+    print(f"games: {len(results)}  jobs: {args.jobs}  wall: {wall:.1f} s  ({len(results) / max(wall, 1e-9):.2f} games/s)", file=sys.stderr)
+
+    results.sort(key=lambda result: (tuple(result[name] for name in names), result["seed"]))
+    table = aggregate(results, names)
+    print_table(table)
+    if args.output:
+        export(args.output, results, table)
+    return 1 if any("error" in result for result in results) else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,59 @@
+import numpy as np
+
+from store import ParticleStore, ASTEROID
+from broadphase import SpatialHash, self_pairs, cross_pairs
+
+def random_circles(seed, count, size=400):
+    rng = np.random.default_rng(seed)
+    return rng.uniform(-size, size, (count, 2)), rng.uniform(1, 20, count)
+
+#touching pairs by comparing every circle with every other one
+def brute_force_pairs(position, radius):
+    delta = position[None, :, :] - position[:, None, :]
+    touching = (delta * delta).sum(axis=2) <= (radius[:, None] + radius[None, :]) ** 2
+    i, j = np.nonzero(np.triu(touching, 1))
+    return set(zip(i.tolist(), j.tolist()))
+
+def touching_pairs(position, radius, i, j):
+    delta = position[j] - position[i]
+    touching = (delta * delta).sum(axis=1) <= (radius[i] + radius[j]) ** 2
+    return set(zip(np.minimum(i, j)[touching].tolist(), np.maximum(i, j)[touching].tolist()))
+
+def test_pairs_match_brute_force():
+    for seed in range(5):
+        position, radius = random_circles(seed, 300)
+        i, j = SpatialHash.for_radii(radius).build(position).pairs()
+        assert touching_pairs(position, radius, i, j) == brute_force_pairs(position, radius)
+
+def test_pairs_report_every_candidate_once():
+    position, radius = random_circles(7, 500, size=100)
+    i, j = SpatialHash.for_radii(radius).build(position).pairs()
+    assert not (i == j).any()
+    unordered = set(zip(np.minimum(i, j).tolist(), np.maximum(i, j).tolist()))
+    assert len(unordered) == len(i)
+
+def test_query_matches_brute_force():
+    position, radius = random_circles(1, 200)
+    points, reach = random_circles(2, 50)
+    q, e = SpatialHash.for_radii(reach, radius).build(position).query(points)
+    delta = position[e] - points[q]
+    touching = (delta * delta).sum(axis=1) <= (reach[q] + radius[e]) ** 2
+    delta = position[None, :, :] - points[:, None, :]
+    expected = np.nonzero((delta * delta).sum(axis=2) <= (reach[:, None] + radius[None, :]) ** 2)
+    assert set(zip(q[touching].tolist(), e[touching].tolist())) == set(zip(expected[0].tolist(), expected[1].tolist()))
+
+def test_boxes_are_found_from_every_cell_they_cover():
+    grid = SpatialHash(10).build_boxes(np.array([[0.0, 0.0], [100.0, 100.0]]), np.array([[35.0, 5.0], [101.0, 101.0]]))
+    q, e = grid.query_points(np.array([[31.0, 2.0], [50.0, 50.0], [100.5, 100.5]]))
+    assert sorted(zip(q.tolist(), e.tolist())) == [(0, 0), (2, 1)]
+
+def test_store_pairs_are_positions_within_the_groups():
+    store = ParticleStore()
+    far = store.add((1000, 1000), (0, 0), 5, 1, ASTEROID)
+    a = store.add((0, 0), (0, 0), 5, 1, ASTEROID)
+    b = store.add((8, 0), (0, 0), 5, 1, ASTEROID)
+    i, j = self_pairs(store, [far, a, b])
+    assert touching_pairs(store.position[[far, a, b]], store.radius[[far, a, b]], i, j) == {(1, 2)}
+    i, j = cross_pairs(store, [b], [far, a])
+    assert (0, 1) in set(zip(i.tolist(), j.tolist()))
+    assert [len(side) for side in cross_pairs(store, [], [a])] == [0, 0]
@@ -0,0 +1,70 @@
+import numpy as np
+
+from store import ParticleStore, ASTEROID, BULLET, BOX, CLUMP
+from collision import resolve_collisions, resolve_member_collisions, sweep_bullets, time_of_impact
+
+#one step of a store, snapshot first like GameState.update
+def step(store, delta=1/60):
+    store.snapshot()
+    store.integrate(delta, 10**6, 10**6)
+
+def test_time_of_impact_head_on():
+    time = time_of_impact(np.array([[-10.0, 0.0]]), np.array([[20.0, 0.0]]), np.array([2.0]))
+    assert np.allclose(time, [0.4])
+
+def test_time_of_impact_starting_overlap_counts_only_when_approaching():
+    start = np.array([[-1.0, 0.0], [-1.0, 0.0]])
+    motion = np.array([[5.0, 0.0], [-5.0, 0.0]])
+    time = time_of_impact(start, motion, np.array([2.0, 2.0]))
+    assert time[0] == 0
+    assert np.isinf(time[1])
+
+def test_sweep_catches_target_crossing_the_path():
+    store = ParticleStore()
+    bullet = store.add((100, 50), (6000, 0), 2, 1, BULLET)
+    asteroid = store.add((150, 20), (0, 3600), 3, 1, ASTEROID)
+    step(store)
+    assert sweep_bullets(store, [bullet], [asteroid]).tolist() == [0]
+    assert resolve_collisions(store, [asteroid], [bullet]).tolist() == [0]
+
+def test_sweep_ignores_bullet_fired_behind_the_muzzle():
+    store = ParticleStore()
+    asteroid = store.add((93, 50), (0, 0), 3, 1, ASTEROID)
+    store.snapshot()
+    bullet = store.add((100, 50), (6000, 0), 2, 1, BULLET)
+    store.integrate(1/60, 10**6, 10**6)
+    assert len(sweep_bullets(store, [bullet], [asteroid])) == 0
+
+#a bullet that bounced off last step still overlaps the asteroid but moves away from it,
+#it must not be put back in contact nor bounced again
+def test_bullet_touching_and_moving_away_is_not_hit_again():
+    store = ParticleStore()
+    asteroid = store.add((100, 100), (0, 0), 10, 100, ASTEROID)
+    bullet = store.add((111, 100), (600, 0), 2, 1, BULLET)
+    store.snapshot()
+    store.position[bullet] = (111, 100)
+    store.previous[bullet] = (110, 100)
+    assert len(sweep_bullets(store, [bullet], [asteroid])) == 0
+    assert len(resolve_collisions(store, [asteroid], [bullet])) == 0
+    assert store.velocity[bullet].tolist() == [600, 0]
+
+def test_approaching_pair_bounces_once():
+    store = ParticleStore()
+    a = store.add((0, 0), (10, 0), 5, 1, ASTEROID)
+    b = store.add((9, 0), (-10, 0), 5, 1, ASTEROID)
+    assert resolve_collisions(store, [a], [b]).tolist() == [0]
+    assert store.velocity[a, 0] < 0 < store.velocity[b, 0]
+    assert len(resolve_collisions(store, [a], [b])) == 0
+
+#an asteroid touching the outermost particles of a wide clump hits it, far outside the box radius,
+#and the box takes the push once however many particles it touches
+def test_asteroid_hits_clump_members_and_pushes_the_box_once():
+    store = ParticleStore()
+    box = store.add((0, 0), (0, 0), 10, 50, BOX)
+    members = store.add_many(np.array([[96.0, 0.0], [96.0, -3.0], [0.0, 0.0]]), (0, 0), 5, 50, CLUMP)
+    store.owner[members] = box
+    asteroid = store.add((104, 0), (-30, 0), 5, 50, ASTEROID)
+    assert resolve_member_collisions(store, [asteroid], members).tolist() == [0]
+    assert store.velocity[asteroid].tolist() == [0, 0]
+    assert np.allclose(store.velocity[box], (-30, 0))
+    assert store.velocity[members].tolist() == [[0, 0]] * 3
@@ -0,0 +1,25 @@
+import numpy as np
+import pygame
+
+from dirty import DirtyRects, merge_boxes
+
+def test_merge_boxes_covers_touched_tiles_in_runs():
+    rects = merge_boxes(np.array([[5, 5, 40, 10], [100, 70, 101, 71]]), 32, 320, 240)
+    assert [tuple(rect) for rect in rects] == [(0, 0, 64, 32), (96, 64, 32, 32)]
+
+#states that draw without beginning a frame, like the title screen, must not pile up rects for the next game frame
+def test_drawing_outside_a_frame_is_not_tracked():
+    screen = pygame.Surface((320, 240))
+    dirty = DirtyRects(True, 320, 240)
+    for frame in range(100):
+        dirty.add(pygame.Rect(0, 0, 10, 10))
+        dirty.add_boxes(np.array([[0, 0, 10, 10]]))
+        assert dirty.flush() is None
+    assert dirty.rects == [] and dirty.boxes == []
+
+    dirty.begin(screen, (0, 0, 0))
+    dirty.add(pygame.Rect(200, 200, 10, 10))
+    assert dirty.flush() is None
+    dirty.begin(screen, (0, 0, 0))
+    dirty.add(pygame.Rect(0, 0, 10, 10))
+    assert [tuple(rect) for rect in dirty.flush()] == [(0, 0, 32, 32), (192, 192, 32, 32)]
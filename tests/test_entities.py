@@ -0,0 +1,53 @@
+from entities import Entities
+
+class Entity:
+    def __init__(self, name):
+        self.name = name
+        self.active = True
+
+def names(entities):
+    return sorted(entity.name for entity in entities)
+
+def test_removal_during_iteration_visits_every_entity_once():
+    entities = Entities(Entity(name) for name in range(10))
+    seen = []
+    for entity in entities:
+        seen.append(entity.name)
+        if entity.name % 2 == 0:
+            entities.remove(entity)
+            assert len(entities) == 10 - (entity.name // 2 + 1)
+    assert seen == list(range(10))
+    assert names(entities) == [1, 3, 5, 7, 9]
+    assert [entity.name for entity in entities] == [entities[index].name for index in range(len(entities))]
+
+def test_nested_iteration_defers_removals_to_the_outer_loop():
+    entities = Entities(Entity(name) for name in range(4))
+    for outer in entities:
+        for inner in entities:
+            if inner.name == 3:
+                entities.remove(inner)
+    assert names(entities) == [0, 1, 2]
+
+def test_handles_stop_resolving_once_the_slot_is_reused():
+    entities = Entities()
+    first = Entity("first")
+    handle = entities.append(first)
+    assert entities.get(handle) is first
+    assert entities.remove(first)
+    assert not entities.remove(first)
+    assert entities.get(handle) is None
+    second = Entity("second")
+    entities.append(second)
+    assert second.handle[0] == handle[0]
+    assert entities.get(handle) is None
+    assert entities.get(second.handle) is second
+
+def test_prune_removes_inactive_entities():
+    entities = Entities()
+    entities.extend(Entity(name) for name in range(6))
+    for entity in entities:
+        entity.active = entity.name > 2
+    entities.prune()
+    assert names(entities) == [3, 4, 5]
+    entities.clear()
+    assert not entities and len(entities) == 0
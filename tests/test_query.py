@@ -0,0 +1,69 @@
+import numpy as np
+
+from store import ParticleStore, ASTEROID, CLUMP
+from query import WorldQuery
+
+#a store of random asteroids and clump particles, some of them released
+def random_store(seed, count=300):
+    rng = np.random.default_rng(seed)
+    store = ParticleStore()
+    kinds = np.where(rng.uniform(size=count) < 0.5, ASTEROID, CLUMP)
+    for kind in (ASTEROID, CLUMP):
+        rows = kinds == kind
+        store.add_many(rng.uniform(0, 800, (rows.sum(), 2)), (0, 0), rng.uniform(2, 25, rows.sum()), 1, kind)
+    store.release_many(rng.choice(count, count // 10, replace=False))
+    return store, rng
+
+def distances(store, candidates, point):
+    delta = store.position[candidates] - point
+    return np.sqrt((delta * delta).sum(axis=1))
+
+def test_pick_matches_brute_force():
+    store, rng = random_store(0)
+    world = WorldQuery(store)
+    candidates = store.active()
+    for point in rng.uniform(-50, 850, (200, 2)):
+        distance = distances(store, candidates, point)
+        inside = distance <= store.radius[candidates]
+        expected = store.handle(candidates[inside][np.argmin(distance[inside])]) if inside.any() else None
+        assert world.pick(point) == expected
+
+def test_nearest_matches_brute_force():
+    store, rng = random_store(1)
+    world = WorldQuery(store, CLUMP)
+    candidates = store.active(CLUMP)
+    for point in rng.uniform(-400, 1200, (200, 2)):
+        distance = distances(store, candidates, point)
+        index, generation = world.nearest(point)
+        assert store.generation[index] == generation
+        assert np.isclose(distances(store, [index], point)[0], distance.min())
+
+def test_within_matches_brute_force():
+    store, rng = random_store(2)
+    world = WorldQuery(store)
+    candidates = store.active()
+    for point, radius in zip(rng.uniform(0, 800, (100, 2)), rng.uniform(0, 60, 100)):
+        expected = candidates[distances(store, candidates, point) <= radius + store.radius[candidates]]
+        assert sorted(world.within(point, radius)) == sorted(store.handle(index) for index in expected)
+
+def test_kind_and_filter_narrow_the_results():
+    store = ParticleStore()
+    asteroid = store.add((100, 100), (0, 0), 10, 1, ASTEROID)
+    clump = store.add((104, 100), (0, 0), 10, 1, CLUMP)
+    world = WorldQuery(store)
+    assert world.pick((104, 100)) == store.handle(clump)
+    assert world.pick((104, 100), kind=ASTEROID) == store.handle(asteroid)
+    assert world.nearest((104, 100), filter=lambda found: found != clump) == store.handle(asteroid)
+
+def test_results_follow_the_store_after_invalidate():
+    store = ParticleStore()
+    first = store.add((100, 100), (0, 0), 10, 1, ASTEROID)
+    world = WorldQuery(store)
+    handle = world.pick((100, 100))
+    assert handle == store.handle(first)
+    store.release(first)
+    assert world.pick((100, 100)) is None
+    second = store.add((300, 300), (0, 0), 10, 1, ASTEROID)
+    world.invalidate()
+    assert world.nearest((100, 100)) == store.handle(second)
+    assert store.resolve(handle) is None
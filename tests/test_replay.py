@@ -0,0 +1,46 @@
+import json
+
+import numpy as np
+import pytest
+import pygame
+
+from replay import InputState, Recorder, Replay, FRAME, VERSION
+
+KEYS = (pygame.K_w, pygame.K_a, pygame.K_SPACE)
+
+def test_recording_round_trip(tmp_path):
+    path = str(tmp_path / "session.rec")
+    state = InputState(KEYS)
+    recorder = Recorder(path, {"seed": 5, "delta": 1 / 60})
+    frames = [
+        (state.bits[pygame.K_w], (10, 20), 1, 1, 1 / 60, 123),
+        (state.bits[pygame.K_a] | state.bits[pygame.K_SPACE], (-5, 600), 4, 300, 1 / 120, 2**32 - 1),
+        (0, (0, 0), 0, 0, 0.0, 0),
+    ]
+    for keys, mouse, buttons, steps, delta, checksum in frames:
+        state.set(keys, mouse, buttons)
+        recorder.frame(state, steps, delta, checksum)
+    recorder.save()
+
+    replay = Replay(path)
+    assert replay.header == {"seed": 5, "delta": 1 / 60, "version": VERSION}
+    assert len(replay) == 3
+    assert replay.keys == [frame[0] for frame in frames]
+    assert replay.mouse == [frame[1] for frame in frames]
+    assert replay.buttons == [frame[2] for frame in frames]
+    assert replay.steps == [frame[3] for frame in frames]
+    assert replay.delta == [frame[4] for frame in frames]
+    assert replay.checksums == [frame[5] for frame in frames]
+
+def test_input_state_bits():
+    state = InputState(KEYS)
+    state.set(state.bits[pygame.K_SPACE], (1, 2), 0b100)
+    assert state.key(pygame.K_SPACE) and not state.key(pygame.K_w)
+    assert state.button(2) and not state.button(0)
+
+def test_other_versions_are_refused(tmp_path):
+    path = str(tmp_path / "old.rec")
+    with open(path, "wb") as file:
+        np.savez_compressed(file, header=np.array(json.dumps({"version": VERSION + 1})), frames=np.zeros(1, dtype=FRAME))
+    with pytest.raises(ValueError):
+        Replay(path)
@@ -0,0 +1,52 @@
+import numpy as np
+
+from store import ParticleStore, ACTIVE, KINEMATIC, ENTERING, UNCULLED, ASTEROID, BOX, CLUMP
+
+def alive(store, index):
+    return bool(store.flags[index] & ACTIVE)
+
+#a clump member above the screen lives while its body comes in and dies once the body is knocked back up
+def test_entering_member_above_the_screen_is_culled_once_its_body_rises():
+    store = ParticleStore()
+    box = store.add((100, -40), (0, 60), 10, 1, BOX)
+    store.flags[box] |= UNCULLED
+    member = store.add((100, -50), (0, -5), 2, 1, CLUMP)
+    store.flags[member] |= KINEMATIC | ENTERING
+    store.owner[member] = box
+
+    store.integrate(1/60, 200, 200)
+    assert alive(store, member)
+
+    store.velocity[box] = (0, -60)
+    store.integrate(1/60, 200, 200)
+    assert not alive(store, member)
+    assert alive(store, box)
+
+def test_entering_particle_is_culled_below_the_screen():
+    store = ParticleStore()
+    index = store.add((100, 250), (0, 60), 2, 1, ASTEROID)
+    store.flags[index] |= ENTERING
+    store.integrate(1/60, 200, 200)
+    assert not alive(store, index)
+
+def test_particle_leaves_entering_once_on_screen():
+    store = ParticleStore()
+    index = store.add((100, 10), (0, -60), 2, 1, ASTEROID)
+    store.flags[index] |= ENTERING
+    store.integrate(1/60, 200, 200)
+    assert store.flags[index] & ENTERING == 0
+    store.position[index] = (100, -5)
+    store.integrate(1/60, 200, 200)
+    assert not alive(store, index)
+
+def test_released_slots_are_reused_with_a_new_generation():
+    store = ParticleStore(capacity=2)
+    first = store.add((0, 0), (0, 0), 1, 1, ASTEROID)
+    handle = store.handle(first)
+    store.release(first)
+    assert store.resolve(handle) is None
+    indices = store.add_many(np.zeros((3, 2)), (1, 0), 1, 1, ASTEROID)
+    assert first in indices.tolist()
+    assert store.capacity >= 3
+    assert len(store.active(ASTEROID)) == 3
+    assert store.resolve(store.handle(first)) == first
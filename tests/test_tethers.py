@@ -0,0 +1,52 @@
+import numpy as np
+
+from store import ParticleStore, SHIP, BOX, CLUMP
+from tethers import TetherSet
+
+#a ship and a clump body with two members to its right
+def tethered_store():
+    store = ParticleStore()
+    ship = store.add((0, 0), (0, 0), 5, 1, SHIP)
+    box = store.add((200, 0), (0, 0), 5, 10, BOX)
+    members = store.add_many(np.array([[200.0, -10.0], [200.0, 10.0]]), (0, 0), 5, 10, CLUMP)
+    tethers = TetherSet()
+    tethers.add(store, ship, members, box)
+    return store, tethers, ship, box, members
+
+def test_springs_pull_the_ship_and_the_body_together():
+    store, tethers, ship, box, members = tethered_store()
+    tethers.update(store, 0, 9.8, spin=False)
+    assert store.force[ship, 0] > 0
+    assert np.allclose(store.force[box], -store.force[ship])
+    assert (store.force[members] == 0).all()
+
+def test_off_centre_pull_turns_the_body():
+    store = ParticleStore()
+    ship = store.add((0, 0), (0, 0), 5, 1, SHIP)
+    box = store.add((200, 0), (0, 0), 5, 10, BOX)
+    member = store.add((200, 50), (0, 0), 5, 10, CLUMP)
+    tethers = TetherSet()
+    tethers.add(store, ship, [member], box)
+    tethers.update(store, 0, 9.8)
+    assert store.torque[box] != 0
+
+def test_attached_counts_rows_until_the_last_one_dies():
+    store, tethers, ship, box, members = tethered_store()
+    assert tethers.attached(box) and len(tethers) == 2
+    store.release(members[0])
+    tethers.prune(store)
+    assert tethers.attached(box) and len(tethers) == 1
+
+    #a slot reused by a new particle before the prune does not keep the row alive
+    store.release(members[1])
+    assert store.add((0, 0), (0, 0), 5, 1, CLUMP) == members[1]
+    tethers.prune(store)
+    assert not tethers.attached(box) and len(tethers) == 0
+
+def test_detach_drops_every_row_of_a_body():
+    store, tethers, ship, box, members = tethered_store()
+    other = store.add((-200, 0), (0, 0), 5, 10, BOX)
+    tethers.add(store, ship, [other], other)
+    tethers.detach(box)
+    assert not tethers.attached(box) and tethers.attached(other)
+    assert tethers.body.tolist() == [other]